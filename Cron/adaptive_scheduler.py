@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fiyat değişim geçmişine göre uyarlanan yoklama (polling) planlayıcısı.
+
+Her etkinlik için bir "sıcaklık" puanı hesaplanır:
+    * *_price_history tablosundaki son `window_days` günlük değişim hızı,
+    * etkinlik tarihine kalan gün (yaklaştıkça sıcak),
+    * tüm aktif kategoriler tükendiyse puan düşer (yine de ara sıra bakılır).
+
+Puan, etkinliğin ne sıklıkla yoklanacağını (poll interval) belirler. Her
+çalıştırmada süresi dolan etkinlikler öncelik sırasına göre (puan × gecikme
+oranı) sabit bir istek bütçesine sığdırılır; gecikme oranı soğuk etkinliklerin
+sonsuza kadar ertelenmesini önler. Veritabanında henüz olmayan (yeni)
+etkinlikler her zaman çekilir; bütçe yalnızca bilinenler için geçerlidir.
+
+Kullanım:
+    python Cron/adaptive_scheduler.py bubilet --budget 500
+"""
+
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+PROVIDER_TABLES = {
+    "bubilet":    "bubilet",
+    "bugece":     "bugece",
+    "passo":      "passo",
+    "biletinial": "biletinial",
+    "biletix":    "biletix",
+}
+
+WINDOW_DAYS = 14               # değişim hızı için bakılan geçmiş
+MIN_INTERVAL_HOURS = 6         # en sıcak etkinlik bile bundan sık yoklanmaz
+MAX_INTERVAL_HOURS = 24 * 7    # en soğuk etkinlik en az haftada bir yoklanır
+SOLD_OUT_FACTOR = 0.2
+
+
+# --------------------------------------------------------------------------- #
+# 1. Tarih yardımcıları
+# --------------------------------------------------------------------------- #
+def parse_when(value) -> Optional[datetime]:
+    """
+    Sağlayıcıların farklı tarih biçimlerini (ISO, 'Z' son ekli, boşluklu,
+    saat dilimli) yerel saatte naive datetime'a çevirir. Okunamazsa None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value).strip().replace("Z", "+00:00")
+        # 3.10 fromisoformat yalnızca 3 veya 6 haneli kesri kabul eder
+        text = re.sub(r"(\.\d{3})\d*(?=[+-]\d\d:\d\d$|$)", r"\1", text)
+        try:
+            dt = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+# --------------------------------------------------------------------------- #
+# 2. İstatistikleri yükle
+# --------------------------------------------------------------------------- #
+def load_event_stats(conn, provider: str, window_days: int = WINDOW_DAYS) -> List[Dict]:
+    """
+    Etkinlik başına: id, name, venue, date, last_seen, son penceredeki değişim
+    sayısı, aktif ve tükenmiş kategori sayıları.
+    change_date bazı tablolarda metin (ISO), bölümlenmiş tablolarda
+    TIMESTAMP'tir; 'YYYY-MM-DD' parametresi ikisiyle de doğrudan
+    karşılaştırılır, böylece bölümlü tablolarda yalnızca son aylar taranır
+    (bkz. history_maintenance.py).
+    """
+    table = PROVIDER_TABLES[provider]
+    since = (datetime.now() - timedelta(days=window_days)).strftime("%Y-%m-%d")
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT e.id, e.name, e.venue, e.date::text, e.last_seen::text,
+                   COALESCE(h.changes, 0), COALESCE(p.active, 0), COALESCE(p.sold_out, 0)
+            FROM {table}_events e
+            LEFT JOIN (
+                SELECT event_id, COUNT(*) AS changes
+                FROM {table}_price_history
+                WHERE change_date >= %(since)s
+                GROUP BY event_id
+            ) h ON h.event_id = e.id
+            LEFT JOIN (
+                SELECT event_id,
+                       COUNT(*) AS active,
+                       COUNT(*) FILTER (WHERE sold_out) AS sold_out
+                FROM {table}_prices
+                WHERE is_active = TRUE
+                GROUP BY event_id
+            ) p ON p.event_id = e.id
+            """,
+            {"since": since},
+        )
+        columns = ("id", "name", "venue", "date", "last_seen", "changes", "active_prices", "sold_out_prices")
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+
+# --------------------------------------------------------------------------- #
+# 3. Puan ve yoklama aralığı
+# --------------------------------------------------------------------------- #
+def score_event(stats: Dict, now: datetime, window_days: int = WINDOW_DAYS) -> float:
+    """0'dan büyük sıcaklık puanı; geçmiş etkinlikler için 0."""
+    when = parse_when(stats.get("date"))
+    if when is not None and when < now:
+        return 0.0
+
+    changes_per_day = stats.get("changes", 0) / window_days
+    days_left = (when - now).total_seconds() / 86400 if when else 90
+    proximity = 1 / (1 + days_left / 7)        # 0 gün → 1.0, 1 hafta → 0.5, 3 ay → ~0.07
+
+    score = (1 + 4 * changes_per_day) * (0.25 + proximity)
+    active = stats.get("active_prices", 0)
+    if active and stats.get("sold_out_prices", 0) >= active:
+        score *= SOLD_OUT_FACTOR
+    return score
+
+
+def poll_interval(score: float) -> timedelta:
+    """Puan 1 civarı → günde bir; puan arttıkça aralık kısalır."""
+    if score <= 0:
+        return timedelta(hours=MAX_INTERVAL_HOURS)
+    hours = 24 / score
+    return timedelta(hours=min(MAX_INTERVAL_HOURS, max(MIN_INTERVAL_HOURS, hours)))
+
+
+# --------------------------------------------------------------------------- #
+# 4. Çalıştırma planı
+# --------------------------------------------------------------------------- #
+def build_work_list(stats: Iterable[Dict], budget: int, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Süresi dolan etkinlikleri öncelik sırasına göre bütçe kadar seçer.
+    Dönen kayıtlara `score`, `interval` ve `priority` alanları eklenir.
+    """
+    now = now or datetime.now()
+    due = []
+    for row in stats:
+        score = score_event(row, now)
+        if score <= 0:
+            continue
+        interval = poll_interval(score)
+        last_seen = parse_when(row.get("last_seen"))
+        elapsed = (now - last_seen) if last_seen else interval
+        if elapsed < interval:
+            continue
+        overdue = elapsed / interval
+        due.append({**row, "score": score, "interval": interval,
+                    "priority": score * math.log1p(overdue)})
+
+    due.sort(key=lambda r: r["priority"], reverse=True)
+    return due[:budget]
+
+
+def plan_run(conn, provider: str, budget: int) -> Dict:
+    """
+    Dönüş:
+        known    → veritabanındaki tüm etkinlik id'leri
+        selected → bu çalıştırmada yoklanacak id'ler
+        rows     → seçilen kayıtların ayrıntıları
+    """
+    stats = load_event_stats(conn, provider)
+    rows = build_work_list(stats, budget)
+    return {
+        "known": {row["id"] for row in stats},
+        "selected": {row["id"] for row in rows},
+        "rows": rows,
+    }
+
+
+def natural_key(name, venue, date):
+    """Liste kaydını DB satırıyla eşlemek için (name, venue, date) anahtarı."""
+    return (name, venue, parse_when(date))
+
+
+def refresh_windows(conn, provider: str, key: str = "id") -> Dict:
+    """
+    Artımlı keşif için etkinlik başına yenileme penceresi (poll_interval).
+    key="id" → DB id'si, key="natural" → natural_key(name, venue, date).
+    """
+    now = datetime.now()
+    windows = {}
+    for row in load_event_stats(conn, provider):
+        k = row["id"] if key == "id" else natural_key(row["name"], row["venue"], row["date"])
+        windows[k] = poll_interval(score_event(row, now))
+    return windows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from db import connect_db
+
+    parser = argparse.ArgumentParser(description="Uyarlanır yoklama planını göster")
+    parser.add_argument("provider", choices=sorted(PROVIDER_TABLES))
+    parser.add_argument("--budget", type=int, default=500)
+    args = parser.parse_args()
+
+    with connect_db() as conn:
+        plan = plan_run(conn, args.provider, args.budget)
+    print(f"{len(plan['known'])} bilinen etkinlik, {len(plan['selected'])} seçildi (bütçe {args.budget})")
+    for row in plan["rows"][:20]:
+        print(f"  {row['score']:6.2f}  her {row['interval']}  {row['name']} @ {row['venue']} ({row['date']})")
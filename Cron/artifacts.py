@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çalıştırma çıktılarının (log + veri dışa aktarımları) yönetimi.
+
+run_events.sh her çalıştırmanın sonunda `finalize` çağırır:
+
+    1. Loglar sıkıştırılıp arşive taşınır, asıl dosyalar boşaltılır:
+           artifacts/logs/YYYY-MM-DD/run_events-HHMMSS.log.gz
+    2. Veri dışa aktarımları (CSV vb.) değiştiyse sıkıştırılmış kopyası alınır:
+           artifacts/exports/YYYY-MM-DD/bubilet_prices-HHMMSS.csv.gz
+    3. Saklama politikası: ARTIFACT_RETENTION_DAYS'ten eski günler silinir,
+       toplam boyut ARTIFACT_MAX_MB'ı aşarsa en eski dosyalardan başlanarak
+       silinir (profiling.py çıktıları, artifacts/profiles dahil).
+    4. İsteğe bağlı dışa aktarma (ARTIFACT_EXPORT):
+           none (varsayılan) → hiçbir şey
+           git               → yalnızca dışa aktarım dosyaları commit + push
+                               (loglar ve diğer dosyalar depoya girmez)
+
+Arşiv kökü ARTIFACT_DIR (varsayılan: depo kökünde artifacts/).
+
+Kullanım:
+    python Cron/artifacts.py finalize --logs run_events.log run_events_error.log
+    python Cron/artifacts.py prune
+"""
+
+import glob
+import gzip
+import hashlib
+import os
+import shutil
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+ROOT = Path(__file__).resolve().parent.parent
+ARTIFACT_DIR = Path(os.getenv("ARTIFACT_DIR", ROOT / "artifacts"))
+RETENTION_DAYS = int(os.getenv("ARTIFACT_RETENTION_DAYS", "30"))
+MAX_BYTES = int(float(os.getenv("ARTIFACT_MAX_MB", "500")) * 1024 * 1024)
+
+# Boşlukla ayrılmış glob listesi (depo köküne göre)
+DEFAULT_EXPORTS = "bubilet_*.csv kuzey/bugece_events.csv data/bubilet_istanbul_data*.csv"
+EXPORT_GLOBS = os.getenv("ARTIFACT_EXPORTS", DEFAULT_EXPORTS).split()
+
+
+# --------------------------------------------------------------------------- #
+# 1. Yardımcılar
+# --------------------------------------------------------------------------- #
+def _day_dir(kind: str, now: datetime) -> Path:
+    path = ARTIFACT_DIR / kind / now.strftime("%Y-%m-%d")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _gzip_to(src: Path, dest: Path) -> None:
+    with open(src, "rb") as fin, gzip.open(dest, "wb", compresslevel=6) as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stamped(path: Path, now: datetime) -> str:
+    return f"{path.stem}-{now:%H%M%S}{path.suffix}.gz"
+
+
+def expand(patterns: Iterable[str]) -> List[Path]:
+    paths = []
+    for pattern in patterns:
+        paths += [Path(p) for p in sorted(glob.glob(str(ROOT / pattern)))]
+    return paths
+
+
+# --------------------------------------------------------------------------- #
+# 2. Log döndürme
+# --------------------------------------------------------------------------- #
+def rotate_logs(paths: Iterable[Path], now: Optional[datetime] = None) -> List[Path]:
+    """Boş olmayan logları sıkıştırıp arşive alır ve asıl dosyayı boşaltır."""
+    now = now or datetime.now()
+    rotated = []
+    for path in paths:
+        path = Path(path)
+        if not path.exists() or path.stat().st_size == 0:
+            continue
+        dest = _day_dir("logs", now) / _stamped(path, now)
+        _gzip_to(path, dest)
+        # Dosyayı silmek yerine boşalt: açık tanıtıcısı olan süreçler yazmaya devam edebilir
+        with open(path, "r+b") as f:
+            f.truncate(0)
+        rotated.append(dest)
+    return rotated
+
+
+# --------------------------------------------------------------------------- #
+# 3. Dışa aktarım arşivi
+# --------------------------------------------------------------------------- #
+def archive_exports(paths: Iterable[Path], now: Optional[datetime] = None) -> List[Path]:
+    """
+    Dışa aktarım dosyalarının sıkıştırılmış kopyasını alır. İçeriği bir önceki
+    arşivlenen kopyayla aynıysa atlanır (özetler exports/.digests altında).
+    """
+    now = now or datetime.now()
+    digests = ARTIFACT_DIR / "exports" / ".digests"
+    digests.mkdir(parents=True, exist_ok=True)
+    archived = []
+    for path in paths:
+        path = Path(path)
+        if not path.is_file():
+            continue
+        name = str(path.relative_to(ROOT)).replace(os.sep, "__")
+        marker = digests / name
+        digest = _digest(path)
+        if marker.exists() and marker.read_text() == digest:
+            continue
+        dest = _day_dir("exports", now) / _stamped(Path(name), now)
+        _gzip_to(path, dest)
+        marker.write_text(digest)
+        archived.append(dest)
+    return archived
+
+
+# --------------------------------------------------------------------------- #
+# 4. Saklama politikası
+# --------------------------------------------------------------------------- #
+def prune(retention_days: int = RETENTION_DAYS, max_bytes: int = MAX_BYTES) -> int:
+    """Eski gün klasörlerini ve boyut sınırını aşan en eski dosyaları siler."""
+    removed = 0
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    for kind in ("logs", "exports", "profiles"):
+        base = ARTIFACT_DIR / kind
+        if not base.exists():
+            continue
+        for day in base.iterdir():
+            if day.is_dir() and not day.name.startswith(".") and day.name < cutoff:
+                removed += sum(1 for _ in day.iterdir())
+                shutil.rmtree(day)
+
+    files = [
+        p for p in ARTIFACT_DIR.glob("*/*/*")
+        if p.is_file() and not p.parent.name.startswith(".")
+    ]
+    total = sum(p.stat().st_size for p in files)
+    for path in sorted(files, key=lambda p: p.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        total -= path.stat().st_size
+        path.unlink()
+        removed += 1
+    for day in ARTIFACT_DIR.glob("*/*"):
+        if day.is_dir() and not day.name.startswith(".") and not any(day.iterdir()):
+            day.rmdir()
+    return removed
+
+
+def usage() -> int:
+    return sum(p.stat().st_size for p in ARTIFACT_DIR.rglob("*") if p.is_file())
+
+
+# --------------------------------------------------------------------------- #
+# 5. İsteğe bağlı dışa aktarma
+# --------------------------------------------------------------------------- #
+def export_git(paths: Iterable[Path]) -> bool:
+    """Yalnızca verilen dosyaları commit'ler ve push eder; değişiklik yoksa False."""
+    rel = [str(Path(p).relative_to(ROOT)) for p in paths if Path(p).exists()]
+    if not rel:
+        return False
+    subprocess.run(["git", "add", "--", *rel], cwd=ROOT, check=True)
+    staged = subprocess.run(["git", "diff", "--cached", "--quiet", "--", *rel], cwd=ROOT)
+    if staged.returncode == 0:
+        return False
+    message = f"Veri dışa aktarımı: {datetime.now():%Y-%m-%d %H:%M}"
+    subprocess.run(["git", "commit", "-m", message, "--", *rel], cwd=ROOT, check=True)
+    subprocess.run(["git", "push"], cwd=ROOT, check=True)
+    return True
+
+
+EXPORTERS = {
+    "none": lambda paths: False,
+    "git": export_git,
+}
+
+
+def finalize(logs: Iterable[str], exports: Optional[Iterable[str]] = None,
+             export: Optional[str] = None) -> None:
+    started = time.perf_counter()
+    now = datetime.now()
+    export_paths = expand(exports if exports is not None else EXPORT_GLOBS)
+
+    rotated = rotate_logs([ROOT / p for p in logs], now)
+    archived = archive_exports(export_paths, now)
+    removed = prune()
+
+    mode = (export or os.getenv("ARTIFACT_EXPORT", "none")).strip().lower()
+    if mode not in EXPORTERS:
+        raise ValueError(f"Bilinmeyen ARTIFACT_EXPORT: {mode} (seçenekler: {', '.join(EXPORTERS)})")
+    exported = EXPORTERS[mode](export_paths)
+
+    print(f"🗄️  {len(rotated)} log döndürüldü, {len(archived)} dışa aktarım arşivlendi, "
+          f"{removed} eski dosya silindi; arşiv {usage() / 1024 / 1024:.1f} MB "
+          f"(sınır {MAX_BYTES / 1024 / 1024:.0f} MB), dışa aktarma: {mode}"
+          f"{' ✅' if exported else ''} — {time.perf_counter() - started:.1f} sn")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Çalıştırma çıktılarının arşivlenmesi")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_final = sub.add_parser("finalize", help="Logları döndür, dışa aktarımları arşivle, eskileri sil")
+    p_final.add_argument("--logs", nargs="*", default=[], help="Döndürülecek log dosyaları (depo köküne göre)")
+    p_final.add_argument("--exports", nargs="*", default=None, help="Dışa aktarım globları (varsayılan ARTIFACT_EXPORTS)")
+    p_final.add_argument("--export", choices=sorted(EXPORTERS), default=None, help="ARTIFACT_EXPORT yerine")
+
+    sub.add_parser("prune", help="Yalnızca saklama politikasını uygula")
+    args = parser.parse_args()
+
+    if args.command == "finalize":
+        finalize(args.logs, args.exports, args.export)
+    else:
+        print(f"{prune()} dosya silindi; arşiv {usage() / 1024 / 1024:.1f} MB")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diskteki Bubilet CSV'lerini PostgreSQL COPY ile toplu olarak geri yükler.
+
+Kaynaklar (depo köküne göre):
+    * bubilet_events.csv, bubilet_prices.csv, bubilet_price_history.csv
+      → eski CSV tabanlı sürümün çıktıları, olduğu gibi yüklenir.
+    * data/bubilet_istanbul_data*.csv (kuzey/bubilet.py anlık görüntüleri)
+      → sırayla yeniden oynatılır; ardışık görüntüler arasındaki farklar
+        ADDED / UPTADED / REMOVED history satırlarına dönüştürülür, son
+        durum etkinlik ve fiyat satırları olarak yüklenir.
+
+Her kaynak satırları BACKFILL_BATCH_ROWS'luk partiler hâlinde akıtır:
+
+    CSV satırları → COPY → geçici hazırlık tablosu (LIKE hedef)
+                 → INSERT ... SELECT ... ON CONFLICT DO NOTHING → commit
+
+Mevcut (canlı) satırlar ezilmez; history için aynı (event_id, category,
+change_date, change_type) satırı varsa eklenmez. Her commit sonrası
+kaynak başına işlenen satır sayısı STATE_DIR/backfill.sqlite3'e yazılır;
+yarıda kalan çalıştırma kaldığı satırdan devam eder.
+
+Kullanım:
+    python Cron/backfill_csv.py                 # tümü, kaldığı yerden
+    python Cron/backfill_csv.py --dry-run       # yalnızca satır sayıları
+    python Cron/backfill_csv.py --only snapshot_history --reset
+"""
+
+import csv
+import io
+import os
+import re
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from local_state import connect_state
+
+ROOT = Path(__file__).resolve().parent.parent
+BATCH_ROWS = int(os.getenv("BACKFILL_BATCH_ROWS", "50000"))
+
+SNAPSHOT_RE = re.compile(r"bubilet_istanbul_data(?:_(\d+))?\.csv$")
+
+PROGRESS_SQL = """
+CREATE TABLE IF NOT EXISTS backfill_progress (
+    source     TEXT PRIMARY KEY,
+    rows_done  INTEGER NOT NULL,
+    finished   INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+)
+"""
+
+
+# --------------------------------------------------------------------------- #
+# 1. CSV okuma yardımcıları
+# --------------------------------------------------------------------------- #
+def read_csv(path: Path) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _null(value: Optional[str]) -> Optional[str]:
+    value = None if value is None else value.strip()
+    return value or None
+
+
+def _pg_array(value: Optional[str]) -> Optional[str]:
+    """'Semicenk ' → '{"Semicenk"}' (format_pg_array ile aynı kaçış)."""
+    value = _null(value)
+    if not value:
+        return None
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'{{"{escaped}"}}'
+
+
+def snapshot_files(folder: Path = ROOT / "data") -> List[Path]:
+    """kuzey/bubilet.py numaralandırması: ana dosya 1, sonra _2, _3 ..."""
+    found = []
+    for path in folder.glob("bubilet_istanbul_data*.csv"):
+        match = SNAPSHOT_RE.match(path.name)
+        if match:
+            found.append((int(match.group(1) or 1), path.name != "bubilet_istanbul_data.csv", path))
+    return [path for *_, path in sorted(found)]
+
+
+# --------------------------------------------------------------------------- #
+# 2. Eski CSV çıktıları (doğrudan eşleme)
+# --------------------------------------------------------------------------- #
+EVENT_COLUMNS = ("id", "provider", "name", "venue", "date", "artist", "created_at", "last_seen")
+PRICE_COLUMNS = ("event_id", "category", "price", "remaining", "sold_out", "created_at", "last_seen", "is_active")
+HISTORY_COLUMNS = ("event_id", "category", "price", "remaining", "sold_out", "change_date", "change_type")
+
+
+def legacy_events() -> Iterator[Tuple]:
+    for r in read_csv(ROOT / "bubilet_events.csv"):
+        yield (r["event_id"], _null(r["provider"]) or "Bubilet", _null(r["event_name"]), _null(r["venue_name"]),
+               _null(r["start_date"]), _pg_array(r["artist_name"]), _null(r["created_at"]), _null(r["last_seen"]))
+
+
+def legacy_prices() -> Iterator[Tuple]:
+    for r in read_csv(ROOT / "bubilet_prices.csv"):
+        yield tuple(_null(r[c]) for c in PRICE_COLUMNS)
+
+
+def legacy_history() -> Iterator[Tuple]:
+    for r in read_csv(ROOT / "bubilet_price_history.csv"):
+        yield tuple(_null(r[c]) for c in HISTORY_COLUMNS)
+
+
+# --------------------------------------------------------------------------- #
+# 3. Anlık görüntülerden zaman çizelgesi
+# --------------------------------------------------------------------------- #
+class SnapshotTimeline:
+    """
+    Görüntüleri sırayla oynatır. Anahtar (seansID, kategori, ticket_active);
+    bir görüntüde aynı anahtar iki kez geçerse ilki geçerlidir. Bir seans
+    görüntüde varken kategorisi kaybolduysa REMOVED yazılır; seansın tümü
+    kaybolduysa (etkinlik bitti/kaldırıldı) history üretilmez.
+    """
+
+    def __init__(self, files: Optional[List[Path]] = None):
+        self.files = snapshot_files() if files is None else files
+
+    def _snapshots(self) -> Iterator[Tuple[str, Dict[Tuple, Dict]]]:
+        for path in self.files:
+            rows: Dict[Tuple, Dict] = {}
+            scraped = None
+            for r in read_csv(path):
+                key = (r["seansID"], r["category_name"], r["ticket_active"])
+                rows.setdefault(key, r)
+                scraped = scraped or r["scrape_time"]
+            yield scraped, rows
+
+    def history(self) -> Iterator[Tuple]:
+        state: Dict[Tuple, Dict] = {}
+        for scraped, rows in self._snapshots():
+            for key, r in rows.items():
+                prev = state.get(key)
+                if prev is None:
+                    change = "ADDED"
+                elif (prev["price"], prev["remaining_tickets"]) != (r["price"], r["remaining_tickets"]):
+                    change = "UPTADED"          # Bubilet history'nin yazımı (bkz. storage_sinks.PROVIDERS)
+                else:
+                    change = None
+                if change:
+                    yield self._history_row(r, r["scrape_time"] or scraped, change)
+            present = {key[0] for key in rows}
+            for key, prev in state.items():
+                if key not in rows and key[0] in present:
+                    yield self._history_row(prev, scraped, "REMOVED")
+            state = {**{k: v for k, v in state.items() if k[0] not in present}, **rows}
+
+    @staticmethod
+    def _history_row(r: Dict, when: str, change: str) -> Tuple:
+        remaining = _null(r["remaining_tickets"])
+        return (r["seansID"], r["category_name"], _null(r["price"]), remaining,
+                str(remaining == "0"), when, change)
+
+    def final_state(self) -> Tuple[Dict[str, Dict], Dict[Tuple, Dict]]:
+        """Seans başına ilk/son görülme ve anahtar başına son fiyat."""
+        events: Dict[str, Dict] = {}
+        prices: Dict[Tuple, Dict] = {}
+        for scraped, rows in self._snapshots():
+            for key, r in rows.items():
+                when = r["scrape_time"] or scraped
+                ev = events.setdefault(key[0], {**r, "first_seen": when})
+                ev["last_seen"] = when
+                prev = prices.get(key)
+                prices[key] = {**r, "first_seen": prev["first_seen"] if prev else when, "last_seen": when}
+        return events, prices
+
+    def events(self) -> Iterator[Tuple]:
+        for seans, r in self.final_state()[0].items():
+            yield (seans, "Bubilet", _null(r["event_name"]), _null(r["venue_name"]), _null(r["event_date"]),
+                   None, r["first_seen"], r["last_seen"])
+
+    def prices(self) -> Iterator[Tuple]:
+        for (seans, category, active), r in self.final_state()[1].items():
+            remaining = _null(r["remaining_tickets"])
+            yield (seans, category, _null(r["price"]), remaining, str(remaining == "0"),
+                   r["first_seen"], r["last_seen"], active)
+
+
+# --------------------------------------------------------------------------- #
+# 4. Kaynaklar ve hedefler
+# --------------------------------------------------------------------------- #
+HISTORY_GUARD = """
+WHERE NOT EXISTS (
+    SELECT 1 FROM bubilet_price_history h
+    WHERE h.event_id = s.event_id AND h.category = s.category
+      AND h.change_date = s.change_date AND h.change_type = s.change_type
+)
+"""
+
+TARGETS = {
+    "events":  ("bubilet_events", EVENT_COLUMNS, "ON CONFLICT (id) DO NOTHING"),
+    "prices":  ("bubilet_prices", PRICE_COLUMNS, "ON CONFLICT (event_id, category, is_active) DO NOTHING"),
+    "history": ("bubilet_price_history", HISTORY_COLUMNS, HISTORY_GUARD),
+}
+
+# Sıra önemlidir: etkinlikler → fiyatlar → history
+SOURCES: List[Tuple[str, str, Callable[[], Iterable[Tuple]]]] = [
+    ("legacy_events", "events", legacy_events),
+    ("snapshot_events", "events", lambda: SnapshotTimeline().events()),
+    ("legacy_prices", "prices", legacy_prices),
+    ("snapshot_prices", "prices", lambda: SnapshotTimeline().prices()),
+    ("legacy_history", "history", legacy_history),
+    ("snapshot_history", "history", lambda: SnapshotTimeline().history()),
+]
+
+
+# --------------------------------------------------------------------------- #
+# 5. COPY yükleyici
+# --------------------------------------------------------------------------- #
+class Progress:
+    def __init__(self):
+        self.conn = connect_state("backfill")
+        self.conn.execute(PROGRESS_SQL)
+
+    def get(self, source: str) -> Tuple[int, bool]:
+        row = self.conn.execute(
+            "SELECT rows_done, finished FROM backfill_progress WHERE source = ?", (source,)
+        ).fetchone()
+        return (row["rows_done"], bool(row["finished"])) if row else (0, False)
+
+    def set(self, source: str, rows_done: int, finished: bool = False) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO backfill_progress (source, rows_done, finished, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (source) DO UPDATE
+            SET rows_done = excluded.rows_done, finished = excluded.finished, updated_at = excluded.updated_at
+            """,
+            (source, rows_done, int(finished), datetime.now().isoformat()),
+        )
+
+    def reset(self, sources: Iterable[str]) -> None:
+        self.conn.executemany("DELETE FROM backfill_progress WHERE source = ?", [(s,) for s in sources])
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _copy_buffer(rows: List[Tuple]) -> io.StringIO:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    # FORMAT csv: tırnaksız boş alan NULL olarak okunur
+    writer.writerows(["" if v is None else v for v in row] for row in rows)
+    buf.seek(0)
+    return buf
+
+
+def load_source(conn, progress: Progress, source: str, kind: str, rows: Iterable[Tuple],
+                batch_rows: int = BATCH_ROWS) -> Tuple[int, int]:
+    """Kaynağı kaldığı satırdan itibaren yükler; (okunan, eklenen) döner."""
+    table, columns, conflict = TARGETS[kind]
+    cols = ", ".join(columns)
+    stage = f"backfill_stage_{kind}"
+    done, _ = progress.get(source)
+    it = islice(iter(rows), done, None)
+    read = inserted = 0
+
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS)")
+        conn.commit()
+        while True:
+            batch = list(islice(it, batch_rows))
+            if not batch:
+                break
+            cur.execute(f"TRUNCATE {stage}")
+            cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv)", _copy_buffer(batch))
+            cur.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} s {conflict}")
+            inserted += cur.rowcount
+            conn.commit()
+            read += len(batch)
+            progress.set(source, done + read)
+            print(f"   {source}: {done + read} satır ({inserted} yeni)")
+    progress.set(source, done + read, finished=True)
+    return read, inserted
+
+
+def run(only: Optional[List[str]] = None, reset: bool = False, dry_run: bool = False) -> None:
+    selected = [s for s in SOURCES if not only or s[0] in only]
+    progress = Progress()
+    if reset:
+        progress.reset(name for name, *_ in selected)
+
+    conn = None
+    if not dry_run:
+        from db import connect_db
+
+        conn = connect_db()
+    try:
+        for name, kind, make_rows in selected:
+            started = time.perf_counter()
+            done, finished = progress.get(name)
+            if finished and not dry_run:
+                print(f"⏭️  {name}: daha önce tamamlandı ({done} satır) — yeniden için --reset")
+                continue
+            try:
+                rows = make_rows()
+                if dry_run:
+                    count = sum(1 for _ in rows)
+                    print(f"🔎 {name} → {TARGETS[kind][0]}: {count} satır")
+                    continue
+                print(f"📥 {name} → {TARGETS[kind][0]} (kaldığı yer: {done})")
+                read, inserted = load_source(conn, progress, name, kind, rows)
+            except FileNotFoundError as exc:
+                print(f"⚠️  {name}: kaynak yok ({exc.filename})")
+                continue
+            print(f"✅ {name}: {read} satır okundu, {inserted} eklendi — {time.perf_counter() - started:.1f} sn")
+    finally:
+        if conn:
+            conn.close()
+        progress.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bubilet CSV geçmişini COPY ile geri yükle")
+    parser.add_argument("--only", nargs="*", choices=[name for name, *_ in SOURCES], help="Yalnızca bu kaynaklar")
+    parser.add_argument("--reset", action="store_true", help="Seçili kaynakların ilerlemesini sıfırla")
+    parser.add_argument("--dry-run", action="store_true", help="Veritabanına bağlanmadan satırları say")
+    args = parser.parse_args()
+
+    run(args.only, args.reset, args.dry_run)
@@ -7,21 +7,24 @@ Bu betik, Bugece ile aynı price-history mantığını paylaşır.
 """
 
 import os
-import time
-import random
-import json
-import html
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Optional, Union
+from typing import Callable, Iterator, List, Dict, Optional
 
-import psycopg2
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
-from decimal import Decimal, InvalidOperation
-import re
+
+from biletinial_parse import extract_events_from_html, parse_detail_page
+import change_feed
+from checkpoints import open_checkpoint
+from concurrency import get_limiter
+from crawl_frontier import CrawlFrontier, detail_links
+from db import connection, release
+from parse_pool import ParsePool
+from pipeline import Stage, format_stats, run_pipeline
+from storage_sinks import configured as sink_configured, diff_prices, open_sink
 
 # ------------------------------------------------------------- #
 # 0. Şema SQL dosyasını oku
@@ -35,204 +38,89 @@ load_dotenv()                                   # .env içinden DATABASE_URL al
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 def connect_db():
-    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan."""
-    return psycopg2.connect(DATABASE_URL, sslmode="require")
+    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan (daemon'da sıcak bağlantı)."""
+    return connection()
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+session = requests.Session()          # daemon modunda bağlantılar çalıştırmalar arası açık kalır
+# Uçuştaki istek sayısının üst sınırı; asıl hızı limiter ayarlar (bkz. concurrency.py)
+FETCH_WORKERS = int(os.getenv("BILETINIAL_FETCH_WORKERS", "4"))
+limiter = get_limiter("biletinial", FETCH_WORKERS)
 
 
 # ------------------------------------------------------------- #
-# 2. Yardımcı: '₺1.500,00'  ->  Decimal('1500.00') 
+# 2–4. Fiyat ayrıştırma, HTML → ham etkinlik, normalizasyon:
+#      biletinial_parse.py (süreç havuzunda da çalışır)
 # ------------------------------------------------------------- #
-Number = Union[int, float, Decimal]
-
-def parse_price(raw: Union[str, Number, None]) -> Optional[Decimal]:
-    """
-    Biletinial 'price' alanını güvenle Decimal'a çevirir.
-    Kabul edilen örnekler:
-        '₺1.500,00', '1.500,00 ₺', '1.500 TL', '650,00', 1500, None
-    Dönüş: Decimal veya None
-    """
-    if raw is None:
-        return None
-
-    # Zaten nümerik mi?
-    if isinstance(raw, (int, float, Decimal)):
-        return Decimal(str(raw))
-
-    # --- Metin temizleme ----------------------------------------------------
-    txt = str(raw).strip()
-
-    # “Ücretsiz” vb. durumlar
-    if txt.lower() in {"ücretsiz", "free"}:
-        return Decimal("0")
-
-    # Para sembolleri / birimleri
-    txt = (txt.replace("₺", "")
-             .replace("TL", "")
-             .replace("tl", "")
-             .strip())
-
-    # Binlik ve ondalık ayırıcıları dönüştür
-    txt = txt.replace(".", "")   # 1.500,00  →  1500,00
-    txt = txt.replace(",", ".")  # 1500,00   →  1500.00
-
-    # Harf kalıntılarını sil (ör. “/KDV dâhil”)
-    m = re.search(r"[-+]?\d*\.?\d+", txt)
-    if not m:
-        return None
-
-    try:
-        return Decimal(m.group())
-    except InvalidOperation:
-        return None
 
 
 # ------------------------------------------------------------- #
-# 3. HTML → Ham etkinlik veri yapısı (extract_events_from_html)
+# 5. Veritabanı şemasını kontrol et / oluştur 
 # ------------------------------------------------------------- #
-def extract_events_from_html(html_content: str) -> List[Dict]:
-    soup = BeautifulSoup(html_content, "html.parser")
-    events: List[Dict] = []
-
-    # -------------------------------------------------------------------
-    # 1) Sayfanın en üstünde “Sanatçılar” bilgisi tek seferlik:
-    artist = ""
-    person_div = soup.find("div", class_="yds_cinema_details_person")
-    if person_div:
-        artist_links = [a.get_text(strip=True) for a in person_div.find_all("a")]
-        artist = ", ".join(artist_links).strip()
-
-    # -------------------------------------------------------------------
-    # 2) Sayfanın ortasında “Açıklama (description)” metni:
-    description = ""
-    # <div class="yds_cinema_movie_thread_info"> altındaki <p> etiketlerini alalım:
-    desc_info = soup.find("div", class_="yds_cinema_movie_thread_info")
-    if desc_info:
-        # Birden fazla <p> olabilir, hepsini birleştirebiliriz:
-        paras = [p.get_text(strip=True) for p in desc_info.find_all("p")]
-        description = " ".join(paras).strip()
-
-    # -------------------------------------------------------------------
-    # 3) Şehir/Seans parçalarını dolaşıyoruz:
-    #    Her city_box içinde birden fazla session olabilir.
-    for city_box in soup.select("div.ed-biletler__sehir"):
-        city = city_box.get("data-sehir", "").strip()
-
-        # Etkinlik adı (sayfanın üstündeki <h1>):
-        name_container = soup.find('div', class_='yds_cinema_details_info_title')
-        name_tag = name_container.find('h1') if name_container else None
-        name = name_tag.get_text(strip=True) if name_tag else 'Unknown'
-
-        for session in city_box.select("div.ed-biletler__sehir__gun"):
-            # Mekan (venue):
-            loc_tag  = session.find("address", itemprop="name")
-            venue    = loc_tag.get_text(strip=True) if loc_tag else "Unknown"
-
-            # Tarih (ISO):
-            time_tag = session.find("time", itemprop="startDate")
-            date_iso = time_tag.get("content", "") if time_tag else ""
-
-            # Promoter bilgisini çek (<div class="ed-biletler__sehir__gun__organizator"> içinde <span>…</span>):
-            promoter = ""
-            org_div  = session.find("div", class_="ed-biletler__sehir__gun__organizator")
-            if org_div:
-                span_tag = org_div.find("span")
-                promoter = span_tag.get_text(strip=True) if span_tag else ""
-
-            # Bilet kategorileri & fiyatlar:
-            price_list = []
-            prices_link = session.find("a", class_="ticket_price_tooltip")
-            if prices_link:
-                try:
-                    decoded = html.unescape(prices_link["data-ticketprices"])
-                    price_json = json.loads(decoded)
-                    for p in price_json.get("prices", []):
-                        price_val = parse_price(p.get("price"))
-                        if price_val is None:
-                            continue
-
-                        price_list.append({
-                            "category": p.get("name", "").strip(),
-                            "price": price_val,
-                            "sold_out": False,
-                        })
-                except Exception as err:
-                    print("⚠️  price decode:", err)
-
-            # -------------------------------------------------------------------
-            # 4) Event objesini oluştururken “artist”, “promoter” ve “description” alanlarını da ekliyoruz:
-            events.append({
-                "name":         name,
-                "venue":        f"{city} {venue}" if city else venue,
-                "date":         date_iso,
-                "artist":       artist,         # Sayfanın en üstünden çekilen sanatçı(lar)
-                "promoter":     promoter,       # Her seans için satırdaki organizatör
-                "description":  description,    # Sayfanın ortasındaki açıklama metni
-                "price_list":   price_list,
-            })
-
-    return events
 
 
-# ------------------------------------------------------------- #
-# 4. Normalizasyon (normalize_biletinial_event)
-# ------------------------------------------------------------- #
-def normalize_biletinial_event(raw: Dict) -> Dict:
-    return {
-        "provider":     "Biletinial",
-        "name":         raw["name"],
-        "venue":        raw["venue"],
-        "date":         raw["date"],          
-        "artist":       raw.get("artist", ""),       # SANATÇI
-        "promoter":     raw.get("promoter", ""),     # ORGANİZATÖR
-        "description":  raw.get("description", ""),  # AÇIKLAMA
-        "price_list":   raw["price_list"],
-    }
-
 
 # ------------------------------------------------------------- #
-# 5. Veritabanı şemasını kontrol et / oluştur 
+# 6. Şehir liste sayfasından konser detay linklerini çıkart 
 # ------------------------------------------------------------- #
+NAVIGATION_LINKS = "nav a[href], header a[href], footer a[href], [role=navigation] a[href], [class*=menu] a[href]"
 
 
+def city_listing_url(city_slug: str) -> str:
+    return f"https://biletinial.com/tr-tr/muzik/{city_slug}"
+
 
-# ------------------------------------------------------------- #
-# 6. Şehir liste sayfasından konser detay linklerini çıkart 
-# ------------------------------------------------------------- #
 def extract_links_from_city_listing(city_slug: str) -> List[str]:
     """
-    https://biletinial.com/tr-tr/muzik/<city_slug> sayfasından
-    konser detay linklerini (…/tr-tr/muzik/<city_slug>/<etkinlik-slug>) döndürür.
+    https://biletinial.com/tr-tr/muzik/<city_slug> sayfasından konser detay
+    linklerini kanonik ve tekil olarak döndürür. Şehir, tür, kategori,
+    sayfalama, filtre ve gezinme menüsü bağlantıları liste sayfası sayılıp
+    atlanır (bkz. crawl_frontier.py).
     """
-    url = f"https://biletinial.com/tr-tr/muzik/{city_slug}"
-    html_page = requests.get(url, headers=HEADERS, timeout=15).text
-    base = "https://biletinial.com"
-    links = [
-        base + a["href"]
-        for a in BeautifulSoup(html_page, "html.parser").find_all("a", href=True)
-        if a["href"].startswith("/tr-tr/muzik/")
-    ]
-    return sorted(set(links))   # Tekilleştir ve sıralı döndür
+    url = city_listing_url(city_slug)
+    html_page = limiter.call(session.get, url, headers=HEADERS, timeout=15).text
+    soup = BeautifulSoup(html_page, "html.parser")
+    hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+    # Gezinme menüsündeki (şehir / tür) bağlantılar kalıba uysa da liste sayfasıdır
+    navigation = [a["href"] for a in soup.select(NAVIGATION_LINKS)]
+    return detail_links(hrefs, "biletinial", base=url,
+                        listing_urls=[*map(city_listing_url, CITIES), *navigation])
 
 
 # ------------------------------------------------------------- #
 # 7. Belirli bir şehir için tüm etkinlikleri çek (HTML → ham event list)
 # ------------------------------------------------------------- #
-def fetch_city_events(city_slug: str) -> List[Dict]:
-    events: List[Dict] = []
+def fetch_detail_page(link: str) -> bytes:
+    """Tek bir detay sayfasının ham baytlarını döndürür (HTTP hatasında exception).
+
+    Çözümleme (decode + BeautifulSoup) ayrıştırma aşamasına bırakılır; bayt
+    süreç havuzuna kopyalanmadan önce metne çevrilmez.
+    """
+    resp = limiter.call(session.get, link, headers=HEADERS, timeout=15)
+    resp.raise_for_status()
+    return resp.content
+
+
+def fetch_detail_events(link: str) -> List[Dict]:
+    """Tek bir detay sayfasını indirip ham etkinlik listesini döndürür (HTTP hatasında exception)."""
+    return extract_events_from_html(fetch_detail_page(link).decode("utf-8", errors="replace"))
+
+
+def fetch_city_events(city_slug: str) -> Iterator[Dict]:
+    """Şehrin etkinliklerini sayfa sayfa üretir (tüm şehir bellekte toplanmaz)."""
     for link in extract_links_from_city_listing(city_slug):
         try:
-            resp = requests.get(link, headers=HEADERS, timeout=15)
-            if resp.status_code == 200:
-                events += extract_events_from_html(resp.text)
-            else:
-                print(f"⚠️  {link} — HTTP {resp.status_code}")
+            yield from fetch_detail_events(link)
         except Exception as exc:
             print(f"⚠️  {link} —", exc)
 
-        time.sleep(random.uniform(1, 3))  # Kibar ol: 1–3 saniye rastgele bekle
-    return events
+
+def iter_city_links() -> Iterator[str]:
+    """Tüm şehirlerin detay linkleri; şehirler arası tekrarları CrawlFrontier ayıklar."""
+    for city in CITIES:
+        links = extract_links_from_city_listing(city)
+        print(f"\n=== {city} === {len(links)} detay linki")
+        yield from links
 
 
 # ------------------------------------------------------------- #
@@ -265,184 +153,91 @@ def upsert_event_with_history(event: dict) -> None:
     with connect_db() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
 
         # ---- 8.1 Etkinlik upsert (artist + promoter + description) ------------
+        # (name, venue, date) tekil indeksi: bkz. Cron/migrations.py
         cur.execute(
             """
-            SELECT id
-            FROM biletinial_events
-            WHERE name = %(name)s
-              AND venue = %(venue)s
-              AND date = %(date)s
+            INSERT INTO biletinial_events
+                (provider, name, venue, date, artist, promoter, description, created_at, last_seen)
+            VALUES
+                (%(provider)s, %(name)s, %(venue)s, %(date)s,
+                 %(artist)s, %(promoter)s, %(description)s, %(now)s, %(now)s)
+            ON CONFLICT (name, venue, date) DO UPDATE
+            SET provider     = EXCLUDED.provider,
+                artist       = EXCLUDED.artist,
+                promoter     = EXCLUDED.promoter,
+                description  = EXCLUDED.description,
+                last_seen    = EXCLUDED.last_seen
+            RETURNING id
             """,
             {
-                "name":  event["name"],
-                "venue": event["venue"],
-                "date":  event["date"]
+                "provider":    event["provider"],
+                "name":        event["name"],
+                "venue":       event["venue"],
+                "date":        event["date"],
+                "artist":      format_pg_array(event.get("artist", "")),
+                "promoter":    format_pg_array(event.get("promoter", "")),
+                "description": event.get("description", ""),
+                "now":         now
             }
         )
-        row = cur.fetchone()
-
-        if row:
-            # Mevcut etkinlik → UPDATE
-            event_id = row["id"]
-            cur.execute(
-                """
-                UPDATE biletinial_events
-                SET provider     = %(provider)s,
-                    artist       = %(artist)s,
-                    promoter     = %(promoter)s,
-                    description  = %(description)s,
-                    last_seen    = %(now)s
-                WHERE id = %(id)s
-                """,
-                {
-                    "provider":    event["provider"],
-                    "artist":      format_pg_array(event.get("artist", "")),
-                    "promoter":    format_pg_array(event.get("promoter", "")),
-                    "description": event.get("description", ""),
-                    "now":         now,
-                    "id":          event_id
-                }
-            )
-        else:
-            # Yeni etkinlik → INSERT
-            cur.execute(
-                """
-                INSERT INTO biletinial_events
-                    (provider, name, venue, date, artist, promoter, description, created_at, last_seen)
-                VALUES
-                    (%(provider)s, %(name)s, %(venue)s, %(date)s,
-                     %(artist)s, %(promoter)s, %(description)s, %(now)s, %(now)s)
-                RETURNING id
-                """,
-                {
-                    "provider":    event["provider"],
-                    "name":        event["name"],
-                    "venue":       event["venue"],
-                    "date":        event["date"],
-                    "artist":      format_pg_array(event.get("artist", "")),
-                    "promoter":    format_pg_array(event.get("promoter", "")),
-                    "description": event.get("description", ""),
-                    "now":         now
-                }
-            )
-            event_id = cur.fetchone()["id"]
-
-        # ---- 8.2 Mevcut aktif fiyatları al -----------------------------------
+        event_id = cur.fetchone()["id"]
+
+        # ---- 8.2 Aktif fiyatları çek ve karşılaştır --------------------------------
+        # Sütunlu görüntü üzerinden (bkz. price_snapshot.py); fiyatlar kuruş
+        # cinsinden karşılaştırılır, satır dict'i yalnızca değişenler için üretilir
         cur.execute(
             """
             SELECT id, category, price, sold_out
             FROM biletinial_prices
-            WHERE event_id = %(eid)s
-              AND is_active = TRUE
+            WHERE event_id = %(eid)s AND is_active = TRUE
             """,
             {"eid": event_id}
         )
-        existing = {r["category"]: r for r in cur.fetchall()}
-        seen_categories = set()
-
-        # ---- 8.3 Gelen price_list ile eşleştir: değişen/yenileri ekle ----------
-        for p in event["price_list"]:
-            cat, price_val, sold_out = p["category"], p["price"], p["sold_out"]
-            seen_categories.add(cat)
-
-            if cat in existing:
-                prev = existing[cat]
-                if (prev["price"], prev["sold_out"]) != (price_val, sold_out):
-                    # Fiyat veya sold_out değişmiş → history kaydına 'UPDATED'
-                    cur.execute(
-                        """
-                        INSERT INTO biletinial_price_history
-                            (event_id, category, price, sold_out, change_date, change_type)
-                        VALUES
-                            (%(eid)s, %(cat)s, %(old_price)s, %(old_so)s, %(now)s, 'UPDATED')
-                        """,
-                        {
-                            "eid":       event_id,
-                            "cat":       cat,
-                            "old_price": prev["price"],
-                            "old_so":    prev["sold_out"],
-                            "now":       now
-                        }
-                    )
-                    # Fiyat tablosunu güncelle
-                    cur.execute(
-                        """
-                        UPDATE biletinial_prices
-                        SET price      = %(price)s,
-                            sold_out   = %(sold_out)s,
-                            last_seen  = %(now)s
-                        WHERE id = %(id)s
-                        """,
-                        {
-                            "price":     price_val,
-                            "sold_out":  sold_out,
-                            "now":       now,
-                            "id":        prev["id"]
-                        }
-                    )
-            else:
-                # Yeni kategori → biletinial_prices ve history'ye 'ADDED'
-                cur.execute(
-                    """
-                    INSERT INTO biletinial_prices
-                        (event_id, category, price, sold_out, created_at, last_seen, is_active)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, %(now)s, TRUE)
-                    RETURNING id
-                    """,
-                    {
-                        "eid":       event_id,
-                        "cat":       cat,
-                        "price":     price_val,
-                        "sold_out":  sold_out,
-                        "now":       now
-                    }
-                )
-                cur.execute(
-                    """
-                    INSERT INTO biletinial_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'ADDED')
-                    """,
-                    {
-                        "eid":       event_id,
-                        "cat":       cat,
-                        "price":     price_val,
-                        "sold_out":  sold_out,
-                        "now":       now
-                    }
-                )
-
-        # ---- 8.4 Listede olmayan kategorileri pasifleştir + history 'REMOVED' ---
-        for cat, rec in existing.items():
-            if cat not in seen_categories:
-                cur.execute(
-                    """
-                    UPDATE biletinial_prices
-                    SET is_active = FALSE,
-                        last_seen = %(now)s
-                    WHERE id = %(id)s
-                    """,
-                    {"now": now, "id": rec["id"]}
-                )
-                cur.execute(
-                    """
-                    INSERT INTO biletinial_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'REMOVED')
-                    """,
-                    {
-                        "eid":       event_id,
-                        "cat":       cat,
-                        "price":     rec["price"],
-                        "sold_out":  rec["sold_out"],
-                        "now":       now
-                    }
-                )
+        diff = diff_prices("biletinial", event_id, ((r["id"], r["category"], r["price"], r["sold_out"]) for r in cur),
+                           event["price_list"])
+
+        # ---- 8.3 Değişenleri güncelle, yenileri ekle, eksikleri pasifleştir -----------
+        cur.executemany(
+            """
+            UPDATE biletinial_prices
+            SET price = %s, sold_out = %s, last_seen = %s
+            WHERE id = %s
+            """,
+            [(row["price"], row["sold_out"], now, row["_row"]) for row in diff["update"]]
+        )
+        cur.executemany(
+            """
+            INSERT INTO biletinial_prices
+                (event_id, category, price, sold_out, created_at, last_seen, is_active)
+            VALUES
+                (%s, %s, %s, %s, %s, %s, TRUE)
+            """,
+            [(event_id, row["category"], row["price"], row["sold_out"], now, now) for row in diff["insert"]]
+        )
+        cur.executemany(
+            """
+            UPDATE biletinial_prices
+            SET is_active = FALSE, last_seen = %s
+            WHERE id = %s
+            """,
+            [(now, row_id) for row_id in diff["deactivate"]]
+        )
+
+        # ---- 8.4 History: ADDED / UPDATED (eski değerler) / REMOVED --------------
+        cur.executemany(
+            """
+            INSERT INTO biletinial_price_history
+                (event_id, category, price, sold_out, change_date, change_type)
+            VALUES
+                (%s, %s, %s, %s, %s, %s)
+            """,
+            [(event_id, h["category"], h["price"], h["sold_out"], now, h["change_type"]) for h in diff["history"]]
+        )
+        changes = change_feed.from_sink_history("biletinial", diff["history"], {event_id: event}, now)
+        change_feed.notify(cur, changes)            # commit'te teslim edilir
 
     # Bağlam yöneticisi commit/rollback işlemlerini otomatik yapar.
+    change_feed.publish(changes)
     print(f"[{now:%Y-%m-%d %H:%M:%S}] «{event['name']}» işlendi.")
 
 
@@ -456,22 +251,176 @@ CITIES = [
     "izmir",
 ]
 
-def scrape_biletinial_events():
+def page_refresh_windows(sink=None) -> Callable[[List[Dict]], Optional[timedelta]]:
+    """
+    Detay sayfasının yenileme aralığı: sayfadaki en sıcak etkinliğin uyarlanır
+    yoklama aralığı (bkz. adaptive_scheduler.py). Etkinliklerden biri DB'de
+    yoksa (ya da DB'ye yazılmıyorsa) None → CrawlFrontier varsayılanı.
+    """
+    if sink is not None and sink.name != "postgres":
+        return lambda events: None
+    from adaptive_scheduler import natural_key, refresh_windows
+
+    conn = connect_db()
+    try:
+        windows = refresh_windows(conn, "biletinial", key="natural")
+    finally:
+        release(conn)            # daemon dışında bağlantı kapanır (bkz. db.py)
+
+    def window(events: List[Dict]) -> Optional[timedelta]:
+        found = [windows.get(natural_key(e["name"], e["venue"], e["date"])) for e in events]
+        return min(found) if found and None not in found else None
+
+    return window
+
+
+def event_writer():
+    """STORAGE_SINK ayarlıysa (write, sink) toplu hedefi, değilse upsert_event_with_history döner."""
+    sink = open_sink("biletinial") if sink_configured() else None
+    return (sink.write if sink else upsert_event_with_history), sink
+
+
+def scrape_biletinial_events(pool: Optional[ParsePool] = None):
+    """
+    İndirme → ayrıştırma → yazma aşamaları sınırlı kuyruklarla eşzamanlı
+    çalışır (bkz. pipeline.py); yazma ana iş parçacığında kalır. Ayrıştırma
+    PARSE_WORKERS süreçlik havuzda yapılır (bkz. parse_pool.py). İndirme
+    hızını sabit bekleme yerine uyarlanır limiter belirler (bkz. concurrency.py).
+
+    Link listesi ve link başına tamamlanma checkpoint'e yazılır; yarıda kalan
+    çalıştırma yalnızca kalan linklerle sürer (bkz. checkpoints.py). Liste
+    tarama sınırından gelir: yalnızca yeni ve yenileme zamanı gelmiş detay
+    linkleri indirilir (bkz. crawl_frontier.py).
+    """
     total = 0
-    for city in CITIES:
-        print(f"\n=== {city} ===")
-        for raw_event in fetch_city_events(city):
-            try:
-                normed = normalize_biletinial_event(raw_event)
-                upsert_event_with_history(normed)
+    # Havuz, iş parçacıkları başlamadan önce açılır (fork güvenliği); daemon kendi havuzunu verir
+    owns_pool = pool is None
+    pool = pool or ParsePool()
+    write, sink = event_writer()
+    checkpoint = open_checkpoint("biletinial")
+    mark_done = checkpoint.marker(sink)
+    frontier = CrawlFrontier("biletinial")
+    mark_fetched = frontier.marker(sink)
+    refresh_window = page_refresh_windows(sink)
+
+    def fetch(link: str):
+        return link, fetch_detail_page(link)
+
+    def parse(item):
+        link, page = item
+        return link, pool.parse(parse_detail_page, page)
+
+    def store(item) -> None:
+        nonlocal total
+        link, events = item
+        try:
+            for normed in events:
+                write(normed)
                 total += 1
-            except Exception as exc:
-                print("⚠️  DB hata:", exc)
-    print(f"\n{total} etkinlik işlendi.")
+        except Exception as exc:
+            print("⚠️  DB hata:", exc)
+            return
+        mark_done(link)             # linkin tüm etkinlikleri yazıldı
+        mark_fetched(link, len(events), refresh_window(events))
+
+    try:
+        links = checkpoint.plan(lambda: frontier.plan(iter_city_links()))
+        stats = run_pipeline(
+            links,
+            [Stage("fetch", fetch, workers=FETCH_WORKERS, many=False),
+             Stage("parse", parse, workers=pool.workers, many=False)],
+            store,
+        )
+        if sink:
+            sink.close()
+            sink = None
+        checkpoint.finish()
+        frontier.prune()
+    finally:
+        if owns_pool:
+            pool.close()
+        if sink:
+            sink.close()
+        checkpoint.close()
+        frontier.close()
+    print(f"\n{total} etkinlik işlendi. ({format_stats(stats)})")
+    print(f"🧭 {frontier.summary()}")
+    print(f"🚦 {limiter.report()}")
 
 
 # ------------------------------------------------------------- #
-# 10. Ana bloğu: Şema kontrolü yap ve scrape işlemini başlat
+# 10. İş kuyruğu: detay URL'lerini birden çok işçiye dağıt
 # ------------------------------------------------------------- #
+QUEUE_NAME = "biletinial_detail"
+
+def produce_detail_links() -> None:
+    """Tarama sınırının seçtiği detay linklerini kuyruğa koyar (aynı link bir kez)."""
+    from work_queue import open_queue
+
+    cities = {}                                 # link → ilk listelendiği şehir
+    for city in CITIES:
+        for link in extract_links_from_city_listing(city):
+            cities.setdefault(link, city)
+    frontier = CrawlFrontier("biletinial")
+    links = frontier.plan(cities)
+    frontier.close()
+
+    queue = open_queue(QUEUE_NAME)
+    added = queue.enqueue((link, {"city": cities[link]}) for link in links)
+    print(f"📥 {added} detay linki kuyruğa eklendi → {queue.stats()}")
+    print(f"🧭 {frontier.summary()}")
+    queue.close()
+
+
+def work_detail_links() -> None:
+    """Kuyruktan link kiralar, sayfayı işler ve DB'ye yazar; kuyruk boşalınca çıkar."""
+    from work_queue import open_queue, run_worker
+
+    pool = ParsePool()
+    write, sink = event_writer()
+    frontier = CrawlFrontier("biletinial")
+    mark_fetched = frontier.marker(sink)
+    refresh_window = page_refresh_windows(sink)
+
+    def handle(link: str, _payload: Optional[Dict]) -> None:
+        events = pool.parse(parse_detail_page, fetch_detail_page(link))
+        for normed in events:
+            write(normed)
+        mark_fetched(link, len(events), refresh_window(events))
+
+    queue = open_queue(QUEUE_NAME)
+    try:
+        processed = run_worker(queue, handle)
+    finally:
+        pool.close()
+        if sink:
+            sink.close()
+        frontier.close()
+    print(f"\n{processed} detay sayfası işlendi → {queue.stats()}")
+    print(f"🚦 {limiter.report()}")
+    queue.close()
+
+
+# ------------------------------------------------------------- #
+# 11. Ana bloğu: Şema kontrolü yap ve scrape işlemini başlat
+# ------------------------------------------------------------- #
+def main(argv=None, pool: Optional[ParsePool] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Biletinial → Supabase")
+    parser.add_argument(
+        "--mode", choices=["all", "produce", "work"], default="all",
+        help="all: tek süreç (varsayılan) | produce: linkleri kuyruğa koy | work: kuyruktan işle",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "produce":
+        produce_detail_links()
+    elif args.mode == "work":
+        work_detail_links()
+    else:
+        scrape_biletinial_events(pool)
+
+
 if __name__ == "__main__":
-    scrape_biletinial_events()
+    main()
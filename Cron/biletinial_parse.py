@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Biletinial detay sayfası ayrıştırıcıları (HTML → normalize etkinlikler).
+
+Yalnızca BeautifulSoup'a bağımlıdır; veritabanı ya da ağ kodu içermediği
+için parse_pool.ParsePool süreçlerinde hafifçe içe aktarılır. Süreçler
+arasında ham bayt girer, normalize etkinlik listesi çıkar
+(parse_detail_page).
+"""
+
+import html
+import json
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+# ------------------------------------------------------------- #
+# 2. Yardımcı: '₺1.500,00'  ->  Decimal('1500.00') 
+# ------------------------------------------------------------- #
+Number = Union[int, float, Decimal]
+
+def parse_price(raw: Union[str, Number, None]) -> Optional[Decimal]:
+    """
+    Biletinial 'price' alanını güvenle Decimal'a çevirir.
+    Kabul edilen örnekler:
+        '₺1.500,00', '1.500,00 ₺', '1.500 TL', '650,00', 1500, None
+    Dönüş: Decimal veya None
+    """
+    if raw is None:
+        return None
+
+    # Zaten nümerik mi?
+    if isinstance(raw, (int, float, Decimal)):
+        return Decimal(str(raw))
+
+    # --- Metin temizleme ----------------------------------------------------
+    txt = str(raw).strip()
+
+    # “Ücretsiz” vb. durumlar
+    if txt.lower() in {"ücretsiz", "free"}:
+        return Decimal("0")
+
+    # Para sembolleri / birimleri
+    txt = (txt.replace("₺", "")
+             .replace("TL", "")
+             .replace("tl", "")
+             .strip())
+
+    # Binlik ve ondalık ayırıcıları dönüştür
+    txt = txt.replace(".", "")   # 1.500,00  →  1500,00
+    txt = txt.replace(",", ".")  # 1500,00   →  1500.00
+
+    # Harf kalıntılarını sil (ör. “/KDV dâhil”)
+    m = re.search(r"[-+]?\d*\.?\d+", txt)
+    if not m:
+        return None
+
+    try:
+        return Decimal(m.group())
+    except InvalidOperation:
+        return None
+
+
+# ------------------------------------------------------------- #
+# 3. HTML → Ham etkinlik veri yapısı (extract_events_from_html)
+# ------------------------------------------------------------- #
+def extract_events_from_html(html_content: str) -> List[Dict]:
+    soup = BeautifulSoup(html_content, "html.parser")
+    events: List[Dict] = []
+
+    # -------------------------------------------------------------------
+    # 1) Sayfanın en üstünde “Sanatçılar” bilgisi tek seferlik:
+    artist = ""
+    person_div = soup.find("div", class_="yds_cinema_details_person")
+    if person_div:
+        artist_links = [a.get_text(strip=True) for a in person_div.find_all("a")]
+        artist = ", ".join(artist_links).strip()
+
+    # -------------------------------------------------------------------
+    # 2) Sayfanın ortasında “Açıklama (description)” metni:
+    description = ""
+    # <div class="yds_cinema_movie_thread_info"> altındaki <p> etiketlerini alalım:
+    desc_info = soup.find("div", class_="yds_cinema_movie_thread_info")
+    if desc_info:
+        # Birden fazla <p> olabilir, hepsini birleştirebiliriz:
+        paras = [p.get_text(strip=True) for p in desc_info.find_all("p")]
+        description = " ".join(paras).strip()
+
+    # -------------------------------------------------------------------
+    # 3) Şehir/Seans parçalarını dolaşıyoruz:
+    #    Her city_box içinde birden fazla session olabilir.
+    for city_box in soup.select("div.ed-biletler__sehir"):
+        city = city_box.get("data-sehir", "").strip()
+
+        # Etkinlik adı (sayfanın üstündeki <h1>):
+        name_container = soup.find('div', class_='yds_cinema_details_info_title')
+        name_tag = name_container.find('h1') if name_container else None
+        name = name_tag.get_text(strip=True) if name_tag else 'Unknown'
+
+        for session in city_box.select("div.ed-biletler__sehir__gun"):
+            # Mekan (venue):
+            loc_tag  = session.find("address", itemprop="name")
+            venue    = loc_tag.get_text(strip=True) if loc_tag else "Unknown"
+
+            # Tarih (ISO):
+            time_tag = session.find("time", itemprop="startDate")
+            date_iso = time_tag.get("content", "") if time_tag else ""
+
+            # Promoter bilgisini çek (<div class="ed-biletler__sehir__gun__organizator"> içinde <span>…</span>):
+            promoter = ""
+            org_div  = session.find("div", class_="ed-biletler__sehir__gun__organizator")
+            if org_div:
+                span_tag = org_div.find("span")
+                promoter = span_tag.get_text(strip=True) if span_tag else ""
+
+            # Bilet kategorileri & fiyatlar:
+            price_list = []
+            prices_link = session.find("a", class_="ticket_price_tooltip")
+            if prices_link:
+                try:
+                    decoded = html.unescape(prices_link["data-ticketprices"])
+                    price_json = json.loads(decoded)
+                    for p in price_json.get("prices", []):
+                        price_val = parse_price(p.get("price"))
+                        if price_val is None:
+                            continue
+
+                        price_list.append({
+                            "category": p.get("name", "").strip(),
+                            "price": price_val,
+                            "sold_out": False,
+                        })
+                except Exception as err:
+                    print("⚠️  price decode:", err)
+
+            # -------------------------------------------------------------------
+            # 4) Event objesini oluştururken “artist”, “promoter” ve “description” alanlarını da ekliyoruz:
+            events.append({
+                "name":         name,
+                "venue":        f"{city} {venue}" if city else venue,
+                "date":         date_iso,
+                "artist":       artist,         # Sayfanın en üstünden çekilen sanatçı(lar)
+                "promoter":     promoter,       # Her seans için satırdaki organizatör
+                "description":  description,    # Sayfanın ortasındaki açıklama metni
+                "price_list":   price_list,
+            })
+
+    return events
+
+
+# ------------------------------------------------------------- #
+# 4. Normalizasyon (normalize_biletinial_event)
+# ------------------------------------------------------------- #
+def normalize_biletinial_event(raw: Dict) -> Dict:
+    return {
+        "provider":     "Biletinial",
+        "name":         raw["name"],
+        "venue":        raw["venue"],
+        "date":         raw["date"],          
+        "artist":       raw.get("artist", ""),       # SANATÇI
+        "promoter":     raw.get("promoter", ""),     # ORGANİZATÖR
+        "description":  raw.get("description", ""),  # AÇIKLAMA
+        "price_list":   raw["price_list"],
+    }
+
+
+def parse_detail_page(raw: bytes) -> List[Dict]:
+    """Süreç havuzu girişi: ham sayfa baytları → normalize etkinlikler."""
+    page = raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else raw
+    return [normalize_biletinial_event(event) for event in extract_events_from_html(page)]
@@ -1,3 +1,4 @@
+import os
 import pg8000
 import re
 import time
@@ -11,14 +12,29 @@ from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+import change_feed
+from checkpoints import open_checkpoint
+from migrations import migrate
+from concurrency import get_limiter
+from biletix_price_info import load_pre_json, parse_performance_page
+from browser_pool import BrowserPool
+from parse_pool import ParsePool
+from storage_sinks import configured as sink_configured, diff_prices, open_sink
+
+# Sayfa yükleme hızı (sabit 2–5 sn bekleme yerine); üst sınır tarayıcı sayısı
+limiter = get_limiter("biletix", int(os.getenv("BILETIX_BROWSERS", "2")))
 
 
 class BiletixInfoLoader:
-    def __init__(self, url, max_clicks=40):
+    def __init__(self, url, max_clicks=40, pool=None):
         self.url = url
         self.max_clicks = max_clicks
-        self.driver = self._setup_driver()
+        # Havuz verilmişse arama sayfası boyunca tek bir tarayıcı kiralanır
+        self._lease = pool.page() if pool else None
+        self.driver = self._lease.__enter__() if pool else self._setup_driver()
 
     def _setup_driver(self):
         options = Options()
@@ -28,8 +44,7 @@ class BiletixInfoLoader:
         return webdriver.Chrome(service=Service(), options=options)
 
     def load_page(self):
-        self.driver.get(self.url)
-        time.sleep(random.uniform(2, 5))  # Random wait to avoid bot detection
+        limiter.call(self.driver.get, self.url)
         self._click_load_more()
 
     def _click_load_more(self):
@@ -47,7 +62,6 @@ class BiletixInfoLoader:
                 continue
 
     def extract_event_ids(self):
-        time.sleep(random.uniform(1, 3))  # Add variation before parsing content
         html_content = self.driver.page_source
         soup = BeautifulSoup(html_content, 'html.parser')
         etkinlik_pattern = re.compile(r"window\.location='/etkinlik/([\w\d]+)/")
@@ -67,12 +81,28 @@ class BiletixInfoLoader:
         return list(etkinlik_list), list(etkinlik_grup_list)
 
     def close_driver(self):
-        self.driver.quit()
+        if self._lease:
+            self._lease.__exit__(None, None, None)
+        else:
+            self.driver.quit()
 
 
 class BiletixEventDetails:
-    def __init__(self):
-        self.driver = self._setup_driver()
+    def __init__(self, pool=None, sink=None, parser=None):
+        # Havuz verilmişse her sayfa için ayrı tarayıcı kiralanır; böylece
+        # aynı nesne birden çok iş parçacığından güvenle kullanılabilir.
+        self.pool = pool
+        self.sink = sink        # STORAGE_SINK ayarlıysa toplu hedef
+        self.parser = parser    # ParsePool: priceInfo ayrıştırması ayrı süreçlerde
+        self.driver = None if pool else self._setup_driver()
+
+    @contextmanager
+    def _browser(self):
+        if self.pool:
+            with self.pool.page() as driver:
+                yield driver
+        else:
+            yield self.driver
 
 
     @staticmethod
@@ -107,6 +137,7 @@ class BiletixEventDetails:
 
     @staticmethod
     def upsert_event_with_history(event_data):
+        """Etkinliği ve fiyat geçmişini yazar; commit edildiyse True, hata alıp geri alındıysa False."""
         connection = BiletixEventDetails.connect_db()
         cursor = connection.cursor()
 
@@ -121,106 +152,69 @@ class BiletixEventDetails:
         current_time = datetime.now()
 
         try:
-            # Check if event already exists
+            # Upsert event on the (name, venue, date) unique index (see Cron/migrations.py)
             cursor.execute("""
-                           SELECT id
-                           FROM biletix_events
-                           WHERE name = %s
-                             AND venue = %s
-                             AND date = %s
-                           """, (name, venue, date))
-            event_record = cursor.fetchone()
-
-            if event_record:
-                event_id = event_record[0]
-                cursor.execute("""
-                               UPDATE biletix_events
-                               SET provider  = %s,
-                                   description = %s,
-                                   genre     = %s,
-                                   last_seen = %s
-                               WHERE id = %s
-                               """, (provider, description, genre, current_time, event_id))
-            else:
-                cursor.execute("""
-                               INSERT INTO biletix_events (provider, name, description, venue, date, genre, created_at,
-                                                         last_seen)
-                               VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
-                               """, (provider, name, description, venue, date, genre, current_time, current_time))
-                event_id = cursor.fetchone()[0]
-
-            # Fetch existing prices
+                           INSERT INTO biletix_events (provider, name, description, venue, date, genre, created_at,
+                                                     last_seen)
+                           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                           ON CONFLICT (name, venue, date) DO UPDATE
+                           SET provider    = EXCLUDED.provider,
+                               description = EXCLUDED.description,
+                               genre       = EXCLUDED.genre,
+                               last_seen   = EXCLUDED.last_seen
+                           RETURNING id
+                           """, (provider, name, description, venue, date, genre, current_time, current_time))
+            event_id = cursor.fetchone()[0]
+
+            # Fetch existing prices and diff them through a columnar snapshot
+            # (see price_snapshot.py); prices compare in minor units
             cursor.execute("""
-                           SELECT category, price, sold_out, id
+                           SELECT id, category, price, sold_out
                            FROM biletix_prices
                            WHERE event_id = %s
                              AND is_active = TRUE
                            """, (event_id,))
-            existing_prices = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
-
-            # Track updated categories
-            updated_categories = set()
-
-            # Process new or updated prices
-            for price in price_list:
-                category = price['category']
-                price_value = price['price']
-                sold_out = price['sold_out']
-                updated_categories.add(category)
-
-                if category in existing_prices:
-                    old_price, old_sold_out, price_id = existing_prices[category]
-                    if (old_price, old_sold_out) != (price_value, sold_out):
-                        # Save to history
-                        cursor.execute("""
-                                       INSERT INTO biletix_price_history (event_id, category, price, sold_out, change_date, change_type)
-                                       VALUES (%s, %s, %s, %s, %s, %s)
-                                       """, (event_id, category, old_price, old_sold_out, current_time, 'UPDATED'))
-
-                        # Update current price
-                        cursor.execute("""
-                                       UPDATE biletix_prices
-                                       SET price     = %s,
-                                           sold_out  = %s,
-                                           last_seen = %s
-                                       WHERE id = %s
-                                       """, (price_value, sold_out, current_time, price_id))
-                else:
-                    # New price category
-                    cursor.execute("""
-                                   INSERT INTO biletix_prices (event_id, category, price, sold_out, created_at, last_seen, is_active)
-                                   VALUES (%s, %s, %s, %s, %s, %s, TRUE)
-                                   """, (event_id, category, price_value, sold_out, current_time, current_time))
-
-                    # Log history for new price
-                    cursor.execute("""
-                                   INSERT INTO biletix_price_history (event_id, category, price, sold_out, change_date, change_type)
-                                   VALUES (%s, %s, %s, %s, %s, %s)
-                                   """, (event_id, category, price_value, sold_out, current_time, 'ADDED'))
-
-            # Handle removed prices (not in the latest data)
-            for category, (old_price, old_sold_out, price_id) in existing_prices.items():
-                if category not in updated_categories:
-                    # Mark price as inactive
-                    cursor.execute("""
-                                   UPDATE biletix_prices
-                                   SET is_active = FALSE,
-                                       last_seen = %s
-                                   WHERE id = %s
-                                   """, (current_time, price_id))
-
-                    # Log to history
-                    cursor.execute("""
-                                   INSERT INTO biletix_price_history (event_id, category, price, sold_out, change_date, change_type)
-                                   VALUES (%s, %s, %s, %s, %s, %s)
-                                   """, (event_id, category, old_price, old_sold_out, current_time, 'REMOVED'))
+            diff = diff_prices("biletix", event_id, cursor.fetchall(), price_list)
 
+            # Update changed prices, insert new categories, deactivate missing ones
+            cursor.executemany("""
+                               UPDATE biletix_prices
+                               SET price     = %s,
+                                   sold_out  = %s,
+                                   last_seen = %s
+                               WHERE id = %s
+                               """, [(row['price'], row['sold_out'], current_time, row['_row'])
+                                     for row in diff['update']])
+            cursor.executemany("""
+                               INSERT INTO biletix_prices (event_id, category, price, sold_out, created_at, last_seen, is_active)
+                               VALUES (%s, %s, %s, %s, %s, %s, TRUE)
+                               """, [(event_id, row['category'], row['price'], row['sold_out'], current_time, current_time)
+                                     for row in diff['insert']])
+            cursor.executemany("""
+                               UPDATE biletix_prices
+                               SET is_active = FALSE,
+                                   last_seen = %s
+                               WHERE id = %s
+                               """, [(current_time, price_id) for price_id in diff['deactivate']])
+
+            # History: ADDED / UPDATED (old values) / REMOVED
+            cursor.executemany("""
+                               INSERT INTO biletix_price_history (event_id, category, price, sold_out, change_date, change_type)
+                               VALUES (%s, %s, %s, %s, %s, %s)
+                               """, [(event_id, h['category'], h['price'], h['sold_out'], current_time, h['change_type'])
+                                     for h in diff['history']])
+            changes = change_feed.from_sink_history("biletix", diff['history'], {event_id: event_data}, current_time)
+
+            change_feed.notify(cursor, changes)     # commit'te teslim edilir
             connection.commit()
+            change_feed.publish(changes)
             print(f"Event '{name}' processed with price history tracking.")
+            return True
 
         except Exception as e:
             connection.rollback()
             print("Error:", e)
+            return False
         finally:
             cursor.close()
             connection.close()
@@ -232,13 +226,15 @@ class BiletixEventDetails:
         options.add_argument("--no-sandbox")
         return webdriver.Chrome(service=Service(), options=options)
 
+    def _load_page_source(self, url):
+        with self._browser() as driver:
+            driver.get(url)
+            driver.implicitly_wait(random.uniform(2, 5))
+            return driver.page_source
+
     def get_event_data_selenium(self, url):
         try:
-            time.sleep(random.uniform(2, 5))  # Mimic user loading the page
-            self.driver.get(url)
-            self.driver.implicitly_wait(random.uniform(2, 5))
-            html_content = self.driver.page_source
-            return html_content
+            return limiter.call(self._load_page_source, url)
         except Exception as e:
             print(f"Error fetching data from {url}: {e}")
             return None
@@ -249,70 +245,13 @@ class BiletixEventDetails:
         if not html_response:
             return None
 
-        soup = BeautifulSoup(html_response, "html.parser")
-        pre_tag = soup.find("pre")
-
-        if not pre_tag:
-            print("Error: JSON data not found!")
-            return None
-
-        try:
-            json_data = json.loads(pre_tag.text)
-            data = json_data.get("data", {})
-            html_str = data.get("priceInfo", "")
-            new_soup = BeautifulSoup(html_str, "html.parser")
-            results = []
-
-            last_text_div = ""
-
-            # First: parse <div><span>...</span></div> structure
-            for div in new_soup.find_all("div"):
-                spans = div.find_all("span")
-
-                if len(spans) < 2:
-                    last_text_div = div.get_text(strip=True)
-                    continue
-
-                category_raw = spans[0].get_text(strip=True)
-                price_text = spans[1].get_text(strip=True)
-
-                match = re.search(r"([0-9]+(?:[.,][0-9]+)?)\s*TL", price_text)
-                if match:
-                    price = float(match.group(1).replace(",", "."))
-                    sold_out = "tükendi" in price_text.lower()
-                    category = category_raw if category_raw else last_text_div
-                    results.append({
-                        "category": category,
-                        "price": price,
-                        "sold_out": sold_out
-                    })
-
-            # Then: parse plain <br>-separated lines (fallback for no spans/divs)
-            text_lines = soup.get_text(separator="\n").splitlines()
-            for line in text_lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                match = re.match(r"(.+?)\s+([0-9]+(?:[.,][0-9]+)?)\s*TL", line)
-                if match:
-                    category = match.group(1).strip()
-                    price = float(match.group(2).replace(",", "."))
-                    sold_out = "tükendi" in line.lower()
-
-                    # Avoid duplicates from <div> section
-                    if not any(r["category"] == category and r["price"] == price for r in results):
-                        results.append({
-                            "category": category,
-                            "price": price,
-                            "sold_out": sold_out
-                        })
-
-            return results, data.get("active")
-
-        except json.JSONDecodeError:
-            print("Error: Invalid JSON format!")
-            return None, None
+        if self.parser:
+            parsed = self.parser.parse(parse_performance_page, html_response)
+        else:
+            parsed = parse_performance_page(html_response)
+        if parsed is None:
+            print("Error: JSON data not found or invalid!")
+        return parsed
 
     def parse_event_detail(self, url):
         #time.sleep(random.uniform(2, 4))
@@ -320,52 +259,42 @@ class BiletixEventDetails:
         if not html_response:
             return None
 
-        soup = BeautifulSoup(html_response, "html.parser")
-        pre_tag = soup.find("pre")
-
-        if not pre_tag:
-            print("Error: JSON data not found!")
+        json_data = load_pre_json(html_response)
+        if json_data is None:
+            print("Error: JSON data not found or invalid!")
             return None
 
-        try:
-            json_data = json.loads(pre_tag.text)
-            data = json_data.get("data", {})
-            return (
-                data.get("eventDescription"),
-                data.get("info"),
-                data.get("eventCategory"),
-                data.get("subCategory"),
-                data.get("venueLatitude"),
-                data.get("venueLongitude"),
-            )
-        except json.JSONDecodeError:
-            print("Error: Invalid JSON format!")
-            return None
+        data = json_data.get("data", {})
+        return (
+            data.get("eventDescription"),
+            data.get("info"),
+            data.get("eventCategory"),
+            data.get("subCategory"),
+            data.get("venueLatitude"),
+            data.get("venueLongitude"),
+        )
 
 
 
     def parse_group_page_info(self, html_content):
-
-
+        """
+        Grup sayfasındaki etkinlikleri yazar. Tüm etkinlikler yazıldıysa True;
+        sayfa bozuksa, etkinlik yoksa ya da bir etkinlik yazılamadıysa False
+        (grup checkpoint'te tamamlanmış sayılmaz, sürdürülen çalıştırmada
+        yeniden denenir).
+        """
         #time.sleep(random.uniform(3, 7))  # Human-like waiting before parsing
-        soup = BeautifulSoup(html_content, "html.parser")
-        pre_tag = soup.find("pre")
-
-        if not pre_tag:
-            print("Error: JSON data not found!")
-            return
-
-        try:
-            json_data = json.loads(pre_tag.text)
-        except json.JSONDecodeError:
-            print("Error: Invalid JSON format!")
-            return
+        json_data = load_pre_json(html_content)
+        if json_data is None:
+            print("Error: JSON data not found or invalid!")
+            return False
 
         events = json_data.get("data", {}).get("events", [])
         if not events:
             print("Error: No event information found!")
-            return
+            return False
 
+        all_written = True
         for event in events:
             try:
                 event_name = event["eventName"].strip()
@@ -403,37 +332,171 @@ class BiletixEventDetails:
                     #'venue_longitude': event_details[5]
                 }
 
-                BiletixEventDetails.upsert_event_with_history(current_event)
+                if self.sink:
+                    self.sink.write(current_event)
+                elif not BiletixEventDetails.upsert_event_with_history(current_event):
+                    all_written = False
                 print(current_event)
 
 
             except KeyError as e:
                 print(f"Error: Missing key in event data - {e}")
+                all_written = False
 
+        return all_written
 
 
     def close(self):
-        self.driver.quit()
+        if self.driver:
+            self.driver.quit()
 
 
 
-def main():
+def ensure_schema(sink=None):
+    """
+    Upsert'ler (name, venue, date) tekil indeksine dayanır (ON CONFLICT). biletix
+    ayrı veritabanında olduğundan ortak `migrate` işine (DEFAULT_TABLES) dahil
+    değildir; göçler yazılacak veritabanına her çalıştırmadan önce uygulanır
+    (uygulanmışsa tek SELECT). Göç başarısız olursa tarama başlamaz.
+    """
+    if sink is None:
+        conn = BiletixEventDetails.connect_db()
+        try:
+            migrate(conn, ("biletix",))
+        finally:
+            conn.close()
+    elif sink.name == "postgres":
+        from db import connection, release
+
+        conn = connection()
+        try:
+            migrate(conn, ("biletix",))
+        finally:
+            release(conn)
 
-    #url = "https://www.biletix.com/search/TURKIYE/tr?category_sb=MUSIC&date_sb=-1&city_sb=-1#!category_sb:MUSIC"
-    url = "https://www.biletix.com/search/TURKIYE/tr?category_sb=MUSIC&date_sb=-1&city_sb=%C4%B0stanbul#!category_sb:MUSIC,city_sb:%C4%B0stanbul"
-    info_loader = BiletixInfoLoader(url)
-    info_loader.load_page()
-    event_ids, group_ids = info_loader.extract_event_ids()
-    info_loader.close_driver()
 
-    event_detail_scraper = BiletixEventDetails()
+#url = "https://www.biletix.com/search/TURKIYE/tr?category_sb=MUSIC&date_sb=-1&city_sb=-1#!category_sb:MUSIC"
+SEARCH_URL = "https://www.biletix.com/search/TURKIYE/tr?category_sb=MUSIC&date_sb=-1&city_sb=%C4%B0stanbul#!category_sb:MUSIC,city_sb:%C4%B0stanbul"
+GROUP_URL = "https://www.biletix.com/wbtxapi/api/v1/bxcached/event/getGroupPageInfo/{}/INTERNET/tr"
 
-    for group_id in group_ids:
-        url = f"https://www.biletix.com/wbtxapi/api/v1/bxcached/event/getGroupPageInfo/{group_id}/INTERNET/tr"
-        html_response = event_detail_scraper.get_event_data_selenium(url)
-        event_detail_scraper.parse_group_page_info(html_response)
 
-    event_detail_scraper.close()
+def load_group_ids(pool):
+    """Arama sayfasındaki etkinlik grubu ID'leri."""
+    info_loader = BiletixInfoLoader(SEARCH_URL, pool=pool)
+    info_loader.load_page()
+    event_ids, group_ids = info_loader.extract_event_ids()
+    info_loader.close_driver()
+    return group_ids
+
+
+def scrape_group(scraper, group_id):
+    """Grubun etkinliklerini yazar; tümü yazıldıysa True."""
+    html_response = scraper.get_event_data_selenium(GROUP_URL.format(group_id))
+    return bool(html_response) and scraper.parse_group_page_info(html_response)
+
+
+# İş kuyruğu: üretici grup ID'lerini koyar, işçiler (--mode work) grupları paylaşır
+QUEUE_NAME = "biletix_group"
+
+
+def produce_groups(pool):
+    from work_queue import open_queue
+
+    queue = open_queue(QUEUE_NAME)
+    added = queue.enqueue((str(group_id), None) for group_id in load_group_ids(pool))
+    print(f"📥 {added} grup kuyruğa eklendi → {queue.stats()}")
+    queue.close()
+
+
+def work_groups(pool, parser):
+    """Kuyruktaki grupları kiralayıp işler; kuyruk boşalınca çıkar."""
+    from work_queue import open_queue, run_worker
+
+    sink = open_sink("biletix") if sink_configured() else None
+    queue = open_queue(QUEUE_NAME)
+    try:
+        ensure_schema(sink)
+        event_detail_scraper = BiletixEventDetails(pool=pool, sink=sink, parser=parser)
+
+        def handle(group_id, _payload):
+            # Grubun bir etkinliği bile yazılamadıysa kiralama bırakılır, grup sonra tekrar denenir
+            if not scrape_group(event_detail_scraper, group_id):
+                raise RuntimeError("grup etkinlikleri yazılamadı")
+
+        processed = run_worker(queue, handle)
+        event_detail_scraper.close()
+    finally:
+        if sink:
+            sink.close()
+    print(f"✅ {processed} grup işlendi → {queue.stats()}")
+    print(f"🚦 {limiter.report()}")
+    queue.close()
+
+
+def scrape_all(pool, parser):
+    sink = open_sink("biletix") if sink_configured() else None
+    # Grup listesi ve grup başına tamamlanma checkpoint'te; yarıda kalan
+    # çalıştırma arama sayfasını yeniden açmadan kalan gruplarla sürer
+    checkpoint = open_checkpoint("biletix")
+    mark_done = checkpoint.marker(sink)
+
+    try:
+        ensure_schema(sink)
+        group_ids = checkpoint.plan(lambda: load_group_ids(pool))
+        event_detail_scraper = BiletixEventDetails(pool=pool, sink=sink, parser=parser)
+
+        def process_group(group_id):
+            # Yalnızca grubun tüm etkinlikleri yazıldıysa tamamlandı sayılır
+            if scrape_group(event_detail_scraper, group_id):
+                mark_done(group_id)
+
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            list(executor.map(process_group, group_ids))
+
+        event_detail_scraper.close()
+        print(f"🚦 {limiter.report()}")
+        if sink:
+            sink.close()
+            sink = None
+        checkpoint.finish()
+    finally:
+        if sink:
+            sink.close()
+        checkpoint.close()
+
+
+def main(argv=None, pool=None, parser=None):
+    """pool / parser verilirse (daemon) sıcak tarayıcı ve ayrıştırma havuzları kullanılır ve kapatılmaz."""
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description="Biletix → PostgreSQL")
+    arg_parser.add_argument(
+        "--mode", choices=["all", "produce", "work"], default="all",
+        help="all: tek süreç (varsayılan) | produce: grupları kuyruğa koy | work: kuyruktan işle",
+    )
+    args = arg_parser.parse_args(argv)
+
+    owns_parser, owns_pool = parser is None, pool is None
+    # Ayrıştırma süreçleri tarayıcılar ve iş parçacıkları başlamadan açılır (fork güvenliği)
+    if args.mode != "produce":
+        parser = parser or ParsePool()
+    # Isıtılmış Chrome havuzu: BILETIX_BROWSERS kadar grup sayfası paralel işlenir
+    pool = pool or BrowserPool(size=int(os.getenv("BILETIX_BROWSERS", "2")))
+    get_limiter("biletix", pool.size)
+
+    try:
+        if args.mode == "produce":
+            produce_groups(pool)
+        elif args.mode == "work":
+            work_groups(pool, parser)
+        else:
+            scrape_all(pool, parser)
+    finally:
+        if owns_pool:
+            print(f"Tarayıcı havuzu kapatılıyor ({pool.recycled} tarayıcı yenilendi).")
+            pool.close()
+        if owns_parser and parser:
+            parser.close()
 
 
 if __name__ == "__main__":
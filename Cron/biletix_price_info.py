@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Biletix `getPerformanceByEventCodeAndPerfCode` yanıtındaki `priceInfo`
+HTML'ini tek geçişte ayrıştırır.
+
+Eski kod HTML'i iki kez dolaşıyordu (önce <div><span> yapısı, sonra tüm
+sayfa metni satır satır) ve tekrarları `any(...)` ile sonuç listesi üzerinde
+arıyordu (karesel). Burada:
+    * parça bir kez ayrıştırılır ve ağaç bir kez (ön-sıra) dolaşılır,
+    * <div><span>…</span><span>… TL</span></div> satırları ve <br> ile
+      ayrılmış "Kategori 350 TL" satırları aynı döngüde toplanır,
+    * tekrarlar (kategori, fiyat) anahtarlı sözlükle elenir; ilk görülen
+      kayıt kalır, sıralama korunur.
+
+Çıktı eski biçimle aynıdır: [{"category", "price", "sold_out"}, ...]
+"""
+
+import html
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+# Not: "1.500 TL" → 1.5 olarak okunur; veritabanındaki geçmişle tutarlı kalmak
+# için eski düzenli ifade birebir korunmuştur.
+SPAN_PRICE_RE = re.compile(r"([0-9]+(?:[.,][0-9]+)?)\s*TL")
+LINE_PRICE_RE = re.compile(r"(.+?)\s+([0-9]+(?:[.,][0-9]+)?)\s*TL")
+PRE_RE = re.compile(r"<pre[^>]*>(.*?)</pre>", re.S | re.I)
+
+SOLD_OUT = "tükendi"
+
+
+def _to_float(raw: str) -> float:
+    return float(raw.replace(",", "."))
+
+
+def parse_price_info(price_info_html: str) -> List[Dict]:
+    """priceInfo HTML parçasından kategori, fiyat ve tükendi bilgisini çıkarır."""
+    if not price_info_html:
+        return []
+
+    soup = BeautifulSoup(price_info_html, "html.parser")
+
+    # <div><span> kayıtları satır kayıtlarından önce gelir (eski sıralama)
+    div_hits: Dict[Tuple[str, float], Dict] = {}
+    line_hits: Dict[Tuple[str, float], Dict] = {}
+    last_text_div = ""
+
+    for node in soup.descendants:
+        if isinstance(node, Tag):
+            if node.name != "div":
+                continue
+            spans = node.find_all("span", limit=2)
+            if len(spans) < 2:
+                last_text_div = node.get_text(strip=True)
+                continue
+
+            price_text = spans[1].get_text(strip=True)
+            match = SPAN_PRICE_RE.search(price_text)
+            if not match:
+                continue
+            category = spans[0].get_text(strip=True) or last_text_div
+            price = _to_float(match.group(1))
+            div_hits.setdefault((category, price), {
+                "category": category,
+                "price": price,
+                "sold_out": SOLD_OUT in price_text.lower(),
+            })
+
+        elif type(node) in (NavigableString, CData):
+            # get_text(separator="\n").splitlines() ile aynı satır bölme
+            # (yorumlar ve doctype get_text'e girmez)
+            for line in str(node).splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                match = LINE_PRICE_RE.match(line)
+                if not match:
+                    continue
+                category = match.group(1).strip()
+                price = _to_float(match.group(2))
+                line_hits.setdefault((category, price), {
+                    "category": category,
+                    "price": price,
+                    "sold_out": SOLD_OUT in line.lower(),
+                })
+
+    for key, row in line_hits.items():
+        div_hits.setdefault(key, row)
+    return list(div_hits.values())
+
+
+def load_pre_json(page_source: str) -> Optional[dict]:
+    """
+    Chrome'un JSON yanıtlarını gösterdiği <pre> bloğunu BeautifulSoup'a
+    girmeden okur. <pre> yoksa veya JSON bozuksa None döner.
+    """
+    match = PRE_RE.search(page_source or "")
+    if not match:
+        return None
+    try:
+        return json.loads(html.unescape(match.group(1)))
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_performance_page(page_source: str) -> Optional[Tuple[List[Dict], Optional[bool]]]:
+    """
+    getPerformanceByEventCodeAndPerfCode sayfası → (fiyat listesi, active).
+    parse_pool.ParsePool süreçlerinde çalışacak şekilde üst düzeydedir;
+    JSON bulunamazsa None döner.
+    """
+    json_data = load_pre_json(page_source)
+    if json_data is None:
+        return None
+    data = json_data.get("data", {})
+    return parse_price_info(data.get("priceInfo", "")), data.get("active")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tekrar kullanılabilir headless Chrome havuzu.
+
+* Başlangıçta `size` adet Chrome ısıtılır; işçiler sayfa başına bir tarayıcı
+  kiralar ve işi bitince havuza geri verir.
+* Görsel, font, CSS ve medya istekleri CDP üzerinden engellenir; Biletix
+  JSON uç noktaları ve arama sayfası için bunlara ihtiyaç yoktur.
+* Her tarayıcı `max_pages` sayfa yükledikten sonra kapatılıp yenisi açılır
+  (Chrome'un bellek kullanımı uzun oturumlarda şişiyor).
+
+WebDriver oturumu aynı anda tek komut işleyebildiği için paralellik sekme
+yerine tarayıcı düzeyindedir: aynı anda en fazla `size` işçi sayfa yükler.
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+# Engellenen kaynak kalıpları (Network.setBlockedURLs)
+BLOCKED_URL_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3",
+)
+
+DEFAULT_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+DEFAULT_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "100"))
+
+
+def _chrome_options() -> Options:
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    # Görselleri Chrome tarafında da kapat (CDP engellemesine ek güvence)
+    options.add_experimental_option(
+        "prefs", {"profile.managed_default_content_settings.images": 2}
+    )
+    # DOMContentLoaded yeterli; alt kaynakların bitmesini bekleme
+    options.page_load_strategy = "eager"
+    return options
+
+
+class _PooledBrowser:
+    """Havuzdaki tek bir Chrome ve yüklediği sayfa sayısı."""
+
+    def __init__(self, blocked: Iterable[str]):
+        self.driver = webdriver.Chrome(service=Service(), options=_chrome_options())
+        self.pages = 0
+        blocked = list(blocked)
+        if blocked:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked})
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as exc:
+            print("⚠️  Chrome kapatılamadı:", exc)
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = DEFAULT_SIZE,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        blocked: Optional[Iterable[str]] = BLOCKED_URL_PATTERNS,
+        warm: bool = True,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.blocked = tuple(blocked or ())
+        self._idle: "queue.Queue[_PooledBrowser]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._all = []
+        self.recycled = 0
+        if warm:
+            for _ in range(size):
+                self._idle.put(self._launch())
+
+    def _launch(self) -> _PooledBrowser:
+        browser = _PooledBrowser(self.blocked)
+        with self._lock:
+            self._all.append(browser)
+        return browser
+
+    def _retire(self, browser: _PooledBrowser) -> None:
+        with self._lock:
+            if browser in self._all:
+                self._all.remove(browser)
+        browser.quit()
+
+    @contextmanager
+    def page(self):
+        """
+        Bir sayfa yüklemek için tarayıcı kiralar:
+
+            with pool.page() as driver:
+                driver.get(url)
+                html = driver.page_source
+        """
+        self._slots.acquire()
+        try:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = self._launch()
+
+            healthy = True
+            try:
+                yield browser.driver
+            except Exception:
+                # Oturum bozulmuş olabilir; tarayıcıyı havuza geri koyma
+                healthy = False
+                raise
+            finally:
+                browser.pages += 1
+                if not healthy or browser.pages >= self.max_pages:
+                    self._retire(browser)
+                    self.recycled += 1
+                else:
+                    self._idle.put(browser)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            browsers, self._all = self._all, []
+        for browser in browsers:
+            browser.quit()
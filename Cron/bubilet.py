@@ -1,38 +1,98 @@
 import requests
-import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from tqdm import tqdm
+from functools import lru_cache
 from psycopg2.extras import execute_values
-import psycopg2
 from dotenv import load_dotenv
+
+import change_feed
+from adaptive_scheduler import refresh_windows
+from concurrency import get_limiter
+from db import connection, release
+from incremental_discovery import DiscoveryState, enabled as discovery_enabled
+from pipeline import Stage, format_stats, run_pipeline
+from price_snapshot import PriceSnapshot
+from raw_store import open_store
+from storage_sinks import configured as sink_configured, open_sink
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
-conn = psycopg2.connect(DATABASE_URL, sslmode="require")
+FETCH_WORKERS = int(os.getenv("BUBILET_FETCH_WORKERS", "4"))   # limiter'ın üst sınırı
+limiter = get_limiter("bubilet", FETCH_WORKERS)
+# Taranacak şehir listeleri (Anasayfa/<id>/Etkinlikler), ör. "2,6"
+CITY_IDS = [c.strip() for c in os.getenv("BUBILET_CITY_IDS", "2").split(",") if c.strip()]
+session = requests.Session()          # daemon modunda bağlantılar çalıştırmalar arası açık kalır
+# Yanıtlar ortak depoya yazılır; aynı pencerede kuzey/bubilet.py gibi diğer
+# tüketiciler aynı uç noktayı tekrar çağırmaz (bkz. raw_store.py)
+raw = open_store("bubilet")
 
 # --------------------------- #
 # API'den verileri çek
 # --------------------------- #
-def fetch_all_events():
-    url = "https://apiv2.bubilet.com.tr/api/Anasayfa/2/Etkinlikler"
-    response = requests.get(url)
-    return response.json()
+def fetch_city_events(city_id):
+    url = f"https://apiv2.bubilet.com.tr/api/Anasayfa/{city_id}/Etkinlikler"
+
+    def fetch():
+        response = limiter.call(session.get, url)
+        response.raise_for_status()
+        return response.json()
+    return raw.get(f"Anasayfa/{city_id}/Etkinlikler", fetch)
+
+def merge_city_events(listings):
+    """
+    Şehir listelerini etkinlikId'ye göre birleştirir; her seans yalnızca bir kez
+    (ilk göründüğü etkinlikte) kalır. Aynı seans birden çok şehrin listesinde
+    çıksa da detayı bir kez çekilir.
+    """
+    events, seen = {}, set()
+    for listing in listings:
+        for event in listing:
+            key = event.get("etkinlikId") or event.get("etkinlikAdi")
+            merged = events.get(key)
+            if merged is None:
+                merged = events[key] = {**event, "seanslar": []}
+            for seans in event.get("seanslar", []):
+                seans_id = seans.get("seansId")
+                if seans_id in seen:
+                    continue
+                seen.add(seans_id)
+                merged["seanslar"].append(seans)
+    return list(events.values())
+
+def fetch_all_events(city_ids=None):
+    """CITY_IDS listelerini eşzamanlı çeker, tekilleştirilmiş etkinlik listesi döner."""
+    city_ids = city_ids or CITY_IDS
+    with ThreadPoolExecutor(max_workers=min(len(city_ids), FETCH_WORKERS) or 1) as pool:
+        listings = list(pool.map(fetch_city_events, city_ids))
+    events = merge_city_events(listings)
+    if len(city_ids) > 1:
+        total = sum(len(s.get("seanslar", [])) for listing in listings for s in listing)
+        unique = sum(len(e["seanslar"]) for e in events)
+        print(f"🏙️  {len(city_ids)} şehir: {total} seans listelendi, {unique} tekil seans.")
+    return events
 
 def fetch_ticket_details(seans_id):
     url = f"https://apiv2.bubilet.com.tr/api/Seans/{seans_id}/Biletler"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return None
-    return response.json()
+
+    def fetch():
+        response = limiter.call(session.get, url)
+        if response.status_code != 200:
+            return None
+        return response.json()
+    return raw.get(f"Seans/{seans_id}/Biletler", fetch)
 
 def fetch_artist_name(event_id):
     url = f"https://apiv2.bubilet.com.tr/api/v2/event/{event_id}/performer"
-    response = requests.get(url)
+    response = limiter.call(session.get, url)
     try:
         return response.json()["data"]["list"][0].get("adiSoyadi")
     except:
         return None
 
+# Sanatçı adı etkinlik başına bir kez sorulur; daemon'da önbellek çalıştırmalar
+# arasında korunur ve günlük temizlenir (bkz. daemon.py)
+artist_for = lru_cache(maxsize=None)(fetch_artist_name)
+
 # --------------------------- #
 # Supabase'a upsert işlemi
 # --------------------------- #
@@ -63,54 +123,41 @@ def upsert_event_with_history(conn, event):
                 artist              = EXCLUDED.artist;
         """, event)
 
-        cur.execute("SELECT * FROM bubilet_prices WHERE event_id = %(id)s", {"id": event["id"]})
-        existing_prices = cur.fetchall()
-        existing_price_keys = {(row[0], row[1], row[7]) for row in existing_prices}  # (event_id, category, is_active)
+        # Mevcut ve gelen fiyatlar sütunlu görüntülerde; (etkinlik, kategori,
+        # is_active) araması O(1), aynı anahtar ikinci kez gelirse ilki geçerli
+        cur.execute(
+            "SELECT event_id, category, price, remaining, sold_out, is_active FROM bubilet_prices "
+            "WHERE event_id = %(id)s",
+            {"id": event["id"]},
+        )
+        existing = PriceSnapshot(keyed_active=True)
+        for event_id, category, price, remaining, sold_out, is_active in cur:
+            existing.add(event_id, category, price, remaining, sold_out, is_active)
 
-        new_prices = []
-        history_rows = []
+        incoming = existing.sibling()
+        incoming.extend(event["id"], event["price_list"])
+        seen_at = event["price_list"][0]["last_seen"] if event["price_list"] else None
 
-        for p in event["price_list"]:
-            key = (event["id"], p["category"], p["is_active"])
-            if key not in existing_price_keys:
+        price_rows = []
+        history_rows = []
+        feed = []           # değişim akışı (change_feed.py)
+        for i in range(len(incoming)):
+            j = existing.lookup(incoming.key(i))
+            if j is None:
                 change_type = "ADDED"
+            elif (existing.price[j] != incoming.price[i] or existing.remaining[j] != incoming.remaining[i]
+                  or existing.sold_out[j] != incoming.sold_out[i]):
+                change_type = "UPTADED"
             else:
-                # Find existing price
-                existing = next((row for row in existing_prices if row[0] == event["id"] and row[1] == p["category"] and row[7] == p["is_active"]), None)
-                if existing and (existing[2] != p["price"] or existing[3] != p["remaining"]):
-                    change_type = "UPTADED"
-                else:
-                    change_type = None
-
-            new_prices.append({
-                "event_id": event["id"],
-                "category": p["category"],
-                "price": p["price"],
-                "remaining": p["remaining"],
-                "sold_out": p["sold_out"],
-                "created_at": p["created_at"],
-                "last_seen": p["last_seen"],
-                "is_active": p["is_active"]
-            })
+                change_type = None
 
+            ref, category, price, remaining, sold_out, is_active = incoming.values(i)
+            price_rows.append((ref, category, price, remaining, sold_out, seen_at, seen_at, is_active))
             if change_type:
-                history_rows.append({
-                    "event_id": event["id"],
-                    "category": p["category"],
-                    "price": p["price"],
-                    "remaining": p["remaining"],
-                    "sold_out": p["sold_out"],
-                    "change_date": p["last_seen"],
-                    "change_type": change_type
-                })
-
-        unique_keys = set()
-        filtered_prices = []
-        for p in new_prices:
-            key = (p["event_id"], p["category"], p["is_active"])
-            if key not in unique_keys:
-                filtered_prices.append(p)
-                unique_keys.add(key)
+                history_rows.append((ref, category, price, remaining, sold_out, seen_at, change_type))
+                feed.append(change_feed.change(
+                    "bubilet", change_type, ref, category, price=price, sold_out=sold_out, remaining=remaining,
+                    old=existing.row(j) if j is not None else None, event=event, ts=seen_at))
 
         execute_values(cur,
             """INSERT INTO bubilet_prices
@@ -120,11 +167,9 @@ def upsert_event_with_history(conn, event):
                ON CONFLICT (event_id, category, is_active)
                DO UPDATE SET price = EXCLUDED.price,
                              remaining = EXCLUDED.remaining,
+                             sold_out = EXCLUDED.sold_out,
                              last_seen = EXCLUDED.last_seen""",
-            [(
-                p["event_id"], p["category"], p["price"], p["remaining"],
-                p["sold_out"], p["created_at"], p["last_seen"], p["is_active"]
-            ) for p in filtered_prices])
+            price_rows)
 
         if history_rows:
             execute_values(cur,
@@ -132,80 +177,208 @@ def upsert_event_with_history(conn, event):
                    (event_id, category, price, remaining, sold_out,
                     change_date, change_type)
                    VALUES %s""",
-                [(
-                    h["event_id"], h["category"], h["price"], h["remaining"],
-                    h["sold_out"], h["change_date"], h["change_type"]
-                ) for h in history_rows])
+                history_rows)
+        change_feed.notify(cur, feed)   # commit'te teslim edilir
 
     conn.commit()
+    change_feed.publish(feed)
 
 # --------------------------- #
-# Tarih damgası
+# Seans detayını event_dict'e dönüştür
 # --------------------------- #
-now = datetime.now().isoformat()
+def build_event_dict(etkinlikAdi, seansId, tarih, detail, artist_name, now):
+    price_list = []
+
+    for bilet in detail.get("seansBiletler", []):
+        category = bilet.get("biletKategoriAdi")
+        price = float(bilet.get("fiyat", 0))
+        remaining = int(bilet.get("kalanBilet", 0))
+        sold_out = remaining == 0
+        is_active = bilet.get("biletAktif", False)
+
+        price_list.append({
+            "category": category,
+            "price": price,
+            "remaining": remaining,
+            "sold_out": sold_out,
+            "created_at": now,
+            "last_seen": now,
+            "is_active": is_active
+        })
+
+    return {
+        "id": seansId,
+        "provider": "Bubilet",
+        "name": etkinlikAdi,
+        "venue": detail.get("mekanAdi"),
+        "date": tarih,
+        "genre": None,
+        "created_at": datetime.now(),
+        "last_seen": datetime.now(),
+        "canonical_venue_id": None,
+        "description": None,
+        "promoter": None,
+        "artist": [artist_name] if artist_name else None,
+        "price_list": price_list
+    }
+
+def process_seans(write, etkinlikAdi, seansId, tarih, artist_name, now):
+    """Seans detayını çekip `write` ile yazar; detay alınamadıysa False döner."""
+    detail = fetch_ticket_details(seansId)
+    if not detail:
+        return False
+    event_dict = build_event_dict(etkinlikAdi, seansId, tarih, detail, artist_name, now)
+    write(event_dict)
+    return True
+
+# --------------------------- #
+# İş kuyruğu: üretici / işçi
+# --------------------------- #
+QUEUE_NAME = "bubilet_seans"
+
+def produce(events):
+    """Her seansı kuyruğa koyar; işçiler (--mode work) bunları paylaşır."""
+    from work_queue import open_queue
+
+    queue = open_queue(QUEUE_NAME)
+    added = queue.enqueue(
+        (seans.get("seansId"), {
+            "etkinlikAdi": event.get("etkinlikAdi"),
+            "etkinlikId": event.get("etkinlikId"),
+            "tarih": seans.get("tarih"),
+        })
+        for event in events
+        for seans in event.get("seanslar", [])
+        if seans.get("seansId")
+    )
+    print(f"📥 {added} seans kuyruğa eklendi → {queue.stats()}")
+    queue.close()
+
+def work(write, now):
+    """Kuyruktaki seansları kiralayıp işler; kuyruk boşalınca çıkar."""
+    from work_queue import open_queue, run_worker
+
+    def handle(seans_id, payload):
+        # Detay alınamazsa hata: kiralama bırakılır, seans sonra tekrar denenir (ack edilmez)
+        if not process_seans(
+            write, payload["etkinlikAdi"], int(seans_id), payload["tarih"],
+            artist_for(payload["etkinlikId"]), now,
+        ):
+            raise RuntimeError("seans detayı alınamadı")
+
+    queue = open_queue(QUEUE_NAME)
+    processed = run_worker(queue, handle)
+    print(f"✅ {processed} seans işlendi → {queue.stats()}")
+    queue.close()
 
 # --------------------------- #
-# Verileri topla
+# Uyarlanır yoklama planı
 # --------------------------- #
+def plan_known_seanslar(conn):
+    """
+    BUBILET_REQUEST_BUDGET tanımlıysa bilinen seanslardan yalnızca planlayıcının
+    seçtiği kadarı yoklanır; yeni seanslar her zaman çekilir. Tanımsızsa None.
+    """
+    budget = int(os.getenv("BUBILET_REQUEST_BUDGET", "0"))
+    if budget <= 0:
+        return None
+    from adaptive_scheduler import plan_run
+
+    plan = plan_run(conn, "bubilet", budget)
+    print(f"📅 Uyarlanır plan: {len(plan['selected'])}/{len(plan['known'])} bilinen seans yoklanacak.")
+    return plan
 
 # --------------------------- #
-# Etkinlikleri işle
+# Çalıştırıcı
 # --------------------------- #
-events = fetch_all_events()
-
-for event in tqdm(events, desc="Etkinlikler işleniyor"):
-    etkinlikAdi = event.get("etkinlikAdi")
-    etkinlikId = event.get("etkinlikId")
-    seanslar = event.get("seanslar", [])
-
-    artist_name = fetch_artist_name(etkinlikId)
-
-    for seans in seanslar:
-        seansId = seans.get("seansId")
-        tarih = seans.get("tarih")
-        detail = fetch_ticket_details(seansId)
-        if not detail:
-            continue
-
-        venue = detail.get("mekanAdi")
-        city = detail.get("ilAdi")
-
-        price_list = []
-
-        for bilet in detail.get("seansBiletler", []):
-            category = bilet.get("biletKategoriAdi")
-            price = float(bilet.get("fiyat", 0))
-            remaining = int(bilet.get("kalanBilet", 0))
-            sold_out = remaining == 0
-            is_active = bilet.get("biletAktif", False)
-
-            price_list.append({
-                "category": category,
-                "price": price,
-                "remaining": remaining,
-                "sold_out": sold_out,
-                "created_at": now,
-                "last_seen": now,
-                "is_active": is_active
-            })
-
-        event_dict = {
-            "id": seansId,
-            "provider": "Bubilet",
-            "name": etkinlikAdi,
-            "venue": venue,
-            "date": tarih,
-            "genre": None,
-            "created_at": datetime.now(),
-            "last_seen": datetime.now(),
-            "canonical_venue_id": None,
-            "description": None,
-            "promoter": None,
-            "artist": [artist_name] if artist_name else None,
-            "price_list": price_list
-        }
-
-        upsert_event_with_history(conn, event_dict)
-
-conn.close()
-print("✅ Bubilet verileri Supabase’e aktarıldı.")
\ No newline at end of file
+def main(argv=None):
+    import argparse
+
+    from tqdm import tqdm
+
+    parser = argparse.ArgumentParser(description="Bubilet → Supabase")
+    parser.add_argument(
+        "--mode", choices=["all", "produce", "work"], default="all",
+        help="all: tek süreç (varsayılan) | produce: seansları kuyruğa koy | work: kuyruktan işle",
+    )
+    args = parser.parse_args(argv)
+
+    # Tarih damgası
+    now = datetime.now().isoformat()
+
+    if args.mode == "produce":
+        produce(fetch_all_events())
+        return
+
+    # STORAGE_SINK ayarlıysa yazma toplu hedef üzerinden yapılır; uyarlanır plan
+    # ve yenileme pencereleri Supabase geçmişini okuduğu için yerel hedeflerde kapalıdır.
+    sink = open_sink("bubilet") if sink_configured() else None
+    conn = connection() if sink is None or sink.name == "postgres" else None
+    write = sink.write if sink else (lambda event_dict: upsert_event_with_history(conn, event_dict))
+    discovery = None
+    try:
+        if args.mode == "work":
+            work(write, now)
+            return
+
+        events = fetch_all_events()
+        plan = plan_known_seanslar(conn) if conn else None
+        skipped = 0
+
+        # Artımlı keşif: liste alanları değişmeyen seansların detayı atlanır
+        discovery = DiscoveryState("bubilet") if discovery_enabled() else None
+        windows = refresh_windows(conn, "bubilet") if discovery and conn else {}
+        mark_fetched = discovery.marker(sink) if discovery else None
+
+        def due_seanslar():
+            nonlocal skipped
+            for event in tqdm(events, desc="Etkinlikler işleniyor"):
+                etkinlikAdi = event.get("etkinlikAdi")
+                seanslar = event.get("seanslar", [])
+
+                if plan:
+                    due = [s for s in seanslar if s.get("seansId") not in plan["known"] or s.get("seansId") in plan["selected"]]
+                    skipped += len(seanslar) - len(due)
+                    seanslar = due
+                if discovery:
+                    seanslar = [s for s in seanslar if discovery.classify(s.get("seansId"), {"etkinlikAdi": etkinlikAdi, **s})]
+                for seans in seanslar:
+                    yield etkinlikAdi, event.get("etkinlikId"), seans
+
+        # Seans detayları FETCH_WORKERS iş parçacığıyla çekilir; yazma bu
+        # iş parçacığında kalır (tek bağlantı), kuyruklar belleği sınırlar.
+        def fetch_detail(item):
+            etkinlikAdi, etkinlikId, seans = item
+            detail = fetch_ticket_details(seans.get("seansId"))
+            if not detail:
+                return None
+            event_dict = build_event_dict(
+                etkinlikAdi, seans.get("seansId"), seans.get("tarih"), detail, artist_for(etkinlikId), now,
+            )
+            return etkinlikAdi, seans, event_dict
+
+        def store(item):
+            etkinlikAdi, seans, event_dict = item
+            write(event_dict)
+            if discovery:
+                seansId = seans.get("seansId")
+                mark_fetched(seansId, {"etkinlikAdi": etkinlikAdi, **seans}, windows.get(seansId))
+
+        stats = run_pipeline(due_seanslar(), [Stage("detail", fetch_detail, workers=FETCH_WORKERS, many=False)], store)
+        print(f"🔁 {format_stats(stats)}")
+        print(f"🚦 {limiter.report()}")
+        print(f"📦 {raw.summary()}")
+    finally:
+        if sink:
+            sink.close()
+        if conn:
+            release(conn)
+    if discovery:
+        print(f"🔎 {discovery.summary()}")
+        discovery.close()
+    if skipped:
+        print(f"⏭️  {skipped} seans bu çalıştırmada atlandı (uyarlanır plan).")
+    print("✅ Bubilet verileri Supabase’e aktarıldı.")
+
+if __name__ == "__main__":
+    main()
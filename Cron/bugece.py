@@ -10,10 +10,15 @@ import os
 from datetime import datetime
 
 import requests
-import psycopg2
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
 
+import change_feed
+from db import connection, release
+from incremental_discovery import DiscoveryState, enabled as discovery_enabled
+from raw_store import open_store
+from storage_sinks import configured as sink_configured, diff_prices, open_sink
+
 # --------------------------------------------------------------------------- #
 # 1. Ortam değişkenleri & veritabanı bağlantısı
 # --------------------------------------------------------------------------- #
@@ -21,8 +26,8 @@ load_dotenv()                                   # .env içinden DATABASE_URL al
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 def connect_db():
-    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan."""
-    return psycopg2.connect(DATABASE_URL, sslmode="require")
+    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan (daemon'da sıcak bağlantı)."""
+    return connection()
 
 # --------------------------------------------------------------------------- #
 # 2. Bugece’yi çekip normalize eden yardımcı fonksiyonlar
@@ -33,12 +38,16 @@ EVENT_SOURCE_URL = (
     "&pageSize=1000&sortBy=popularity&sortDir=desc"
 )
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+session = requests.Session()          # daemon modunda bağlantılar çalıştırmalar arası açık kalır
+raw = open_store("bugece")              # kuzey/bugece_promoter.py ile ortak yanıt deposu
 
 def fetch_events():
     """API’den ham JSON’u çeker, timeout ekler, HTTP hatalarında exception atar."""
-    resp = requests.get(EVENT_SOURCE_URL, headers=HEADERS, timeout=15)
-    resp.raise_for_status()
-    return resp.json().get("data", {}).get("items", [])
+    def fetch():
+        resp = session.get(EVENT_SOURCE_URL, headers=HEADERS, timeout=15)
+        resp.raise_for_status()
+        return resp.json()
+    return raw.get("event/list?country=298795", fetch).get("data", {}).get("items", [])
 
 def normalize_event(raw: dict) -> dict:
     """Ham API çıktısını veritabanına uygun hâle getirir."""
@@ -73,41 +82,26 @@ def upsert_event_with_history(event: dict) -> None:
     with connect_db() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
 
         # ---- 3.1 Etkinlik upsert ------------------------------------------------
+        # (name, venue, date) tekil indeksi: bkz. Cron/migrations.py
         cur.execute(
             """
-            SELECT id FROM bugece_events
-            WHERE name = %(name)s AND venue = %(venue)s AND date = %(date)s
+            INSERT INTO bugece_events
+                (provider, name, venue, date, genre, created_at, last_seen)
+            VALUES
+                (%(provider)s, %(name)s, %(venue)s, %(date)s, %(genre)s, %(now)s, %(now)s)
+            ON CONFLICT (name, venue, date) DO UPDATE
+            SET provider  = EXCLUDED.provider,
+                genre     = EXCLUDED.genre,
+                last_seen = EXCLUDED.last_seen
+            RETURNING id
             """,
-            {"name": event["name"], "venue": event["venue"], "date": event["date"]}
+            {**event, "now": now}
         )
-        row = cur.fetchone()
-
-        if row:  # güncelle
-            event_id = row["id"]
-            cur.execute(
-                """
-                UPDATE bugece_events
-                SET provider = %(provider)s,
-                    genre    = %(genre)s,
-                    last_seen= %(now)s
-                WHERE id = %(id)s
-                """,
-                {"provider": event["provider"], "genre": event["genre"], "now": now, "id": event_id}
-            )
-        else:    # yeni kayıt
-            cur.execute(
-                """
-                INSERT INTO bugece_events
-                    (provider, name, venue, date, genre, created_at, last_seen)
-                VALUES
-                    (%(provider)s, %(name)s, %(venue)s, %(date)s, %(genre)s, %(now)s, %(now)s)
-                RETURNING id
-                """,
-                {**event, "now": now}
-            )
-            event_id = cur.fetchone()["id"]
-
-        # ---- 3.2 Aktif fiyatları çek -------------------------------------------
+        event_id = cur.fetchone()["id"]
+
+        # ---- 3.2 Aktif fiyatları çek ve karşılaştır --------------------------------
+        # Sütunlu görüntü üzerinden (bkz. price_snapshot.py); fiyatlar kuruş
+        # cinsinden karşılaştırılır, satır dict'i yalnızca değişenler için üretilir
         cur.execute(
             """
             SELECT id, category, price, sold_out
@@ -116,98 +110,51 @@ def upsert_event_with_history(event: dict) -> None:
             """,
             {"eid": event_id}
         )
-        existing = {r["category"]: r for r in cur.fetchall()}
-        seen_categories = set()
-
-        # ---- 3.3 Yeni gelen listeyi işle ---------------------------------------
-        for p in event["price_list"]:
-            cat, price_val, sold_out = p["category"], p["price"], p["sold_out"]
-            seen_categories.add(cat)
-
-            if cat in existing:                               # muhtemel UPDATE
-                prev = existing[cat]
-                if (prev["price"], prev["sold_out"]) != (price_val, sold_out):
-                    # history
-                    cur.execute(
-                        """
-                        INSERT INTO bugece_price_history
-                            (event_id, category, price, sold_out, change_date, change_type)
-                        VALUES
-                            (%(eid)s, %(cat)s, %(old_price)s, %(old_so)s, %(now)s, 'UPDATED')
-                        """,
-                        {
-                            "eid": event_id, "cat": cat,
-                            "old_price": prev["price"], "old_so": prev["sold_out"], "now": now
-                        }
-                    )
-                    # update
-                    cur.execute(
-                        """
-                        UPDATE bugece_prices
-                        SET price = %(price)s,
-                            sold_out = %(sold_out)s,
-                            last_seen = %(now)s
-                        WHERE id = %(id)s
-                        """,
-                        {
-                            "price": price_val, "sold_out": sold_out,
-                            "now": now, "id": prev["id"]
-                        }
-                    )
-            else:                                              # INSERT + history
-                cur.execute(
-                    """
-                    INSERT INTO bugece_prices
-                        (event_id, category, price, sold_out,
-                         created_at, last_seen, is_active)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s,
-                         %(now)s, %(now)s, TRUE)
-                    RETURNING id
-                    """,
-                    {
-                        "eid": event_id, "cat": cat,
-                        "price": price_val, "sold_out": sold_out, "now": now
-                    }
-                )
-                cur.execute(
-                    """
-                    INSERT INTO bugece_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'ADDED')
-                    """,
-                    {
-                        "eid": event_id, "cat": cat,
-                        "price": price_val, "sold_out": sold_out, "now": now
-                    }
-                )
-
-        # ---- 3.4 Listede artık olmayan kategorileri pasifleştir ----------------
-        for cat, rec in existing.items():
-            if cat not in seen_categories:
-                cur.execute(
-                    """
-                    UPDATE bugece_prices
-                    SET is_active = FALSE, last_seen = %(now)s
-                    WHERE id = %(id)s
-                    """,
-                    {"now": now, "id": rec["id"]}
-                )
-                cur.execute(
-                    """
-                    INSERT INTO bugece_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'REMOVED')
-                    """,
-                    {
-                        "eid": event_id, "cat": cat,
-                        "price": rec["price"], "sold_out": rec["sold_out"], "now": now
-                    }
-                )
+        diff = diff_prices("bugece", event_id, ((r["id"], r["category"], r["price"], r["sold_out"]) for r in cur),
+                           event["price_list"])
+
+        # ---- 3.3 Değişenleri güncelle, yenileri ekle, eksikleri pasifleştir -----------
+        cur.executemany(
+            """
+            UPDATE bugece_prices
+            SET price = %s, sold_out = %s, last_seen = %s
+            WHERE id = %s
+            """,
+            [(row["price"], row["sold_out"], now, row["_row"]) for row in diff["update"]]
+        )
+        cur.executemany(
+            """
+            INSERT INTO bugece_prices
+                (event_id, category, price, sold_out, created_at, last_seen, is_active)
+            VALUES
+                (%s, %s, %s, %s, %s, %s, TRUE)
+            """,
+            [(event_id, row["category"], row["price"], row["sold_out"], now, now) for row in diff["insert"]]
+        )
+        cur.executemany(
+            """
+            UPDATE bugece_prices
+            SET is_active = FALSE, last_seen = %s
+            WHERE id = %s
+            """,
+            [(now, row_id) for row_id in diff["deactivate"]]
+        )
+
+        # ---- 3.4 History: ADDED / UPDATED (eski değerler) / REMOVED --------------
+        cur.executemany(
+            """
+            INSERT INTO bugece_price_history
+                (event_id, category, price, sold_out, change_date, change_type)
+            VALUES
+                (%s, %s, %s, %s, %s, %s)
+            """,
+            [(event_id, h["category"], h["price"], h["sold_out"], now, h["change_type"]) for h in diff["history"]]
+        )
+        changes = change_feed.from_sink_history("bugece", diff["history"], {event_id: event}, now)
+        change_feed.notify(cur, changes)            # commit'te teslim edilir
 
     # Bağlam yöneticisi commit / rollback / close işlemlerini otomatik yapar.
+    change_feed.publish(changes)
     print(f"[{now:%Y-%m-%d %H:%M:%S}] «{event['name']}» işlendi.")
 
 # --------------------------------------------------------------------------- #
@@ -215,12 +162,43 @@ def upsert_event_with_history(event: dict) -> None:
 # --------------------------------------------------------------------------- #
 def main():
     print("Bugece verileri çekiliyor…")
-    for raw in fetch_events():
+
+    # Artımlı keşif: liste kaydı değişmeyen etkinliklerin upsert'ü atlanır
+    # (Bugece'de detay isteği yok; pahalı adım etkinlik başına DB turu).
+    discovery = DiscoveryState("bugece") if discovery_enabled() else None
+    windows = {}
+    if discovery:
+        from adaptive_scheduler import natural_key, refresh_windows
+        conn = connect_db()
         try:
-            upsert_event_with_history(normalize_event(raw))
+            windows = refresh_windows(conn, "bugece", key="natural")
+        finally:
+            release(conn)            # daemon dışında bağlantı kapanır (bkz. db.py)
+
+    # STORAGE_SINK ayarlıysa etkinlikler toplu hedefe yazılır
+    sink = open_sink("bugece") if sink_configured() else None
+    write = sink.write if sink else upsert_event_with_history
+    mark_fetched = discovery.marker(sink) if discovery else None
+
+    for item in fetch_events():
+        try:
+            event = normalize_event(item)
+            key = f"{event['name']}|{event['venue']}|{event['date']}"
+            if discovery and not discovery.classify(key, item):
+                continue
+            write(event)
+            if discovery:
+                window = windows.get(natural_key(event["name"], event["venue"], event["date"]))
+                mark_fetched(key, item, window)
         except Exception as exc:
             # Bir etkinlik hata verse bile akış devam etsin.
             print("⚠️  Hata:", exc)
 
+    if sink:
+        sink.close()
+    if discovery:
+        print(discovery.summary())
+        discovery.close()
+
 if __name__ == "__main__":
     main()
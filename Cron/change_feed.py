@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fiyat değişim akışı (ADDED / UPDATED / REMOVED).
+
+Her upsert yolu (sağlayıcıların upsert_event_with_history'si ve
+storage_sinks) tespit ettiği değişiklikleri buraya verir:
+
+    1. notify(cur, changes)  → işlem commit edilmeden önce, aynı imleçle
+                               pg_notify (CHANGE_FEED_CHANNEL ayarlıysa).
+                               Postgres bildirimi yalnızca commit'te teslim
+                               eder; geri alınan işlemin bildirimi gitmez.
+    2. publish(changes)      → commit'ten sonra yerel, yalnızca-ekleme
+                               günlüğüne yazar:
+                                   STATE_DIR/change_feed/YYYY-MM-DD.jsonl
+
+Tüketiciler günlüğü kendi konumlarından okur; konumlar (gün:bayt)
+STATE_DIR/change_feed.sqlite3 içinde tüketici adına saklanır:
+
+    consumer = Consumer("alerts")
+    for position, change in consumer.read():
+        ...
+        consumer.commit(position)
+
+Kayıt biçimi (tek satır JSON):
+    {"ts", "provider", "event_id", "name", "venue", "date", "category",
+     "change_type", "price", "sold_out", "remaining",
+     "old_price", "old_sold_out", "old_remaining"}
+
+Bubilet history tabloları eski "UPTADED" yazımını korur (doğrudan yol,
+storage_sinks ve backfill_csv aynı yazımı kullanır); akışta tüm sağlayıcılar
+için "UPDATED" olarak verilir.
+
+Ortam değişkenleri:
+    CHANGE_FEED=0                     → yerel günlüğü kapat (varsayılan açık)
+    CHANGE_FEED_CHANNEL=price_changes → LISTEN/NOTIFY kanalı (varsayılan kapalı)
+    CHANGE_FEED_RETENTION_DAYS=14     → prune'un sakladığı gün sayısı
+
+Kullanım:
+    python Cron/change_feed.py tail --consumer alerts --follow
+    python Cron/change_feed.py stats
+    python Cron/change_feed.py prune
+"""
+
+import fcntl
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from local_state import connect_state, state_path
+
+CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "").strip()
+RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "14"))
+NOTIFY_LIMIT = 7900         # pg_notify yükü 8000 bayttan kısa olmalı
+LEGACY_TYPES = {"UPTADED": "UPDATED"}      # Bubilet history yazımı → akış yazımı
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS consumer_offsets (
+    consumer   TEXT PRIMARY KEY,
+    position   TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("CHANGE_FEED", "1") != "0"
+
+
+def feed_dir() -> Path:
+    path = state_path("change_feed")
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(record: Dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+# --------------------------------------------------------------------------- #
+# 1. Kayıt oluşturma
+# --------------------------------------------------------------------------- #
+def change(provider: str, change_type: str, event_id, category, *, price=None, sold_out=None,
+           remaining=None, old: Optional[Dict] = None, event: Optional[Dict] = None, ts=None) -> Dict:
+    """
+    Tek değişim kaydı. `old` önceki satırın price / sold_out / remaining
+    alanlarıdır (UPDATED ve REMOVED için); REMOVED'da yeni değerler boştur.
+    """
+    old = old or {}
+    event = event or {}
+    return {
+        "ts": ts or datetime.now(),
+        "provider": provider,
+        "event_id": event_id,
+        "name": event.get("name"),
+        "venue": event.get("venue"),
+        "date": event.get("date"),
+        "category": category,
+        "change_type": LEGACY_TYPES.get(change_type, change_type),
+        "price": price,
+        "sold_out": sold_out,
+        "remaining": remaining,
+        "old_price": old.get("price"),
+        "old_sold_out": old.get("sold_out"),
+        "old_remaining": old.get("remaining"),
+    }
+
+
+def from_sink_history(provider: str, history: Iterable[Dict], events: Dict, ts) -> List[Dict]:
+    """storage_sinks history satırlarını (bkz. diff_snapshots) akış kayıtlarına çevirir."""
+    records = []
+    for h in history:
+        kind = LEGACY_TYPES.get(h["change_type"], h["change_type"])
+        new = h.get("_new", h) if kind != "REMOVED" else {}
+        old = h.get("_old") if kind == "UPDATED" else (h if kind == "REMOVED" else None)
+        records.append(change(
+            provider, kind, h["ref"], h["category"],
+            price=new.get("price"), sold_out=new.get("sold_out"), remaining=new.get("remaining"),
+            old=old, event=events.get(h["ref"]), ts=ts,
+        ))
+    return records
+
+
+# --------------------------------------------------------------------------- #
+# 2. Yayınlama
+# --------------------------------------------------------------------------- #
+def notify(cur, changes: List[Dict]) -> None:
+    """CHANGE_FEED_CHANNEL ayarlıysa değişiklikleri işlem içinde pg_notify ile kuyruğa alır."""
+    if not CHANNEL or not changes:
+        return
+    payloads = [p for p in map(_dumps, changes) if len(p.encode("utf-8")) <= NOTIFY_LIMIT]
+    if payloads:
+        cur.execute("SELECT pg_notify(%s, x) FROM unnest(%s::text[]) AS x", (CHANNEL, payloads))
+
+
+def publish(changes: List[Dict]) -> None:
+    """Commit edilmiş değişiklikleri günün günlük dosyasına tek yazımda ekler."""
+    if not changes or not enabled():
+        return
+    data = "".join(_dumps(c) + "\n" for c in changes).encode("utf-8")
+    path = feed_dir() / f"{datetime.now():%Y-%m-%d}.jsonl"
+    with open(path, "ab") as f:
+        # Aynı anda çalışan işçiler satırları birbirine karıştırmasın
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.write(data)
+            f.flush()
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# --------------------------------------------------------------------------- #
+# 3. Okuma / tüketici konumları
+# --------------------------------------------------------------------------- #
+def segments() -> List[str]:
+    return sorted(p.stem for p in feed_dir().glob("*.jsonl"))
+
+
+def _split(position: str) -> Tuple[str, int]:
+    segment, _, offset = position.partition(":")
+    return segment, int(offset or 0)
+
+
+def read_from(position: str = "", limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+    """`position`dan sonraki kayıtları (sonraki konum, kayıt) olarak üretir; yarım satırlar atlanır."""
+    start_segment, start_offset = _split(position) if position else ("", 0)
+    count = 0
+    for segment in segments():
+        if segment < start_segment:
+            continue
+        offset = start_offset if segment == start_segment else 0
+        with open(feed_dir() / f"{segment}.jsonl", "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break                   # yazılmakta olan satır
+                offset += len(line)
+                yield f"{segment}:{offset}", json.loads(line)
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+
+
+def end_position() -> str:
+    existing = segments()
+    if not existing:
+        return ""
+    return f"{existing[-1]}:{(feed_dir() / f'{existing[-1]}.jsonl').stat().st_size}"
+
+
+def follow(position: str = "", poll: float = 1.0) -> Iterator[Tuple[str, Dict]]:
+    """Yeni kayıtları bekleyerek üretir (tail -f); konumu çağıran commit eder."""
+    while True:
+        batch = list(read_from(position))
+        for position, record in batch:
+            yield position, record
+        if not batch:
+            time.sleep(poll)
+
+
+class Consumer:
+    def __init__(self, name: str):
+        self.name = name
+        self.conn = connect_state("change_feed")
+        self.conn.execute(SCHEMA_SQL)
+
+    @property
+    def position(self) -> str:
+        row = self.conn.execute(
+            "SELECT position FROM consumer_offsets WHERE consumer = ?", (self.name,)
+        ).fetchone()
+        return row["position"] if row else ""
+
+    def read(self, limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        return read_from(self.position, limit)
+
+    def commit(self, position: str) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO consumer_offsets (consumer, position, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (consumer) DO UPDATE SET position = excluded.position,
+                                                 updated_at = excluded.updated_at
+            """,
+            (self.name, position, time.time()),
+        )
+
+    def follow(self, poll: float = 1.0) -> Iterator[Tuple[str, Dict]]:
+        return follow(self.position, poll)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def offsets() -> Dict[str, str]:
+    conn = connect_state("change_feed")
+    conn.execute(SCHEMA_SQL)
+    rows = conn.execute("SELECT consumer, position FROM consumer_offsets ORDER BY consumer").fetchall()
+    conn.close()
+    return {r["consumer"]: r["position"] for r in rows}
+
+
+def prune(retention_days: int = RETENTION_DAYS) -> int:
+    """Saklama süresinden eski gün dosyalarını siler (geride kalan tüketiciler o kayıtları kaybeder)."""
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    removed = 0
+    for segment in segments():
+        if segment < cutoff:
+            (feed_dir() / f"{segment}.jsonl").unlink()
+            removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fiyat değişim akışı")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_tail = sub.add_parser("tail", help="Kayıtları yazdır (tüketici verilirse konumu ilerlet)")
+    p_tail.add_argument("--consumer", default=None)
+    p_tail.add_argument("--follow", action="store_true", help="Yeni kayıtları bekle")
+    p_tail.add_argument("--limit", type=int, default=None)
+    sub.add_parser("stats", help="Gün dosyaları ve tüketici konumları")
+    sub.add_parser("prune", help=f"{RETENTION_DAYS} günden eski dosyaları sil")
+    args = parser.parse_args()
+
+    if args.command == "tail":
+        consumer = Consumer(args.consumer) if args.consumer else None
+        if args.follow:
+            source = consumer.follow() if consumer else follow(end_position())
+        else:
+            source = consumer.read(args.limit) if consumer else read_from("", args.limit)
+        try:
+            for position, record in source:
+                print(_dumps(record))
+                if consumer:
+                    consumer.commit(position)
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "stats":
+        for segment in segments():
+            size = (feed_dir() / f"{segment}.jsonl").stat().st_size
+            print(f"  {segment}: {size / 1024:.1f} KB")
+        for name, position in offsets().items():
+            print(f"  ↳ {name} @ {position}")
+    else:
+        print(f"🧹 {prune()} gün dosyası silindi.")
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yarıda kalan sağlayıcı çalıştırmalarının kaldığı yerden devam etmesi.
+
+Biletix yüzlerce Chrome sayfa yüklemesinden, Biletinial yüzlerce yavaş
+detay sayfasından sonra ya da bir Supabase kesintisinde düşerse sonraki
+çalıştırma baştan başlar. Checkpoint, çalıştırmanın iş listesini ve öğe
+başına tamamlanma durumunu STATE_DIR/checkpoints.sqlite3 içinde tutar:
+
+    checkpoint = Checkpoint("biletinial")
+    links = checkpoint.plan(lambda: list(iter_city_links()))   # devam → yalnızca kalanlar
+    mark = checkpoint.marker(sink)
+    for link in links:
+        ...yaz...
+        mark(link)                  # öğenin tüm kayıtları yazıldıktan sonra
+    if sink: sink.close()
+    checkpoint.finish()             # başarılı çalıştırma: checkpoint silinir
+
+    * plan(produce)  Süresi dolmamış, bitmemiş bir çalıştırma varsa kayıtlı iş
+                     listesinin tamamlanmamış öğelerini döner (liste yeniden
+                     üretilmez — Biletix arama sayfası tekrar açılmaz). Yoksa
+                     produce() çağrılır, liste kaydedilir.
+    * marker(sink)   Doğrudan upsert (her etkinlikte commit) → öğe hemen
+                     tamamlandı yazılır. Toplu hedefte işaretler bekletilir ve
+                     hedefin bir sonraki commit'inde kalıcı olur; commit
+                     edilmemiş öğe tekrar işlenir.
+    * finish()       Çalıştırma sonuna ulaştı; hata veren öğeler bir sonraki
+                     tam çalıştırmada yeniden denenir.
+
+Checkpoint CHECKPOINT_TTL_HOURS (varsayılan 12) sonra geçersizdir; eski bir iş
+listesi devam ettirilmez. CHECKPOINTS=0 ile kapatılır.
+
+Kullanım:
+    python Cron/checkpoints.py status
+    python Cron/checkpoints.py clear biletix
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, List, Optional
+
+from local_state import connect_state
+
+TTL_HOURS = float(os.getenv("CHECKPOINT_TTL_HOURS", "12"))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS checkpoint_runs (
+    provider   TEXT PRIMARY KEY,
+    run_id     TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    total      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint_items (
+    provider TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    item_key TEXT NOT NULL,
+    done_at  REAL,
+    PRIMARY KEY (provider, item_key)
+);
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("CHECKPOINTS", "1") != "0"
+
+
+class Checkpoint:
+    def __init__(self, provider: str, ttl_hours: float = TTL_HOURS):
+        self.provider = provider
+        self.ttl = ttl_hours * 3600
+        self.resumed = False
+        self.run_id: Optional[str] = None
+        self._staged: List[str] = []
+        self._lock = threading.Lock()       # Biletix işçileri aynı nesneyi paylaşır
+        self.conn = connect_state("checkpoints", check_same_thread=False)
+        self.conn.executescript(SCHEMA_SQL)
+
+    # ---- iş listesi ---------------------------------------------------------
+    def _clear(self) -> None:
+        self.conn.execute("DELETE FROM checkpoint_items WHERE provider = ?", (self.provider,))
+        self.conn.execute("DELETE FROM checkpoint_runs WHERE provider = ?", (self.provider,))
+
+    def pending(self) -> Optional[List[str]]:
+        """Devam ettirilebilir çalıştırmanın kalan öğeleri; yoksa (ya da süresi dolduysa) None."""
+        with self._lock:
+            run = self.conn.execute(
+                "SELECT run_id, expires_at FROM checkpoint_runs WHERE provider = ?", (self.provider,)
+            ).fetchone()
+            if run is None:
+                return None
+            if run["expires_at"] <= time.time():
+                self._clear()
+                return None
+            self.run_id = run["run_id"]
+            return [row["item_key"] for row in self.conn.execute(
+                "SELECT item_key FROM checkpoint_items WHERE provider = ? AND done_at IS NULL ORDER BY seq",
+                (self.provider,),
+            )]
+
+    def begin(self, items: Iterable) -> List[str]:
+        """Yeni çalıştırmanın iş listesini kaydeder (aynı öğe bir kez)."""
+        keys = list(dict.fromkeys(str(item) for item in items))
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self._clear()
+            self.run_id = uuid.uuid4().hex
+            self.conn.execute(
+                "INSERT INTO checkpoint_runs (provider, run_id, started_at, expires_at, total) VALUES (?, ?, ?, ?, ?)",
+                (self.provider, self.run_id, now, now + self.ttl, len(keys)),
+            )
+            self.conn.executemany(
+                "INSERT INTO checkpoint_items (provider, seq, item_key) VALUES (?, ?, ?)",
+                [(self.provider, i, key) for i, key in enumerate(keys)],
+            )
+            self.conn.execute("COMMIT")
+        return keys
+
+    def plan(self, produce: Callable[[], Iterable]) -> List[str]:
+        remaining = self.pending()
+        if remaining is not None:
+            self.resumed = True
+            total = self.conn.execute(
+                "SELECT total FROM checkpoint_runs WHERE provider = ?", (self.provider,)
+            ).fetchone()["total"]
+            print(f"⏯️  [{self.provider}] yarım kalan çalıştırma sürdürülüyor: "
+                  f"{total - len(remaining)}/{total} öğe tamamlanmış, {len(remaining)} kaldı")
+            return remaining
+        return self.begin(produce())
+
+    # ---- tamamlanma ---------------------------------------------------------
+    def done(self, item) -> None:
+        self._persist([str(item)])
+
+    def stage(self, item) -> None:
+        """Toplu hedefin bir sonraki commit'inde tamamlanacak öğe."""
+        with self._lock:
+            self._staged.append(str(item))
+
+    def commit_staged(self) -> None:
+        with self._lock:
+            staged, self._staged = self._staged, []
+        self._persist(staged)
+
+    def _persist(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "UPDATE checkpoint_items SET done_at = ? WHERE provider = ? AND item_key = ?",
+                [(now, self.provider, key) for key in keys],
+            )
+
+    def marker(self, sink=None) -> Callable:
+        """Öğe tamamlandığında çağrılacak fonksiyon (bkz. modül açıklaması)."""
+        if sink is None:
+            return self.done
+        sink.commit_hooks.append(self.commit_staged)
+        return self.stage
+
+    def finish(self) -> None:
+        with self._lock:
+            self._staged = []
+            self._clear()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class _NullCheckpoint:
+    """CHECKPOINTS=0: aynı arayüz, hiçbir şey kaydedilmez."""
+
+    resumed = False
+
+    def __init__(self, provider: str):
+        self.provider = provider
+
+    def plan(self, produce: Callable[[], Iterable]) -> List:
+        return list(produce())
+
+    def marker(self, sink=None) -> Callable:
+        return lambda item: None
+
+    def finish(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def open_checkpoint(provider: str):
+    return Checkpoint(provider) if enabled() else _NullCheckpoint(provider)
+
+
+def status() -> List[dict]:
+    conn = connect_state("checkpoints")
+    conn.executescript(SCHEMA_SQL)
+    rows = conn.execute(
+        """
+        SELECT r.provider, r.started_at, r.expires_at, r.total,
+               (SELECT COUNT(*) FROM checkpoint_items i
+                WHERE i.provider = r.provider AND i.done_at IS NOT NULL) AS done
+        FROM checkpoint_runs r ORDER BY r.provider
+        """
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Sağlayıcı çalıştırma checkpoint'leri")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Yarım kalan çalıştırmalar")
+    p_clear = sub.add_parser("clear", help="Checkpoint'i sil (sonraki çalıştırma baştan başlar)")
+    p_clear.add_argument("provider")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        runs = status()
+        if not runs:
+            print("✅ Yarım kalan çalıştırma yok.")
+        for run in runs:
+            expired = " (süresi doldu)" if run["expires_at"] <= time.time() else ""
+            print(f"  {run['provider']:<12} {run['done']}/{run['total']} öğe — "
+                  f"başlangıç {datetime.fromtimestamp(run['started_at']):%Y-%m-%d %H:%M}{expired}")
+    else:
+        checkpoint = Checkpoint(args.provider)
+        checkpoint.finish()
+        checkpoint.close()
+        print(f"🧹 {args.provider} checkpoint'i silindi.")
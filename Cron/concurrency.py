@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcı başına uyarlanır eşzamanlılık denetleyicisi (AIMD).
+
+Sabit beklemeler (Biletinial 1–3 sn, Biletix 2–5 sn, Bugece promoter 0.3 sn)
+sağlayıcı sağlıklıyken gereksiz yavaş, zorlanırken fazla saldırgandır.
+Limiter her isteği ölçer ve aynı anda uçuşta olan istek sınırını ayarlar:
+
+    * Başarılı ve gecikmesi normal istek → toplamsal artış:
+          limit += CONCURRENCY_INCREASE / max(1, limit)   (tur başına ≈ +0.25)
+    * 429 / 5xx, zaman aşımı / bağlantı hatası ya da gecikme sıçraması
+      (gecikme > CONCURRENCY_LATENCY_SPIKE × taban gecikme) → çarpımsal azalış:
+          limit *= CONCURRENCY_BACKOFF                     (varsayılan 0.5)
+      Aynı anda uçuşta olan isteklerin hataları tek bir azalış sayılır.
+    * Retry-After başlığı varsa o süre boyunca yeni istek başlatılmaz.
+
+limit < 1 → tek istek uçuşta ve istek başlangıçları arasına
+`ortalama gecikme × (1/limit − 1)` (±%50 rastgele) bekleme konur; böylece
+eski sabit beklemeler yerine sağlayıcının durumuna göre açılan bir aralık
+kalır. Sınır [min_limit, max_limit] içinde tutulur; max_limit aşamadaki iş
+parçacığı sayısıdır (BILETINIAL_FETCH_WORKERS, BUBILET_FETCH_WORKERS,
+BUGECE_PROMOTER_WORKERS, BILETIX_BROWSERS artık üst sınırdır).
+
+    limiter = get_limiter("biletinial", FETCH_WORKERS)
+    resp = limiter.call(session.get, link, timeout=15)   # yanıt/exception aynen döner
+
+Öğrenilen sınır süreç boyunca kalır (daemon modunda çalıştırmalar arası);
+sayaçlar `report()` ile okunup sıfırlanır ve çalıştırma sonunda pipeline
+istatistikleriyle birlikte yazdırılır. <AD>_MIN_LIMIT alt sınırı verir
+(varsayılan 0.125: istekler arası ≈ 7 × gecikme).
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+INCREASE = float(os.getenv("CONCURRENCY_INCREASE", "0.25"))
+BACKOFF = float(os.getenv("CONCURRENCY_BACKOFF", "0.5"))
+LATENCY_SPIKE = float(os.getenv("CONCURRENCY_LATENCY_SPIKE", "3"))
+MAX_RETRY_AFTER = 120.0
+
+# sağlayıcı → başlangıç sınırı; eski sabit beklemelere yakın başlar
+INITIAL: Dict[str, float] = {
+    "biletinial": 0.5,
+    "biletix": 0.25,
+    "bugece_promoter": 1,
+}
+
+
+def _retry_after(response) -> Optional[float]:
+    value = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    try:
+        return min(float(value), MAX_RETRY_AFTER) if value else None
+    except ValueError:
+        return None
+
+
+class AdaptiveLimiter:
+    def __init__(self, name: str, initial: float = 1.0, max_limit: int = 4, min_limit: float = 0.125):
+        self.name = name
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = min_limit
+        self.limit = min(max(initial, min_limit), self.max_limit)
+        self.baseline: Optional[float] = None   # yavaşça yukarı kayan en düşük gecikme
+        self.latency: Optional[float] = None    # üssel ortalama gecikme
+        self._in_flight = 0
+        self._epoch = 0                         # her azalışta artar
+        self._next_start = 0.0
+        self._resume_at = 0.0
+        self._cond = threading.Condition()
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.counters = {"requests": 0, "errors": 0, "throttled": 0, "backoffs": 0,
+                         "latency_sum": 0.0, "since": time.monotonic(), "peak_limit": self.limit}
+
+    # ---- yuva ---------------------------------------------------------------
+    def _interval(self) -> float:
+        if self.limit >= 1 or not self.latency:
+            return 0.0
+        return self.latency * (1 / self.limit - 1) * random.uniform(0.5, 1.5)
+
+    def acquire(self) -> int:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._resume_at, self._next_start) - now
+                if wait <= 0 and self._in_flight < max(1, int(self.limit)):
+                    break
+                self._cond.wait(timeout=wait if wait > 0 else None)
+            self._in_flight += 1
+            self._next_start = now + self._interval()
+            return self._epoch
+
+    def release(self, epoch: int, latency: float, failed: bool = False,
+                throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            c = self.counters
+            c["requests"] += 1
+            c["latency_sum"] += latency
+            c["errors"] += failed
+            c["throttled"] += throttled
+            spike = self.baseline is not None and latency > LATENCY_SPIKE * self.baseline
+            if not failed and not throttled:
+                self.baseline = latency if self.baseline is None else min(
+                    latency, self.baseline + (latency - self.baseline) * 0.05)
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if failed or throttled or spike:
+                # Aynı turdaki isteklerin hataları tek azalış sayılır
+                if epoch == self._epoch:
+                    self._epoch += 1
+                    self.limit = max(self.min_limit, self.limit * BACKOFF)
+                    c["backoffs"] += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + INCREASE / max(1.0, self.limit))
+                c["peak_limit"] = max(c["peak_limit"], self.limit)
+            if retry_after:
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    # ---- kullanım -------------------------------------------------------------
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        func'ı bir yuvada çalıştırır. Dönen nesnede `status_code` varsa (requests
+        yanıtı) 429 ve 5xx kısma sayılır; exception hata sayılır ve yeniden atılır.
+        """
+        epoch = self.acquire()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            response = getattr(exc, "response", None)
+            status = getattr(response, "status_code", None)
+            self.release(epoch, time.monotonic() - started,
+                         failed=status is None or status >= 500,
+                         throttled=status == 429, retry_after=_retry_after(response))
+            raise
+        status = getattr(result, "status_code", None) or 0
+        throttled = status == 429 or status >= 500
+        self.release(epoch, time.monotonic() - started, throttled=throttled,
+                     retry_after=_retry_after(result) if throttled else None)
+        return result
+
+    # ---- ölçümler ---------------------------------------------------------
+    def snapshot(self) -> Dict:
+        with self._cond:
+            c = self.counters
+            elapsed = max(time.monotonic() - c["since"], 1e-9)
+            return {
+                "limit": round(self.limit, 3),
+                "peak_limit": round(c["peak_limit"], 3),
+                "in_flight": self._in_flight,
+                "requests": c["requests"],
+                "errors": c["errors"],
+                "throttled": c["throttled"],
+                "backoffs": c["backoffs"],
+                "avg_latency": round(c["latency_sum"] / c["requests"], 3) if c["requests"] else None,
+                "rate": round(c["requests"] / elapsed, 3),
+            }
+
+    def report(self, reset: bool = True) -> str:
+        """Tek satırlık özet ('biletinial: limit 2.75 (tepe 3.10), 1.84 istek/sn, ...'); sayaçları sıfırlar."""
+        s = self.snapshot()
+        if reset:
+            with self._cond:
+                self._reset_counters()
+        text = (f"{self.name}: limit {s['limit']} (tepe {s['peak_limit']}), {s['rate']} istek/sn, "
+                f"{s['requests']} istek")
+        if s["avg_latency"] is not None:
+            text += f", ort. {s['avg_latency']} sn"
+        if s["errors"] or s["throttled"]:
+            text += f", {s['errors']} hata / {s['throttled']} kısma, {s['backoffs']} geri çekilme"
+        return text
+
+
+# --------------------------------------------------------------------------- #
+# Süreç genelindeki limiter'lar
+# --------------------------------------------------------------------------- #
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(name: str, max_limit: int = 4) -> AdaptiveLimiter:
+    """Adın limiter'ı; ilk çağrıda oluşturulur, sonraki çağrılarda öğrenilen sınır korunur."""
+    with _registry_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = _limiters[name] = AdaptiveLimiter(
+                name,
+                initial=INITIAL.get(name, max_limit),
+                max_limit=max_limit,
+                min_limit=float(os.getenv(f"{name.upper()}_MIN_LIMIT", "0.125")),
+            )
+        else:
+            limiter.max_limit = max(1, int(max_limit))
+        return limiter
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Tüm limiter'ların anlık durumu (daemon /metrics)."""
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.snapshot() for limiter in limiters}
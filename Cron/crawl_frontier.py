@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML taranan sağlayıcılar (Biletinial) için tarama sınırı (crawl frontier).
+
+Şehir liste sayfasındaki her `/tr-tr/muzik/` bağlantısı detay sayfası
+sayılıyordu: kategori ve şehir gezinme bağlantıları da indiriliyor, birden
+çok şehirde listelenen etkinlik her şehir için yeniden çekiliyordu.
+
+    1. canonicalize(): göreli href mutlak yapılır; şema/ana makine küçük
+       harfe çevrilir, `www.` ve parça (#...) atılır, izleme parametreleri
+       (utm_*, gclid, fbclid, ...) silinir, kalanlar sıralanır, sondaki `/`
+       kaldırılır.
+    2. classify(): sağlayıcının RULES kalıplarıyla 'listing' (şehir /
+       kategori / sayfalama / filtre), 'detail' ya da kapsam dışı (None).
+       Bilinen şehir (81 il + istanbul-avrupa/anadolu) ve tür slug'ları
+       (rock, caz-blues, ...; BILETINIAL_LISTING_SLUGS ile genişletilir),
+       bunların `şehir/tür` birleşimleri, taranan liste sayfaları ve sayfanın
+       gezinme menüsündeki bağlantılar liste sayılır; indirilip etkinliksiz
+       çıkmaları beklenmez. Detay sayfasının sorgu dizgesi atılır (aynı
+       etkinlik tek URL). Kalıplar `python Cron/crawl_frontier.py check`
+       ile örnek URL'lere karşı denetlenir.
+    3. CrawlFrontier: detay URL'leri şehirler arası ve çalıştırmalar arası
+       tekilleştirilir; STATE_DIR/crawl_frontier.sqlite3 içinde URL başına
+       ilk/son görülme, son indirme ve bulunan etkinlik sayısı tutulur.
+       plan() yalnızca gerçekten yeni URL'leri (önce) ve yenileme zamanı
+       gelmiş bilinen URL'leri döner:
+
+           * etkinlik bulunan sayfa   → sayfadaki en sıcak etkinliğin uyarlanır
+             yoklama aralığı (adaptive_scheduler.refresh_windows, 6 sa – 7 gün;
+             incremental_discovery ile aynı); etkinlik henüz DB'de yoksa
+             CRAWL_FRONTIER_REFRESH_HOURS (varsayılan 5 — daemon'un 6 saatlik
+             Biletinial aralığının altında: fiyat yoklaması seyrelmez)
+           * etkinlik çıkmayan sayfa  → CRAWL_FRONTIER_EMPTY_REFRESH_HOURS (168);
+             kalıba uyan ama detay olmayan gezinme sayfaları böylece her
+             çalıştırmada indirilmez
+
+       İndirme hata verirse URL işaretlenmez, sonraki çalıştırmada yine
+       plana girer. CRAWL_FRONTIER_RETENTION_DAYS (30) boyunca hiçbir liste
+       sayfasında görülmeyen URL'ler silinir.
+
+CRAWL_FRONTIER_REFRESH_HOURS=0 her çalıştırmada tüm detayları yeniden
+indirir (tekilleştirme ve sınıflandırma yine uygulanır).
+
+Kullanım:
+    python Cron/crawl_frontier.py status
+    python Cron/crawl_frontier.py clear biletinial
+    python Cron/crawl_frontier.py check
+"""
+
+import os
+import re
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from local_state import connect_state
+
+# Zamanlama aralığından (daemon: biletinial=6h) kısa olmalı; yoksa bilinen
+# sayfalar aradaki çalıştırmalarda hiç yoklanmaz
+REFRESH_HOURS = float(os.getenv("CRAWL_FRONTIER_REFRESH_HOURS", "5"))
+EMPTY_REFRESH_HOURS = float(os.getenv("CRAWL_FRONTIER_EMPTY_REFRESH_HOURS", "168"))
+RETENTION_DAYS = float(os.getenv("CRAWL_FRONTIER_RETENTION_DAYS", "30"))
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|yclid|mc_cid|mc_eid|_ga|ref)$", re.IGNORECASE)
+
+CITY_SLUGS = frozenset("""
+    adana adiyaman afyonkarahisar agri aksaray amasya ankara antalya ardahan artvin aydin
+    balikesir bartin batman bayburt bilecik bingol bitlis bolu burdur bursa canakkale cankiri
+    corum denizli diyarbakir duzce edirne elazig erzincan erzurum eskisehir gaziantep giresun
+    gumushane hakkari hatay igdir isparta istanbul izmir kahramanmaras karabuk karaman kars
+    kastamonu kayseri kilis kirikkale kirklareli kirsehir kocaeli konya kutahya malatya manisa
+    mardin mersin mugla mus nevsehir nigde ordu osmaniye rize sakarya samsun sanliurfa siirt
+    sinop sirnak sivas tekirdag tokat trabzon tunceli usak van yalova yozgat zonguldak
+    istanbul-avrupa istanbul-anadolu kibris kktc online
+""".split())
+
+GENRE_SLUGS = frozenset("""
+    rock pop turk-pop caz blues caz-blues jazz klasik klasik-muzik elektronik elektronik-muzik
+    rap hip-hop rap-hip-hop alternatif metal indie akustik halk-muzigi turk-halk-muzigi
+    turk-sanat-muzigi arabesk fantezi dunya-muzigi latin opera senfoni oda-muzigi koro soul
+    reggae funk festival festivaller konser konserler dj parti cocuk tumu populer yeni
+    bugun yarin bu-hafta bu-hafta-sonu
+""".split()) | frozenset(os.getenv("BILETINIAL_LISTING_SLUGS", "").split())
+
+
+def _alternation(slugs: Iterable[str]) -> str:
+    return "|".join(map(re.escape, sorted(slugs, key=len, reverse=True)))
+
+
+_CITIES, _ANY_NAV = _alternation(CITY_SLUGS), _alternation(CITY_SLUGS | GENRE_SLUGS)
+_GENRES = _alternation(GENRE_SLUGS)
+
+# sağlayıcı → ana makine, kapsam ve sayfa türü kalıpları (yol üzerinde)
+RULES: Dict[str, Dict] = {
+    "biletinial": {
+        "hosts": ("biletinial.com",),
+        "scope": re.compile(r"^/tr-tr/muzik(/|$)"),
+        "listing": (
+            re.compile(r"^/tr-tr/muzik$"),
+            re.compile(r"^/tr-tr/muzik/(kategori|kategoriler|etiket|mekan|mekanlar|sehir|takvim|"
+                       r"category|venue|city|tag)(/|$)"),
+            re.compile(rf"^/tr-tr/muzik/({_ANY_NAV})$"),                 # şehir ya da tür
+            re.compile(rf"^/tr-tr/muzik/({_CITIES})/({_ANY_NAV})$"),     # şehir/tür
+            re.compile(rf"^/tr-tr/muzik/({_GENRES})/({_CITIES})$"),      # tür/şehir
+        ),
+        "detail": re.compile(r"^/tr-tr/muzik/[^/]+(/[^/]+)?$"),
+    },
+}
+
+# `check` komutunun denetlediği örnekler: (URL, beklenen tür)
+CHECK_CASES: Dict[str, Tuple[Tuple[str, Optional[str]], ...]] = {
+    "biletinial": (
+        ("https://biletinial.com/tr-tr/muzik/rock", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/caz-blues", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/istanbul/rock", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/istanbul-avrupa", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/eskisehir", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/ankara/caz-blues", "listing"),
+        ("https://biletinial.com/tr-tr/muzik/kategori/pop", "listing"),
+        ("https://biletinial.com/tr-tr/muzik?sayfa=2", "listing"),
+        ("https://biletinial.com/tr-tr/muzik", "listing"),
+        ("https://www.biletinial.com/tr-tr/muzik/duman-konseri/?utm_source=x#bilet", "detail"),
+        ("https://biletinial.com/tr-tr/muzik/ankara/mor-ve-otesi", "detail"),
+        ("https://biletinial.com/tr-tr/tiyatro/hamlet", None),
+        ("https://example.com/tr-tr/muzik/duman-konseri", None),
+    ),
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS frontier_urls (
+    provider   TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL,
+    fetched_at REAL,
+    events     INTEGER,
+    next_fetch REAL,
+    PRIMARY KEY (provider, url)
+);
+"""
+
+
+# --------------------------------------------------------------------------- #
+# 1. URL kanonikleştirme ve sınıflandırma
+# --------------------------------------------------------------------------- #
+def canonicalize(url: str, base: Optional[str] = None, drop_query: bool = False) -> str:
+    parts = urlsplit(urljoin(base, url) if base else url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+    query = "" if drop_query else urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)
+    ))
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, query, ""))
+
+
+def classify(url: str, provider: str, listing_urls: Iterable[str] = (), base: Optional[str] = None
+             ) -> Tuple[Optional[str], str]:
+    """(tür, kanonik URL); tür 'listing', 'detail' ya da kapsam dışıysa None."""
+    rules = RULES[provider]
+    canonical = canonicalize(url, base)
+    parts = urlsplit(canonical)
+    if parts.hostname not in rules["hosts"] or not rules["scope"].match(parts.path):
+        return None, canonical
+    if canonical in listing_urls or parts.query or any(p.match(parts.path) for p in rules["listing"]):
+        return "listing", canonical
+    if rules["detail"].match(parts.path):
+        return "detail", canonicalize(canonical, drop_query=True)
+    return None, canonical
+
+
+def detail_links(hrefs: Iterable[str], provider: str, base: str, listing_urls: Iterable[str] = ()) -> List[str]:
+    """
+    Sayfadaki bağlantılardan tekil, kanonik detay URL'leri (sayfadaki sırayla).
+    listing_urls: liste olduğu bilinen sayfalar (taranan şehirler, sayfanın
+    gezinme menüsündeki bağlantılar; göreliyse base'e göre çözülür).
+    """
+    listing = {canonicalize(u, base) for u in listing_urls} | {canonicalize(base)}
+    links = {}
+    for href in hrefs:
+        kind, canonical = classify(href, provider, listing, base)
+        if kind == "detail":
+            links.setdefault(canonical, None)
+    return list(links)
+
+
+# --------------------------------------------------------------------------- #
+# 2. Kalıcı sınır
+# --------------------------------------------------------------------------- #
+class CrawlFrontier:
+    def __init__(self, provider: str, refresh_hours: float = REFRESH_HOURS,
+                 empty_refresh_hours: float = EMPTY_REFRESH_HOURS):
+        self.provider = provider
+        self.refresh = refresh_hours * 3600
+        self.empty_refresh = empty_refresh_hours * 3600
+        self.conn = connect_state("crawl_frontier")
+        self.conn.executescript(SCHEMA_SQL)
+        self._next_fetch = {
+            row["url"]: row["next_fetch"]
+            for row in self.conn.execute(
+                "SELECT url, next_fetch FROM frontier_urls WHERE provider = ?", (provider,)
+            )
+        }
+        self._staged: List[Tuple[str, int, Optional[timedelta]]] = []
+        self.counts = {"seen": 0, "duplicates": 0, "new": 0, "due": 0, "skipped": 0}
+
+    def discover(self, links: Iterable[str]) -> List[str]:
+        """Liste sayfalarından gelen detay URL'lerini tekilleştirir ve görüldü olarak kaydeder."""
+        unique = {}
+        for link in links:
+            self.counts["seen"] += 1
+            if link in unique:
+                self.counts["duplicates"] += 1
+            unique.setdefault(link, None)
+        now = time.time()
+        self.conn.executemany(
+            """
+            INSERT INTO frontier_urls (provider, url, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            ON CONFLICT (provider, url) DO UPDATE SET last_seen = excluded.last_seen
+            """,
+            [(self.provider, url, now, now) for url in unique],
+        )
+        return list(unique)
+
+    def plan(self, links: Iterable[str]) -> List[str]:
+        """İndirilecek URL'ler: önce hiç indirilmemişler, sonra yenileme zamanı gelenler."""
+        now = time.time()
+        new, due = [], []
+        unique = self.discover(links)
+        for url in unique:
+            next_fetch = self._next_fetch.get(url)
+            if next_fetch is None:
+                new.append(url)
+            elif next_fetch <= now or self.refresh <= 0:
+                due.append(url)
+        self.counts["new"] += len(new)
+        self.counts["due"] += len(due)
+        self.counts["skipped"] += len(unique) - len(new) - len(due)
+        return new + due
+
+    def mark_fetched(self, url: str, events: int, refresh: Optional[timedelta] = None) -> None:
+        """Sayfa indirildi; refresh verilirse (uyarlanır yoklama aralığı) varsayılan yerine kullanılır."""
+        self._persist([(url, events, refresh)])
+
+    def _persist(self, rows: List[Tuple[str, int, Optional[timedelta]]]) -> None:
+        if not rows:
+            return
+        now = time.time()
+        params = []
+        for url, events, refresh in rows:
+            if not events:
+                interval = self.empty_refresh
+            else:
+                interval = self.refresh if refresh is None else refresh.total_seconds()
+            next_fetch = now + interval
+            self._next_fetch[url] = next_fetch
+            params.append((now, events, next_fetch, self.provider, url))
+        self.conn.executemany(
+            "UPDATE frontier_urls SET fetched_at = ?, events = ?, next_fetch = ? WHERE provider = ? AND url = ?",
+            params,
+        )
+
+    def stage(self, url: str, events: int, refresh: Optional[timedelta] = None) -> None:
+        """Toplu hedefin bir sonraki commit'inde indirildi sayılacak URL."""
+        self._staged.append((url, events, refresh))
+
+    def commit_staged(self) -> None:
+        staged, self._staged = self._staged, []
+        self._persist(staged)
+
+    def marker(self, sink=None) -> Callable[..., None]:
+        """
+        Sayfanın etkinlikleri yazıldıktan sonra çağrılacak fonksiyon; toplu
+        hedefte işaret hedefin commit'ine kadar bekletilir (bkz. checkpoints.py).
+        """
+        if sink is None:
+            return self.mark_fetched
+        sink.commit_hooks.append(self.commit_staged)
+        return self.stage
+
+    def prune(self, retention_days: float = RETENTION_DAYS) -> int:
+        return self.conn.execute(
+            "DELETE FROM frontier_urls WHERE provider = ? AND last_seen < ?",
+            (self.provider, time.time() - retention_days * 86400),
+        ).rowcount
+
+    def summary(self) -> str:
+        c = self.counts
+        return (f"tarama sınırı ({self.provider}): {c['seen'] - c['duplicates']} detay URL "
+                f"({c['duplicates']} şehirler arası tekrar), {c['new']} yeni, {c['due']} yenilenecek, "
+                f"{c['skipped']} atlandı")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def check(provider: str) -> List[str]:
+    """CHECK_CASES örneklerinden beklenenden farklı sınıflananlar (boşsa kalıplar doğru)."""
+    failures = []
+    for url, expected in CHECK_CASES[provider]:
+        kind, canonical = classify(url, provider)
+        if kind != expected:
+            failures.append(f"{url}: beklenen {expected}, bulunan {kind} ({canonical})")
+    return failures
+
+
+def status() -> List[dict]:
+    conn = connect_state("crawl_frontier")
+    conn.executescript(SCHEMA_SQL)
+    rows = conn.execute(
+        """
+        SELECT provider, COUNT(*) AS urls,
+               SUM(fetched_at IS NULL) AS never_fetched,
+               SUM(events = 0) AS empty,
+               SUM(next_fetch <= ?) AS due
+        FROM frontier_urls GROUP BY provider ORDER BY provider
+        """,
+        (time.time(),),
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tarama sınırı (crawl frontier)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Sağlayıcı başına URL sayıları")
+    p_clear = sub.add_parser("clear", help="Sağlayıcının sınırını sil (sonraki çalıştırma tüm detayları indirir)")
+    p_clear.add_argument("provider")
+    p_check = sub.add_parser("check", help="Sınıflandırma kalıplarını örnek URL'lere karşı denetle")
+    p_check.add_argument("provider", nargs="?", default="biletinial", choices=sorted(CHECK_CASES))
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for s in status():
+            print(f"  {s['provider']:<12} {s['urls']:>6} URL  {s['never_fetched'] or 0:>5} hiç indirilmemiş  "
+                  f"{s['empty'] or 0:>5} etkinliksiz  {s['due'] or 0:>5} yenilenecek")
+    elif args.command == "check":
+        failures = check(args.provider)
+        for line in failures:
+            print(f"❌ {line}")
+        print(f"{'⚠️ ' if failures else '✅'} {args.provider}: {len(CHECK_CASES[args.provider]) - len(failures)}"
+              f"/{len(CHECK_CASES[args.provider])} URL doğru sınıflandı")
+        raise SystemExit(1 if failures else 0)
+    else:
+        conn = connect_state("crawl_frontier")
+        conn.executescript(SCHEMA_SQL)
+        removed = conn.execute("DELETE FROM frontier_urls WHERE provider = ?", (args.provider,)).rowcount
+        conn.close()
+        print(f"🧹 {args.provider}: {removed} URL silindi.")
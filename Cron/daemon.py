@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcıları tek, sürekli çalışan süreçte zamanlayan daemon.
+
+Cron her çalıştırmada yeni bir Python süreci açar: bağımlılıklar yeniden
+içe aktarılır, Supabase'e yeniden bağlanılır, Biletix için Chrome yeniden
+başlatılır. Daemon modunda bunlar süreç boyunca sıcak kalır:
+
+    * modüller        → event_table.load() ile bir kez yüklenir
+    * DB bağlantısı   → db.REUSE_CONNECTIONS: çalıştırıcı iş parçacığının tek bağlantısı
+    * HTTP oturumları → sağlayıcı modüllerindeki requests.Session (keep-alive)
+    * sanatçı önbelleği (bubilet.artist_for) → DAEMON_CACHE_HOURS'ta bir temizlenir
+    * ParsePool       → süreçler açılışta (iş parçacıklarından önce) fork edilir
+    * BrowserPool     → Biletix ilk kez çalıştığında açılır, kapanışa kadar kalır
+
+İşler tek bir çalıştırıcı iş parçacığında sırayla yürür (aynı anda tek
+sağlayıcı; kaynak ve oran sınırları cron'daki gibi). Bir iş bitince bir
+sonraki çalıştırma `bitiş + aralık` olarak planlanır.
+
+Zamanlama (DAEMON_SCHEDULE, dakika: 30m, saat: 2h, saniye: 45s):
+    bubilet=30m,bugece=1h,passo=2h,biletinial=6h
+Listede olmayan sağlayıcılar (ör. biletix) yalnızca tetiklenince çalışır.
+PROFILE / PROFILE_TRACEMALLOC ayarlıysa her iş ayrı profillenir (Cron/profiling.py).
+
+HTTP (DAEMON_HOST:DAEMON_PORT, varsayılan 127.0.0.1:8765):
+    POST /run/<sağlayıcı>  → hemen kuyruğa al (202; zaten sıradaysa 200)
+    GET  /status           → işlerin son/sonraki çalıştırma bilgisi (JSON)
+    GET  /metrics          → sağlayıcı başına uyarlanır eşzamanlılık sınırı ve hız
+DAEMON_TOKEN ayarlıysa istekler `Authorization: Bearer <token>` taşımalıdır.
+
+Kullanım:
+    python Cron/daemon.py
+    python Cron/event_table.py daemon --jobs bubilet bugece
+    curl -X POST localhost:8765/run/biletix
+"""
+
+import json
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import concurrency
+import db
+import event_table
+from profiling import profile_run
+
+DEFAULT_SCHEDULE = "bubilet=30m,bugece=1h,passo=2h,biletinial=6h"
+CACHE_TTL = float(os.getenv("DAEMON_CACHE_HOURS", "24")) * 3600
+TICK = 1.0          # zamanlayıcı kontrol aralığı (sn)
+
+
+# --------------------------------------------------------------------------- #
+# 1. İş tanımları
+# --------------------------------------------------------------------------- #
+#   command : event_table komutu (modül bir kez yüklenir)
+#   run     : (modül, daemon) → sağlayıcının giriş fonksiyonunu çağırır
+#   reset   : (modül) → uzun ömürlü önbellekleri temizler
+JOBS: Dict[str, Dict] = {
+    "bubilet": {
+        "command": "bubilet",
+        "run": lambda m, d: m.main([]),
+        "reset": lambda m: m.artist_for.cache_clear(),
+    },
+    "bugece": {"command": "bugece", "run": lambda m, d: m.main()},
+    "passo": {"command": "passo", "run": lambda m, d: m.main([])},
+    "biletinial": {"command": "biletinial", "run": lambda m, d: m.main([], pool=d.parse_pool)},
+    "biletix": {"command": "biletix", "run": lambda m, d: m.main([], pool=d.browser_pool(), parser=d.parse_pool)},
+    "migrate": {"command": "migrate", "run": lambda m, d: m.migrate(db.connection(), m.DEFAULT_TABLES)},
+}
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([smh]?)$")
+
+
+def parse_duration(text: str) -> float:
+    match = _DURATION_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Geçersiz süre: {text!r} (ör. 45s, 30m, 2h)")
+    value, unit = float(match.group(1)), match.group(2) or "m"
+    return value * {"s": 1, "m": 60, "h": 3600}[unit]
+
+
+def parse_schedule(text: str) -> Dict[str, float]:
+    """'bubilet=30m,bugece=1h' → {"bubilet": 1800.0, "bugece": 3600.0}"""
+    schedule = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, interval = part.partition("=")
+        if name not in JOBS:
+            raise ValueError(f"Bilinmeyen iş: {name} (seçenekler: {', '.join(JOBS)})")
+        schedule[name] = parse_duration(interval)
+    return schedule
+
+
+# --------------------------------------------------------------------------- #
+# 2. Daemon
+# --------------------------------------------------------------------------- #
+class Daemon:
+    def __init__(self, schedule: Dict[str, float], parse_workers: Optional[int] = None):
+        self.schedule = schedule
+        self.stop = threading.Event()
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._browser_pool = None
+        self._cache_reset_at = time.monotonic()
+        now = time.time()
+        self.state = {
+            name: {"interval": schedule.get(name), "next_run": now if name in schedule else None,
+                   "queued": False, "running": False, "runs": 0, "failures": 0,
+                   "last_start": None, "last_duration": None, "last_error": None}
+            for name in JOBS
+        }
+        # Süreç havuzu fork ile açılır: HTTP ve çalıştırıcı iş parçacıklarından önce
+        from parse_pool import ParsePool
+
+        self.parse_pool = ParsePool(parse_workers)
+        db.REUSE_CONNECTIONS = True
+
+    # ---- sıcak kaynaklar -------------------------------------------------
+    def browser_pool(self):
+        if self._browser_pool is None:
+            from browser_pool import BrowserPool
+
+            self._browser_pool = BrowserPool(size=int(os.getenv("BILETIX_BROWSERS", "2")))
+        return self._browser_pool
+
+    def _reset_caches(self) -> None:
+        if time.monotonic() - self._cache_reset_at < CACHE_TTL:
+            return
+        for job in JOBS.values():
+            # Henüz yüklenmemiş modülün önbelleği de yoktur
+            if job.get("reset") and event_table._module_name(job["command"]) in sys.modules:
+                job["reset"](event_table.load(job["command"]))
+        self._cache_reset_at = time.monotonic()
+        print("🧹 Önbellekler temizlendi.")
+
+    # ---- kuyruk ----------------------------------------------------------
+    def trigger(self, name: str) -> str:
+        """İşi kuyruğa alır; 'queued' | 'already-queued' | 'running'."""
+        with self._lock:
+            job = self.state[name]
+            if job["queued"]:
+                return "already-queued"
+            job["queued"] = True
+            self._queue.put(name)
+            return "queued" if not job["running"] else "running"
+
+    def _due(self) -> List[str]:
+        now = time.time()
+        with self._lock:
+            return [name for name, job in self.state.items()
+                    if job["next_run"] is not None and job["next_run"] <= now
+                    and not job["queued"] and not job["running"]]
+
+    # ---- çalıştırma ------------------------------------------------------
+    def _run_job(self, name: str) -> None:
+        job, spec = self.state[name], JOBS[name]
+        with self._lock:
+            job.update(queued=False, running=True, last_start=time.time())
+        print(f"\n▶️  [{datetime.now():%Y-%m-%d %H:%M:%S}] {name} başladı")
+        started = time.perf_counter()
+        error = None
+        try:
+            with profile_run(name):     # PROFILE / PROFILE_TRACEMALLOC ayarlıysa
+                spec["run"](event_table.load(spec["command"]), self)
+        except (Exception, SystemExit) as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            traceback.print_exc()
+        finally:
+            db.reset_shared()           # yarım kalan işlem sonraki işe taşınmasın
+        duration = time.perf_counter() - started
+        with self._lock:
+            job.update(running=False, last_duration=round(duration, 1), last_error=error)
+            job["runs"] += 1
+            job["failures"] += error is not None
+            if job["interval"]:
+                job["next_run"] = time.time() + job["interval"]
+        print(f"{'⚠️ ' if error else '✅'} {name} {duration:.1f} sn{' — ' + error if error else ''}")
+
+    def _runner(self) -> None:
+        while True:
+            name = self._queue.get()
+            if name is None:
+                break
+            self._reset_caches()
+            self._run_job(name)
+        db.close_shared()
+
+    def status(self) -> Dict:
+        def ts(value):
+            return datetime.fromtimestamp(value).isoformat(timespec="seconds") if value else None
+
+        with self._lock:
+            return {
+                name: {**job, "next_run": ts(job["next_run"]), "last_start": ts(job["last_start"])}
+                for name, job in self.state.items()
+            }
+
+    # ---- ana döngü -------------------------------------------------------
+    def serve(self, host: str, port: int) -> None:
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True).start()
+        runner = threading.Thread(target=self._runner, name="daemon-runner")
+        runner.start()
+        print(f"🛰️  Daemon http://{host}:{port} — plan: "
+              + (", ".join(f"{n}/{s / 60:g}dk" for n, s in self.schedule.items()) or "yok"))
+        try:
+            while not self.stop.wait(TICK):
+                for name in self._due():
+                    self.trigger(name)
+        finally:
+            server.shutdown()
+            self._queue.put(None)           # sıradaki iş bitince çıkar
+            runner.join()
+            self.close()
+
+    def close(self) -> None:
+        self.parse_pool.close()
+        if self._browser_pool is not None:
+            print(f"Tarayıcı havuzu kapatılıyor ({self._browser_pool.recycled} tarayıcı yenilendi).")
+            self._browser_pool.close()
+
+
+# --------------------------------------------------------------------------- #
+# 3. HTTP tetikleyici
+# --------------------------------------------------------------------------- #
+def _handler_for(daemon: Daemon):
+    token = os.getenv("DAEMON_TOKEN")
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, body: Dict) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            if token and self.headers.get("Authorization") != f"Bearer {token}":
+                self._reply(401, {"error": "yetkisiz"})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path.rstrip("/") == "/status":
+                self._reply(200, daemon.status())
+            elif self.path.rstrip("/") == "/metrics":
+                self._reply(200, concurrency.snapshot())
+            else:
+                self._reply(404, {"error": "bulunamadı"})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            match = re.fullmatch(r"/run/([\w-]+)/?", self.path)
+            if not match:
+                self._reply(404, {"error": "bulunamadı"})
+            elif match.group(1) not in JOBS:
+                self._reply(404, {"error": f"bilinmeyen iş: {match.group(1)}", "jobs": list(JOBS)})
+            else:
+                result = daemon.trigger(match.group(1))
+                self._reply(202 if result != "already-queued" else 200,
+                            {"job": match.group(1), "state": result})
+
+        def log_message(self, fmt, *args):
+            print(f"🌐 {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sağlayıcıları sıcak kaynaklarla zamanlayan daemon")
+    parser.add_argument("--schedule", default=os.getenv("DAEMON_SCHEDULE", DEFAULT_SCHEDULE),
+                        help=f"iş=aralık listesi (varsayılan: {DEFAULT_SCHEDULE})")
+    parser.add_argument("--jobs", nargs="*", choices=sorted(JOBS), default=None,
+                        help="Yalnızca bu işleri zamanla (aralıklar --schedule'dan)")
+    parser.add_argument("--host", default=os.getenv("DAEMON_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("DAEMON_PORT", "8765")))
+    parser.add_argument("--migrate", action="store_true", help="Açılışta şema göçlerini çalıştır")
+    args = parser.parse_args()
+
+    schedule = parse_schedule(args.schedule)
+    if args.jobs is not None:
+        schedule = {name: schedule[name] for name in args.jobs if name in schedule}
+
+    daemon = Daemon(schedule)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: daemon.stop.set())
+    if args.migrate:
+        daemon.trigger("migrate")
+    daemon.serve(args.host, args.port)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Supabase/PostgreSQL bağlantısı için ortak yardımcı.
+Sağlayıcı betikleri kendi connect_db() fonksiyonlarını taşır; yeni ortak
+bileşenler (iş kuyruğu vb.) bağlantıyı buradan alır.
+
+Uzun süre çalışan süreçler (daemon.py) REUSE_CONNECTIONS'ı açar; bu
+durumda connection() her iş parçacığına tek, sıcak tutulan bir bağlantı
+verir ve release() onu kapatmaz. Kapalıyken connection() her çağrıda yeni
+bağlantı açar (tek seferlik betiklerin eski davranışı).
+"""
+
+import os
+import threading
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()                                   # .env içinden DATABASE_URL al
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+REUSE_CONNECTIONS = os.getenv("DB_REUSE_CONNECTIONS", "0") == "1"
+PING_AFTER = float(os.getenv("DB_PING_AFTER_SECONDS", "60"))   # bu kadar boşta kalınca yokla
+
+_local = threading.local()
+
+
+def connect_db():
+    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan."""
+    return psycopg2.connect(DATABASE_URL, sslmode="require")
+
+
+def _alive(conn) -> bool:
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def shared_connection():
+    """İş parçacığının sıcak bağlantısı; kopmuşsa (ya da uzun süre boştaysa ve yanıt vermiyorsa) yenilenir."""
+    conn = getattr(_local, "conn", None)
+    idle = time.monotonic() - getattr(_local, "used", 0.0)
+    if conn is None or conn.closed or (idle > PING_AFTER and not _alive(conn)):
+        if conn is not None and not conn.closed:
+            conn.close()
+        conn = _local.conn = connect_db()
+    _local.used = time.monotonic()
+    return conn
+
+
+def connection():
+    return shared_connection() if REUSE_CONNECTIONS else connect_db()
+
+
+def release(conn) -> None:
+    """
+    connection() ile alınan bağlantıyı bırakır: paylaşılan bağlantı açık kalır,
+    commit edilmemiş işlem geri alınır (kapatmayla aynı sonuç).
+    """
+    if conn is None:
+        return
+    if conn is getattr(_local, "conn", None):
+        reset_shared()
+    else:
+        conn.close()
+
+
+def reset_shared() -> None:
+    """Sıcak bağlantıda açık kalan işlemi geri alır (SELECT'ler de işlem açar)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and not conn.closed:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            conn.close()
+
+
+def close_shared() -> None:
+    """Bu iş parçacığının sıcak bağlantısını kapatır (daemon kapanırken)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and not conn.closed:
+        conn.close()
+    _local.conn = None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tek giriş noktası: sağlayıcı ve bakım işleri için alt komutlar.
+
+    python Cron/event_table.py <komut> [komutun kendi argümanları]
+    python Cron/event_table.py list
+
+Her komut bir betiğe karşılık gelir ve yalnızca o komut seçildiğinde
+yüklenir; `bugece` çalıştırmak Selenium'u, `migrate` çalıştırmak requests'i
+içe aktarmaz. Betik, `python <betik>` ile çalıştırılmış gibi
+(`__name__ == "__main__"`) yürütülür, argümanlar olduğu gibi aktarılır:
+
+    python Cron/event_table.py bubilet --mode work
+    python Cron/event_table.py migrate --status
+    python Cron/event_table.py artifacts finalize --logs run_events.log
+
+Komuttan önce verilen --profile cprofile|sample ve --tracemalloc (ya da
+PROFILE / PROFILE_TRACEMALLOC) çalıştırmayı profiller; çıktılar
+artifacts/profiles altına yazılır (bkz. Cron/profiling.py):
+
+    python Cron/event_table.py --profile sample biletinial
+
+Sürekli çalışan süreçler (ör. zamanlayıcı) betikleri `load()` ile modül
+olarak yükler; aynı modül ikinci kez çalıştırılmaz. Dosya adındaki tire
+(biletix-muzik.py) nedeniyle yükleme dosya yolundan yapılır.
+"""
+
+import importlib.util
+import os
+import runpy
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+CRON_DIR = Path(__file__).resolve().parent
+ROOT = CRON_DIR.parent
+
+# komut → (depo köküne göre betik, açıklama)
+COMMANDS: Dict[str, tuple] = {
+    # ---- sağlayıcılar ----
+    "biletinial":      ("Cron/biletinial_artist_promoter_desc.py", "Biletinial etkinlik + fiyatları"),
+    "bubilet":         ("Cron/bubilet.py", "Bubilet etkinlik + fiyatları"),
+    "bugece":          ("Cron/bugece.py", "Bugece etkinlik + fiyatları"),
+    "passo":           ("Cron/passo_promoter_artist.py", "Passo etkinlik + fiyatları"),
+    "biletix":         ("Cron/biletix-muzik.py", "Biletix müzik etkinlikleri (Selenium)"),
+    "bugece-promoter": ("kuzey/bugece_promoter.py", "Bugece promoter → etkinlik CSV'si"),
+    "bubilet-snapshot": ("kuzey/bubilet.py", "Bubilet İstanbul anlık CSV'si (pandas)"),
+    # ---- bakım ----
+    "migrate":         ("Cron/migrations.py", "Şema göçleri"),
+    "history":         ("Cron/history_maintenance.py", "price_history bölümleme / özetleme / arşiv"),
+    "backfill":        ("Cron/backfill_csv.py", "Bubilet CSV geçmişini COPY ile yükle"),
+    "artifacts":       ("Cron/artifacts.py", "Log / dışa aktarım arşivi"),
+    "plan":            ("Cron/adaptive_scheduler.py", "Uyarlanır yoklama planını göster"),
+    "queue":           ("Cron/work_queue.py", "İş kuyruğu durumu"),
+    "checkpoints":     ("Cron/checkpoints.py", "Yarım kalan çalıştırmalar (status / clear)"),
+    "raw":             ("Cron/raw_store.py", "Ham yanıt deposu (stats / export / prune)"),
+    "frontier":        ("Cron/crawl_frontier.py", "Biletinial tarama sınırı (status / clear)"),
+    "feed":            ("Cron/change_feed.py", "Fiyat değişim akışı (tail / stats / prune)"),
+    "daemon":          ("Cron/daemon.py", "Sağlayıcıları sıcak kaynaklarla zamanlayan süreç"),
+    "read-api":        ("Cron/read_api.py", "Güncel fiyatlar için önbellekli okuma API'si"),
+}
+
+
+def script_path(command: str) -> Path:
+    try:
+        return ROOT / COMMANDS[command][0]
+    except KeyError:
+        raise KeyError(f"Bilinmeyen komut: {command} (seçenekler: {', '.join(COMMANDS)})") from None
+
+
+def _module_name(command: str) -> str:
+    return "event_table_" + command.replace("-", "_")
+
+
+def _ensure_path() -> None:
+    # Betikler kardeş modülleri (db, storage_sinks, ...) doğrudan içe aktarır
+    if str(CRON_DIR) not in sys.path:
+        sys.path.insert(0, str(CRON_DIR))
+
+
+def load(command: str) -> ModuleType:
+    """Betiği modül olarak yükler (ana blok çalışmaz); sonraki çağrılar önbellekten döner."""
+    name = _module_name(command)
+    if name in sys.modules:
+        return sys.modules[name]
+    _ensure_path()
+    path = script_path(command)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
+def run(command: str, argv: Optional[List[str]] = None) -> None:
+    """Betiği `python <betik> argv...` gibi çalıştırır (sys.argv geçici olarak değişir)."""
+    _ensure_path()
+    path = script_path(command)
+    saved = sys.argv
+    sys.argv = [str(path), *(argv or [])]
+    try:
+        runpy.run_path(str(path), run_name="__main__")
+    finally:
+        sys.argv = saved
+
+
+def print_commands(file=None) -> None:
+    width = max(map(len, COMMANDS))
+    for command, (path, help_text) in COMMANDS.items():
+        print(f"  {command:<{width}}  {help_text}  [{path}]", file=file)
+
+
+def _profile_options(argv: List[str]) -> Tuple[Optional[str], Optional[bool], List[str]]:
+    """Komuttan önceki --profile KİP / --profile=KİP / --tracemalloc seçeneklerini ayırır."""
+    mode, memory = None, None
+    while argv and argv[0].startswith(("--profile", "--tracemalloc")):
+        option = argv.pop(0)
+        if option == "--tracemalloc":
+            memory = True
+        elif option.startswith("--profile="):
+            mode = option.split("=", 1)[1]
+        elif argv:
+            mode = argv.pop(0)
+    return mode, memory, argv
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    mode, memory, argv = _profile_options(argv)
+    if not argv or argv[0] in ("-h", "--help", "list"):
+        print("Kullanım: python Cron/event_table.py <komut> [argümanlar]\n\nKomutlar:")
+        print_commands()
+        return 0 if argv else 2
+
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"❌ Bilinmeyen komut: {command}\n\nKomutlar:", file=sys.stderr)
+        print_commands(sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    # daemon işleri tek tek profiller (iç içe örnekleyici / tracemalloc olmasın)
+    profiled = mode or memory or os.getenv("PROFILE") or os.getenv("PROFILE_TRACEMALLOC") == "1"
+    if profiled and command != "daemon":
+        from profiling import profile_run
+
+        with profile_run(command, mode, memory):
+            run(command, rest)
+    else:
+        run(command, rest)
+    if os.getenv("EVENT_TABLE_TIMING", "1") != "0":
+        print(f"⏱️  {command}: {time.perf_counter() - started:.1f} sn")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+*_price_history tabloları için aylık bölümleme, özetleme ve arşiv.
+
+History tabloları yalnızca eklenir ve sınırsız büyür (Bubilet her
+`remaining` değişiminde satır yazar). Bu modül tabloyu change_date'e göre
+aylık RANGE bölümlerine ayırır; son günlere bakan sorgular (planlayıcı,
+okuma API'si) yalnızca ilgili ayların bölümlerini tarar.
+
+    partition  (bir kez)  <t>_price_history'yi bölümlenmiş tabloya çevirir:
+                          change_date metinse TIMESTAMP'e dönüştürülür, veriler
+                          aylık bölümlere kopyalanır, eski tablo
+                          <t>_price_history_legacy adıyla kalır (--drop-legacy).
+    maintain   (her gün)  1. Önümüzdeki HISTORY_PARTITION_AHEAD ay için bölüm açar
+                             (DEFAULT bölüme düşmüş satırlar yeni bölüme taşınır).
+                          2. Tamamı HISTORY_RETENTION_DAYS'ten eski bölümleri
+                             günlük özete indirir:
+                                 <t>_price_history_daily (event_id, category, day,
+                                 first/last/min/max price, changes, ...)
+                          3. Bölümü HISTORY_ARCHIVE'e göre kaldırır:
+                                 file   → gzip CSV (HISTORY_ARCHIVE_DIR/<t>/YYYY_MM.csv.gz), sonra DROP
+                                 detach → bölüm ayrılır, bağımsız tablo olarak kalır
+                                 drop   → doğrudan DROP
+    status                bölümler, satır sayıları ve boyutlar
+
+Özetleme, arşiv ve DROP tek işlemdedir; yarıda kalan bölüm bir sonraki
+çalıştırmada baştan işlenir (özet ON CONFLICT DO NOTHING ile yazılır).
+Yazan betikler değişmez: bölümlenmiş tabloya INSERT aynı ifadeyle yapılır.
+
+Kullanım:
+    python Cron/history_maintenance.py partition --providers bubilet
+    python Cron/history_maintenance.py maintain
+    python Cron/history_maintenance.py status
+    python Cron/history_maintenance.py maintain --providers biletix --dsn postgresql://localhost/Eventist
+"""
+
+import gzip
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from migrations import ALL_TABLES, DEFAULT_TABLES, connect
+
+load_dotenv()
+ROOT = Path(__file__).resolve().parent.parent
+RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+PARTITION_AHEAD = int(os.getenv("HISTORY_PARTITION_AHEAD", "2"))
+ARCHIVE_MODE = os.getenv("HISTORY_ARCHIVE", "file")
+ARCHIVE_DIR = Path(os.getenv("HISTORY_ARCHIVE_DIR", ROOT / "archive" / "price_history"))
+ARCHIVE_MODES = ("file", "detach", "drop")
+
+
+# --------------------------------------------------------------------------- #
+# 1. Yardımcılar
+# --------------------------------------------------------------------------- #
+def _month(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _partition_name(t: str, month: date) -> str:
+    return f"{t}_price_history_{month:%Y_%m}"
+
+
+def _columns(cur, table: str) -> Dict[str, str]:
+    cur.execute(
+        """
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s
+        ORDER BY ordinal_position
+        """,
+        (table,),
+    )
+    return dict(cur.fetchall())
+
+
+def _column_ddl(cur, table: str, overrides: Dict[str, str]) -> str:
+    """CREATE TABLE için sütun tanımları (tip + DEFAULT); overrides sütunun tanımını değiştirir."""
+    cur.execute(
+        """
+        SELECT a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+               pg_get_expr(d.adbin, d.adrelid)
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+        WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+        ORDER BY a.attnum
+        """,
+        (table,),
+    )
+    parts = []
+    for name, type_, not_null, default in cur.fetchall():
+        if name in overrides:
+            parts.append(f"{name} {overrides[name]}")
+            continue
+        parts.append(f"{name} {type_}" + (" NOT NULL" if not_null else "")
+                     + (f" DEFAULT {default}" if default else ""))
+    return ", ".join(parts)
+
+
+def is_partitioned(cur, t: str) -> bool:
+    cur.execute(
+        """
+        SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        """,
+        (f"{t}_price_history",),
+    )
+    return cur.fetchone() is not None
+
+
+def partitions(cur, t: str) -> List[Tuple[str, Optional[date], Optional[date]]]:
+    """(bölüm adı, başlangıç, bitiş) — DEFAULT bölümde başlangıç/bitiş None."""
+    cur.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = %s AND p.relnamespace = current_schema()::regnamespace
+        ORDER BY c.relname
+        """,
+        (f"{t}_price_history",),
+    )
+    result = []
+    for name, bound in cur.fetchall():
+        if bound == "DEFAULT":
+            result.append((name, None, None))
+            continue
+        # FOR VALUES FROM ('2025-01-01 00:00:00') TO ('2025-02-01 00:00:00')
+        lower, upper = [part.split("'")[1][:10] for part in bound.split(" TO ")]
+        result.append((name, date.fromisoformat(lower), date.fromisoformat(upper)))
+    return result
+
+
+# --------------------------------------------------------------------------- #
+# 2. Bölümlemeye geçiş
+# --------------------------------------------------------------------------- #
+def _create_month(cur, t: str, month: date) -> None:
+    """Ay bölümünü açar; DEFAULT bölümde o aya düşmüş satır varsa önce onları taşır."""
+    name = _partition_name(t, month)
+    lower, upper = month.isoformat(), _next_month(month).isoformat()
+    parent, default = f"{t}_price_history", f"{t}_price_history_default"
+    cur.execute(f"CREATE TABLE IF NOT EXISTS {name} (LIKE {parent} INCLUDING DEFAULTS)")
+    cur.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE change_date >= %(lower)s AND change_date < %(upper)s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        {"lower": lower, "upper": upper},
+    )
+    if cur.rowcount:
+        print(f"   ↪ {cur.rowcount} satır DEFAULT bölümden {name} bölümüne taşındı")
+    cur.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+
+
+def partition_table(conn, t: str, drop_legacy: bool = False) -> bool:
+    """<t>_price_history'yi aylık bölümlenmiş tabloya çevirir; zaten bölümlüyse False."""
+    parent, legacy = f"{t}_price_history", f"{t}_price_history_legacy"
+    with conn.cursor() as cur:
+        if is_partitioned(cur, t):
+            return False
+        columns = _columns(cur, parent)
+        if not columns:
+            raise RuntimeError(f"{parent} tablosu bulunamadı")
+        # Kopyalama sırasında yazmalar beklesin (okumalar devam eder)
+        cur.execute(f"LOCK TABLE {parent} IN EXCLUSIVE MODE")
+        cur.execute(f"ALTER TABLE {parent} RENAME TO {legacy}")
+        # Bölüm anahtarının tipi sonradan değiştirilemez: change_date baştan TIMESTAMP NOT NULL
+        change_date = columns["change_date"]
+        if change_date not in ("timestamp without time zone", "timestamp with time zone"):
+            print(f"   ↺ {parent}.change_date {change_date} → timestamp")
+            change_date = "timestamp without time zone"
+        ddl = _column_ddl(cur, legacy, {"change_date": f"{change_date} NOT NULL"})
+        cur.execute(f"CREATE TABLE {parent} ({ddl}) PARTITION BY RANGE (change_date)")
+        cur.execute(f"CREATE TABLE {t}_price_history_default PARTITION OF {parent} DEFAULT")
+
+        cur.execute(f"SELECT MIN(change_date::timestamp), MAX(change_date::timestamp) FROM {legacy}")
+        first, last = cur.fetchone()
+        month = _month(first.date() if first else date.today())
+        until = _month(date.today())
+        for _ in range(PARTITION_AHEAD):
+            until = _next_month(until)
+        if last and _month(last.date()) > until:
+            until = _month(last.date())
+        while month <= until:
+            _create_month(cur, t, month)
+            month = _next_month(month)
+
+        names = ", ".join(columns)
+        select = ", ".join("change_date::timestamp" if c == "change_date" else c for c in columns)
+        cur.execute(f"INSERT INTO {parent} ({names}) SELECT {select} FROM {legacy} WHERE change_date IS NOT NULL")
+        print(f"   ✅ {cur.rowcount} satır kopyalandı")
+
+        # serial sütunların dizileri yeni tabloya bağlansın (legacy silinince gitmesin)
+        for column in columns:
+            cur.execute("SELECT pg_get_serial_sequence(%s, %s)", (legacy, column))
+            sequence = cur.fetchone()[0]
+            if sequence:
+                cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY {parent}.{column}")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {parent}_event_date_part_idx ON {parent} (event_id, change_date)")
+        if drop_legacy:
+            cur.execute(f"DROP TABLE {legacy}")
+    conn.commit()
+    return True
+
+
+# --------------------------------------------------------------------------- #
+# 3. Bakım: ileri bölümler, özet, arşiv
+# --------------------------------------------------------------------------- #
+def ensure_partitions(conn, t: str, ahead: int = PARTITION_AHEAD) -> int:
+    created = 0
+    with conn.cursor() as cur:
+        existing = {lower for _, lower, _ in partitions(cur, t) if lower}
+        month = _month(date.today())
+        for _ in range(ahead + 1):
+            if month not in existing:
+                _create_month(cur, t, month)
+                created += 1
+            month = _next_month(month)
+    conn.commit()
+    return created
+
+
+def _ensure_daily(cur, t: str, has_remaining: bool) -> None:
+    remaining = "min_remaining INTEGER, last_remaining INTEGER," if has_remaining else ""
+    cur.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {t}_price_history_daily (
+            event_id    BIGINT NOT NULL,
+            category    TEXT NOT NULL,
+            day         DATE NOT NULL,
+            first_price NUMERIC,
+            last_price  NUMERIC,
+            min_price   NUMERIC,
+            max_price   NUMERIC,
+            {remaining}
+            sold_out    BOOLEAN,
+            changes     INTEGER NOT NULL,
+            change_types TEXT[],
+            PRIMARY KEY (event_id, category, day)
+        )
+        """
+    )
+
+
+def downsample(cur, t: str, partition: str, has_remaining: bool) -> int:
+    """Bölümü (event_id, category, gün) başına tek satıra indirir."""
+    _ensure_daily(cur, t, has_remaining)
+    remaining_cols = "min_remaining, last_remaining," if has_remaining else ""
+    remaining_vals = (
+        "MIN(remaining), (ARRAY_AGG(remaining ORDER BY change_date DESC))[1],"
+        if has_remaining else ""
+    )
+    cur.execute(
+        f"""
+        INSERT INTO {t}_price_history_daily
+            (event_id, category, day, first_price, last_price, min_price, max_price,
+             {remaining_cols} sold_out, changes, change_types)
+        SELECT event_id, COALESCE(category, ''), change_date::date,
+               (ARRAY_AGG(price ORDER BY change_date))[1],
+               (ARRAY_AGG(price ORDER BY change_date DESC))[1],
+               MIN(price), MAX(price),
+               {remaining_vals}
+               (ARRAY_AGG(sold_out ORDER BY change_date DESC))[1],
+               COUNT(*), ARRAY_AGG(DISTINCT change_type)
+        FROM {partition}
+        GROUP BY event_id, COALESCE(category, ''), change_date::date
+        ON CONFLICT (event_id, category, day) DO NOTHING
+        """
+    )
+    return cur.rowcount
+
+
+def archive_file(cur, t: str, partition: str, month: date) -> Path:
+    path = ARCHIVE_DIR / t / f"{month:%Y_%m}.csv.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with gzip.open(tmp, "wb") as f:
+        cur.copy_expert(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    tmp.replace(path)
+    return path
+
+
+def retire_old(conn, t: str, retention_days: int = RETENTION_DAYS, mode: str = ARCHIVE_MODE) -> int:
+    """Tamamı saklama süresinden eski bölümleri özetler ve kaldırır; işlenen bölüm sayısını döner."""
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"HISTORY_ARCHIVE şunlardan biri olmalı: {', '.join(ARCHIVE_MODES)}")
+    cutoff = date.today() - timedelta(days=retention_days)
+    parent = f"{t}_price_history"
+    retired = 0
+    with conn.cursor() as cur:
+        has_remaining = "remaining" in _columns(cur, parent)
+        old = [(name, lower) for name, lower, upper in partitions(cur, t) if upper and upper <= cutoff]
+    for name, lower in old:
+        with conn.cursor() as cur:
+            summaries = downsample(cur, t, name, has_remaining)
+            cur.execute(f"ALTER TABLE {parent} DETACH PARTITION {name}")
+            note = "ayrıldı"
+            if mode == "file":
+                note = f"→ {archive_file(cur, t, name, lower)}"
+            if mode != "detach":
+                cur.execute(f"DROP TABLE {name}")
+        conn.commit()
+        retired += 1
+        print(f"   🗜️  {name}: {summaries} günlük özet, {note}")
+    return retired
+
+
+def maintain(conn, t: str) -> None:
+    with conn.cursor() as cur:
+        partitioned = is_partitioned(cur, t)
+    conn.rollback()
+    if not partitioned:
+        print(f"⏭️  {t}_price_history bölümlü değil (önce: partition --providers {t})")
+        return
+    created = ensure_partitions(conn, t)
+    retired = retire_old(conn, t)
+    print(f"✅ {t}: {created} yeni bölüm, {retired} bölüm özetlendi")
+
+
+def status(conn, t: str) -> None:
+    with conn.cursor() as cur:
+        if not is_partitioned(cur, t):
+            print(f"  {t}_price_history: bölümlü değil")
+            return
+        print(f"  {t}_price_history:")
+        for name, lower, _ in partitions(cur, t):
+            cur.execute(f"SELECT COUNT(*), pg_total_relation_size(%s) FROM {name}", (name,))
+            rows, size = cur.fetchone()
+            print(f"    {name:<40} {rows:>10} satır  {size / 1024 / 1024:8.1f} MB")
+    conn.rollback()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="price_history bölümleme ve bakım")
+    parser.add_argument("command", choices=("partition", "maintain", "status"))
+    parser.add_argument("--providers", nargs="*", choices=ALL_TABLES, default=None,
+                        help="Varsayılan: biletix hariç tümü (biletix ayrı veritabanında)")
+    parser.add_argument("--dsn", default=None, help="DATABASE_URL yerine bağlantı dizesi")
+    parser.add_argument("--drop-legacy", action="store_true",
+                        help="partition: kopyalamadan sonra eski tabloyu sil")
+    args = parser.parse_args()
+
+    tables = tuple(args.providers) if args.providers else DEFAULT_TABLES
+    conn = connect(args.dsn)
+    try:
+        for t in tables:
+            if args.command == "partition":
+                print(f"🧱 {t}_price_history bölümleniyor — {datetime.now():%H:%M:%S}")
+                if not partition_table(conn, t, args.drop_legacy):
+                    print("   ⏭️  zaten bölümlü")
+            elif args.command == "maintain":
+                maintain(conn, t)
+            else:
+                status(conn, t)
+    finally:
+        conn.close()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Artımlı keşif: liste uç noktasından gelen kayıtları bir önceki çalıştırmada
+görülenlerle karşılaştırır ve detay isteğini yalnızca gerektiğinde yapar.
+
+    * new      → ilk kez görülen kayıt: detay hemen çekilir
+    * changed  → liste düzeyindeki alanlar (parmak izi) değişmiş
+    * expired  → değişmemiş ama yenileme penceresi dolmuş
+    * (diğerleri atlanır)
+
+Durum STATE_DIR/discovery.sqlite3 içinde sağlayıcı bazında tutulur. Detay
+başarıyla işlendikten sonra `mark_fetched` çağrılmalıdır; hata alan kayıt
+bir sonraki çalıştırmada tekrar denenir. Toplu hedefte (STORAGE_SINK)
+`marker(sink)` kullanılır: işaret hedefin commit'ine kadar bekletilir, parti
+yazılamazsa kayıt indirildi sayılmaz (bkz. checkpoints.py).
+
+Sağlayıcı betiklerinde INCREMENTAL_DISCOVERY=1 ile açılır.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from local_state import connect_state
+
+DEFAULT_REFRESH = timedelta(hours=float(os.getenv("DISCOVERY_REFRESH_HOURS", "24")))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS listing_state (
+    provider          TEXT NOT NULL,
+    item_key          TEXT NOT NULL,
+    fingerprint       TEXT NOT NULL,
+    detail_fetched_at REAL NOT NULL,
+    refresh_after     REAL NOT NULL,
+    PRIMARY KEY (provider, item_key)
+)
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("INCREMENTAL_DISCOVERY", "0") == "1"
+
+
+def fingerprint(fields: Dict) -> str:
+    """Liste alanlarının sıralı JSON'undan kararlı bir özet."""
+    raw = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class DiscoveryState:
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.conn = connect_state("discovery")
+        self.conn.execute(SCHEMA_SQL)
+        self._known = {
+            row["item_key"]: (row["fingerprint"], row["refresh_after"])
+            for row in self.conn.execute(
+                "SELECT item_key, fingerprint, refresh_after FROM listing_state WHERE provider = ?",
+                (provider,),
+            )
+        }
+        self.counts = {"new": 0, "changed": 0, "expired": 0, "skipped": 0}
+        self._staged: List[Tuple[str, str, float, float]] = []
+
+    def classify(self, key, fields: Dict) -> Optional[str]:
+        """'new' | 'changed' | 'expired' ya da atlanacaksa None."""
+        known = self._known.get(str(key))
+        if known is None:
+            reason = "new"
+        elif known[0] != fingerprint(fields):
+            reason = "changed"
+        elif known[1] <= time.time():
+            reason = "expired"
+        else:
+            reason = None
+        self.counts[reason or "skipped"] += 1
+        return reason
+
+    def select(self, items: Iterable[Tuple[object, Dict]]) -> Iterator[Tuple[object, Dict, str]]:
+        """(key, fields) çiftlerinden detay gerektirenleri nedeniyle birlikte üretir."""
+        for key, fields in items:
+            reason = self.classify(key, fields)
+            if reason:
+                yield key, fields, reason
+
+    def _row(self, key, fields: Dict, refresh: Optional[timedelta]) -> Tuple[str, str, float, float]:
+        now = time.time()
+        refresh_after = now + (DEFAULT_REFRESH if refresh is None else refresh).total_seconds()
+        return str(key), fingerprint(fields), now, refresh_after
+
+    def mark_fetched(self, key, fields: Dict, refresh: Optional[timedelta] = None) -> None:
+        """Detay işlendi: parmak izini ve bir sonraki yenileme zamanını kaydet."""
+        self._persist([self._row(key, fields, refresh)])
+
+    def stage(self, key, fields: Dict, refresh: Optional[timedelta] = None) -> None:
+        """Toplu hedefin bir sonraki commit'inde işlendi sayılacak kayıt."""
+        self._staged.append(self._row(key, fields, refresh))
+
+    def commit_staged(self) -> None:
+        staged, self._staged = self._staged, []
+        self._persist(staged)
+
+    def marker(self, sink=None) -> Callable[..., None]:
+        """
+        Kaydın etkinliği yazıldıktan sonra çağrılacak fonksiyon; toplu hedefte
+        işaret hedefin commit'ine kadar bekletilir (bkz. checkpoints.py).
+        """
+        if sink is None:
+            return self.mark_fetched
+        sink.commit_hooks.append(self.commit_staged)
+        return self.stage
+
+    def _persist(self, rows: List[Tuple[str, str, float, float]]) -> None:
+        if not rows:
+            return
+        self.conn.executemany(
+            """
+            INSERT INTO listing_state (provider, item_key, fingerprint, detail_fetched_at, refresh_after)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (provider, item_key) DO UPDATE
+            SET fingerprint = excluded.fingerprint,
+                detail_fetched_at = excluded.detail_fetched_at,
+                refresh_after = excluded.refresh_after
+            """,
+            [(self.provider, key, fp, now, refresh_after) for key, fp, now, refresh_after in rows],
+        )
+        for key, fp, _, refresh_after in rows:
+            self._known[key] = (fp, refresh_after)
+
+    def summary(self) -> str:
+        c = self.counts
+        return (f"{self.provider}: {c['new']} yeni, {c['changed']} değişmiş, "
+                f"{c['expired']} süresi dolmuş, {c['skipped']} atlandı")
+
+    def close(self) -> None:
+        self.conn.close()
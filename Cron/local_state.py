@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Betiklerin çalıştırmalar arasında tuttuğu yerel durum (kuyruk, önbellek vb.)
+için ortak SQLite yardımcıları. Harici bir servis gerektirmez; dosyalar
+STATE_DIR (varsayılan: depo kökünde .state/) altında tutulur.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+STATE_DIR = Path(os.getenv("STATE_DIR", Path(__file__).resolve().parent.parent / ".state"))
+
+
+def state_path(name: str) -> Path:
+    """STATE_DIR altında verilen isimle bir dosya yolu döndürür (klasörü oluşturur)."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    return STATE_DIR / name
+
+
+def connect_state(name: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    STATE_DIR/<name>.sqlite3 dosyasına bağlanır.
+    * WAL modu: aynı makinedeki birden çok süreç okurken yazabilsin.
+    * isolation_level=None: işlemleri (BEGIN/COMMIT) çağıran taraf yönetir.
+    * check_same_thread=False: bağlantıyı kendi kilidiyle koruyan çağıranlar için.
+    """
+    conn = sqlite3.connect(state_path(f"{name}.sqlite3"), timeout=30, isolation_level=None,
+                           check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcı tabloları için şema göçleri (migrations).
+
+Betikler etkinliği name + venue + date ile bulur ve fiyatları
+`event_id = ... AND is_active = TRUE` ile okur; bu sorguların dayandığı
+indeksler ve tekillik kısıtları burada tanımlanır:
+
+    * <t>_events (name, venue, date)            → UNIQUE (doğal anahtar)
+    * <t>_prices (event_id, category) WHERE is_active  → kısmi indeks
+    * <t>_price_history (event_id, change_date) → planlayıcı / okuma API'si
+    * <t>_events (last_seen), <t>_prices (last_seen, event_id)
+                                                → okuma API'sinin artımlı tazelemesi
+
+Veri göçü: bubilet_price_history'deki "UPDATED" satırları Bubilet'in
+tek yazımı olan "UPTADED"e çevrilir.
+
+Doğal anahtar tekil olduğundan betikler SELECT-sonra-INSERT yerine tek
+ifadelik `INSERT ... ON CONFLICT (name, venue, date) DO UPDATE ... RETURNING id`
+kullanır; aynı etkinliği işleyen iki işçi yarışmaz.
+
+Tekil indeksten önce mevcut kopyalar birleştirilir: en küçük id kalır,
+fiyat/history satırları ona taşınır, aynı kategoride birden çok aktif
+fiyat kalırsa en son görüleni aktif bırakılır.
+
+Her göç bir kez uygulanır ve schema_migrations tablosuna kaydedilir.
+İndeksler CONCURRENTLY oluşturulur (yazmalar kilitlenmez).
+
+Kullanım:
+    python Cron/migrations.py                      # DATABASE_URL'e uygula
+    python Cron/migrations.py --status
+    python Cron/migrations.py --providers biletix --dsn postgresql://localhost/Eventist
+"""
+
+from typing import Dict, List, Optional
+
+NATURAL_KEY_TABLES = ("bugece", "passo", "biletinial", "biletix")
+ALL_TABLES = ("bubilet",) + NATURAL_KEY_TABLES
+# biletix ayrı veritabanında (pg8000 bağlantısı); varsayılan olarak dahil değil,
+# biletix-muzik.py göçlerini her çalıştırmadan önce kendisi uygular (ensure_schema)
+DEFAULT_TABLES = tuple(t for t in ALL_TABLES if t != "biletix")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    id         TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+# --------------------------------------------------------------------------- #
+# 1. Göç tanımları
+# --------------------------------------------------------------------------- #
+#   id            : tekil ad (<tablo>_<sıra>_<açıklama>)
+#   transactional : False → CONCURRENTLY için autocommit
+#   index         : CONCURRENTLY yarıda kalırsa geçersiz (INVALID) indeks silinip yeniden kurulur
+#   unpartitioned : bu tablo bölümlenmişse (history_maintenance.py partition) göç atlanır;
+#                   CONCURRENTLY bölümlenmiş tabloda çalışmaz, bölümleme aynı indeksi kurar
+#   sql           : sırayla çalıştırılan ifadeler
+def _dedupe_events(t: str) -> List[str]:
+    return [
+        f"""
+        CREATE TEMP TABLE _dupes ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY name, venue, date) AS keep_id
+            FROM {t}_events
+            WHERE name IS NOT NULL AND venue IS NOT NULL AND date IS NOT NULL
+        ) ranked
+        WHERE id <> keep_id
+        """,
+        f"UPDATE {t}_prices p SET event_id = d.keep_id FROM _dupes d WHERE p.event_id = d.id",
+        f"UPDATE {t}_price_history h SET event_id = d.keep_id FROM _dupes d WHERE h.event_id = d.id",
+        f"""
+        UPDATE {t}_events e SET last_seen = GREATEST(e.last_seen, x.last_seen)
+        FROM (SELECT d.keep_id, MAX(o.last_seen) AS last_seen
+              FROM _dupes d JOIN {t}_events o ON o.id = d.id GROUP BY d.keep_id) x
+        WHERE e.id = x.keep_id
+        """,
+        f"DELETE FROM {t}_events e USING _dupes d WHERE e.id = d.id",
+        f"""
+        UPDATE {t}_prices p SET is_active = FALSE
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY event_id, category
+                                          ORDER BY last_seen DESC NULLS LAST, id DESC) AS rn
+            FROM {t}_prices
+            WHERE is_active = TRUE
+        ) r
+        WHERE p.id = r.id AND r.rn > 1
+        """,
+    ]
+
+
+def build_migrations(tables=ALL_TABLES) -> List[Dict]:
+    migrations = []
+    for t in tables:
+        if t in NATURAL_KEY_TABLES:
+            migrations += [
+                {"id": f"{t}_0001_dedupe_events", "table": t, "transactional": True,
+                 "sql": _dedupe_events(t)},
+                {"id": f"{t}_0002_events_natural_key", "table": t, "transactional": False,
+                 "index": f"{t}_events_natural_key",
+                 "sql": [f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {t}_events_natural_key "
+                         f"ON {t}_events (name, venue, date)"]},
+                {"id": f"{t}_0003_prices_active", "table": t, "transactional": False,
+                 "index": f"{t}_prices_active_idx",
+                 "sql": [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {t}_prices_active_idx "
+                         f"ON {t}_prices (event_id, category) WHERE is_active"]},
+            ]
+        migrations.append(
+            {"id": f"{t}_0004_history_event_date", "table": t, "transactional": False,
+             "index": f"{t}_price_history_event_date_idx",
+             "unpartitioned": f"{t}_price_history",
+             "sql": [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {t}_price_history_event_date_idx "
+                     f"ON {t}_price_history (event_id, change_date)"]}
+        )
+        migrations += [
+            {"id": f"{t}_0005_events_last_seen", "table": t, "transactional": False,
+             "index": f"{t}_events_last_seen_idx",
+             "sql": [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {t}_events_last_seen_idx "
+                     f"ON {t}_events (last_seen)"]},
+            {"id": f"{t}_0006_prices_last_seen", "table": t, "transactional": False,
+             "index": f"{t}_prices_last_seen_idx",
+             "sql": [f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {t}_prices_last_seen_idx "
+                     f"ON {t}_prices (last_seen, event_id)"]},
+        ]
+        if t == "bubilet":
+            # Bubilet history tek yazım kullanır: "UPTADED" (bkz. storage_sinks.PROVIDERS);
+            # sink / backfill yollarının daha önce yazdığı "UPDATED" satırları hizalanır
+            migrations.append(
+                {"id": "bubilet_0007_history_legacy_updated", "table": t, "transactional": True,
+                 "sql": ["UPDATE bubilet_price_history SET change_type = 'UPTADED' "
+                         "WHERE change_type = 'UPDATED'"]}
+            )
+    return migrations
+
+
+# --------------------------------------------------------------------------- #
+# 2. Uygulayıcı
+# --------------------------------------------------------------------------- #
+def applied_ids(conn) -> set:
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+        cur.execute("SELECT id FROM schema_migrations")
+        ids = {row[0] for row in cur.fetchall()}
+    conn.commit()
+    return ids
+
+
+def _drop_invalid_index(cur, name: str) -> None:
+    cur.execute(
+        """
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND NOT i.indisvalid
+        """,
+        (name,),
+    )
+    if cur.fetchone():
+        print(f"   ↺ yarım kalmış indeks siliniyor: {name}")
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def _partitioned(conn, table: str) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+            """,
+            (table,),
+        )
+        found = cur.fetchone() is not None
+    conn.commit()
+    return found
+
+
+def apply_migration(conn, migration: Dict) -> None:
+    table = migration.get("unpartitioned")
+    if table and _partitioned(conn, table):
+        print(f"   ↷ {table} bölümlenmiş; atlandı (indeks bölümlemeyle kuruldu)")
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO schema_migrations (id) VALUES (%s)", (migration["id"],))
+        conn.commit()
+        return
+
+    if migration["transactional"]:
+        with conn.cursor() as cur:
+            for sql in migration["sql"]:
+                cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (id) VALUES (%s)", (migration["id"],))
+        conn.commit()
+        return
+
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            if migration.get("index"):
+                _drop_invalid_index(cur, migration["index"])
+            for sql in migration["sql"]:
+                cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (id) VALUES (%s)", (migration["id"],))
+    finally:
+        conn.autocommit = False
+
+
+def migrate(conn, tables=ALL_TABLES) -> int:
+    """Uygulanmamış göçleri sırayla uygular; uygulanan sayısını döner."""
+    done = applied_ids(conn)
+    count = 0
+    for migration in build_migrations(tables):
+        if migration["id"] in done:
+            continue
+        print(f"🛠️  {migration['id']}")
+        apply_migration(conn, migration)
+        count += 1
+    return count
+
+
+def status(conn, tables=ALL_TABLES) -> None:
+    done = applied_ids(conn)
+    for migration in build_migrations(tables):
+        print(f"  {'✅' if migration['id'] in done else '⏳'} {migration['id']}")
+
+
+def connect(dsn: Optional[str] = None):
+    if dsn:
+        import psycopg2
+
+        return psycopg2.connect(dsn)
+    from db import connect_db
+
+    return connect_db()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sağlayıcı tabloları için şema göçleri")
+    parser.add_argument("--providers", nargs="*", choices=ALL_TABLES, default=None,
+                        help="Varsayılan: biletix hariç tümü (biletix ayrı veritabanında)")
+    parser.add_argument("--dsn", default=None, help="DATABASE_URL yerine bağlantı dizesi")
+    parser.add_argument("--status", action="store_true", help="Yalnızca durumu göster")
+    args = parser.parse_args()
+
+    tables = tuple(args.providers) if args.providers else DEFAULT_TABLES
+    conn = connect(args.dsn)
+    try:
+        if args.status:
+            status(conn, tables)
+        else:
+            applied = migrate(conn, tables)
+            print(f"✅ {applied} göç uygulandı." if applied else "✅ Şema güncel.")
+    finally:
+        conn.close()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML ayrıştırmayı ağ G/Ç'sinden ayıran süreç havuzu.
+
+BeautifulSoup ayrıştırması CPU'ya bağlıdır ve GIL yüzünden indirme yapan
+iş parçacıklarıyla aynı çekirdeği paylaşır. ParsePool bu işi ayrı
+süreçlere taşır:
+
+    indirme (iş parçacıkları) ──ham bayt──▶ ParsePool (süreçler) ──normalize dict──▶ yazma
+
+    * Ayrıştırıcı fonksiyon hafif bir modülde, üst düzeyde tanımlı olmalıdır
+      (biletinial_parse.parse_detail_page, biletix_price_info.parse_performance_page);
+      süreçler yalnızca o modülü içe aktarır.
+    * Girdi ham bayt, çıktı küçük normalize dict listesidir; soup nesneleri
+      süreç sınırını geçmez.
+    * PARSE_WORKERS (varsayılan: çekirdek sayısı). 1 → havuz açılmaz,
+      ayrıştırma çağıranın iş parçacığında yapılır.
+
+Linux'ta süreçler fork ile açılır; bu yüzden havuz, indirme iş parçacıkları
+başlamadan önce oluşturulur ve `warm()` ile tüm süreçler hemen başlatılır.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+def _noop() -> None:
+    return None
+
+
+class ParsePool:
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or PARSE_WORKERS)
+        self._executor = None
+        if self.workers > 1:
+            method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(method),
+            )
+            self.warm()
+
+    def warm(self) -> None:
+        """Süreçleri şimdi başlatır (fork, diğer iş parçacıklarından önce olsun)."""
+        if self._executor:
+            for future in [self._executor.submit(_noop) for _ in range(self.workers)]:
+                future.result()
+
+    def submit(self, func: Callable, raw) -> Future:
+        if self._executor is None:
+            future: Future = Future()
+            try:
+                future.set_result(func(raw))
+            except Exception as exc:
+                future.set_exception(exc)
+            return future
+        return self._executor.submit(func, raw)
+
+    def parse(self, func: Callable, raw):
+        """Tek sayfayı ayrıştırır ve sonucu bekler (çağıran iş parçacığı bloklanır)."""
+        return self.submit(func, raw).result()
+
+    def map(self, func: Callable, items: Iterable, chunksize: int = 1) -> Iterator:
+        if self._executor is None:
+            return map(func, items)
+        return self._executor.map(func, items, chunksize=chunksize)
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,21 +1,23 @@
 import os
 import re
 
-import openpyxl
-import psycopg2
 import requests
 from dotenv import load_dotenv
-from openpyxl import Workbook
 
 from datetime import datetime
 from psycopg2.extras import RealDictCursor
 
+import change_feed
+from db import connection, release
+from incremental_discovery import DiscoveryState, enabled as discovery_enabled
+from storage_sinks import configured as sink_configured, diff_prices, open_sink
+
 load_dotenv()  # .env içinden DATABASE_URL al
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 def connect_db():
-    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan."""
-    return psycopg2.connect(DATABASE_URL, sslmode="require")
+    """Supabase TLS gerektirdiği için sslmode='require' parametresi ile bağlan (daemon'da sıcak bağlantı)."""
+    return connection()
 
 
 def upsert_event_with_history(event: dict) -> None:
@@ -32,186 +34,93 @@ def upsert_event_with_history(event: dict) -> None:
     with connect_db() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
 
         # ---- 3.1 Etkinlik upsert (promoter + artist ile) --------------------------
+        # (name, venue, date) tekil indeksi: bkz. Cron/migrations.py
         cur.execute(
             """
-            SELECT id
-            FROM passo_events
-            WHERE name = %(name)s
-              AND venue = %(venue)s
-              AND date = %(date)s
+            INSERT INTO passo_events
+                (provider, name, description, venue, date, genre, promoter, artist, created_at, last_seen)
+            VALUES
+                (%(provider)s, %(name)s, %(description)s, %(venue)s, %(date)s,
+                 %(genre)s, %(promoter)s, %(artist)s, %(now)s, %(now)s)
+            ON CONFLICT (name, venue, date) DO UPDATE
+            SET provider    = EXCLUDED.provider,
+                description = EXCLUDED.description,
+                genre       = EXCLUDED.genre,
+                promoter    = EXCLUDED.promoter,
+                artist      = EXCLUDED.artist,
+                last_seen   = EXCLUDED.last_seen
+            RETURNING id
             """,
             {
+                "provider": event["provider"],
                 "name": event["name"],
+                "description": event["description"],
                 "venue": event["venue"],
-                "date": event["date"]
+                "date": event["date"],
+                "genre": event["genre"],
+                "promoter": event.get("promoter"),
+                "artist": event.get("artist"),
+                "now": now
             }
         )
-        row = cur.fetchone()
-
-        if row:
-            # Mevcut etkinlik → UPDATE
-            event_id = row["id"]
-            cur.execute(
-                """
-                UPDATE passo_events
-                SET provider    = %(provider)s,
-                    description = %(description)s,
-                    genre       = %(genre)s,
-                    promoter    = %(promoter)s,
-                    artist      = %(artist)s,
-                    last_seen   = %(now)s
-                WHERE id = %(id)s
-                """,
-                {
-                    "provider": event["provider"],
-                    "description": event["description"],
-                    "genre": event["genre"],
-                    "promoter": event.get("promoter"),
-                    "artist": event.get("artist"),
-                    "now": now,
-                    "id": event_id
-                }
-            )
-        else:
-            # Yeni etkinlik → INSERT
-            cur.execute(
-                """
-                INSERT INTO passo_events
-                    (provider, name, description, venue, date, genre, promoter, artist, created_at, last_seen)
-                VALUES
-                    (%(provider)s, %(name)s, %(description)s, %(venue)s, %(date)s,
-                     %(genre)s, %(promoter)s, %(artist)s, %(now)s, %(now)s)
-                RETURNING id
-                """,
-                {
-                    "provider": event["provider"],
-                    "name": event["name"],
-                    "description": event["description"],
-                    "venue": event["venue"],
-                    "date": event["date"],
-                    "genre": event["genre"],
-                    "promoter": event.get("promoter"),
-                    "artist": event.get("artist"),
-                    "now": now
-                }
-            )
-            event_id = cur.fetchone()["id"]
-
-        # ---- 3.2 Aktif fiyatları çek ------------------------------------------------
+        event_id = cur.fetchone()["id"]
+
+        # ---- 3.2 Aktif fiyatları çek ve karşılaştır --------------------------------
+        # Sütunlu görüntü üzerinden (bkz. price_snapshot.py); fiyatlar kuruş
+        # cinsinden karşılaştırılır, satır dict'i yalnızca değişenler için üretilir
         cur.execute(
             """
             SELECT id, category, price, sold_out
             FROM passo_prices
-            WHERE event_id = %(eid)s
-              AND is_active = TRUE
+            WHERE event_id = %(eid)s AND is_active = TRUE
             """,
             {"eid": event_id}
         )
-        existing = {r["category"]: r for r in cur.fetchall()}
-        seen_categories = set()
-
-        # ---- 3.3 Yeni gelen listeyi işle -------------------------------------------
-        for p in event["price_list"]:
-            cat, price_val, sold_out = p["category"], p["price"], p["sold_out"]
-            seen_categories.add(cat)
-
-            if cat in existing:
-                prev = existing[cat]
-                if (prev["price"], prev["sold_out"]) != (price_val, sold_out):
-                    # Fiyat veya sold_out değişmiş → history ekle + güncelle
-                    cur.execute(
-                        """
-                        INSERT INTO passo_price_history
-                            (event_id, category, price, sold_out, change_date, change_type)
-                        VALUES
-                            (%(eid)s, %(cat)s, %(old_price)s, %(old_so)s, %(now)s, 'UPDATED')
-                        """,
-                        {
-                            "eid": event_id,
-                            "cat": cat,
-                            "old_price": prev["price"],
-                            "old_so": prev["sold_out"],
-                            "now": now
-                        }
-                    )
-                    cur.execute(
-                        """
-                        UPDATE passo_prices
-                        SET price      = %(price)s,
-                            sold_out   = %(sold_out)s,
-                            last_seen  = %(now)s
-                        WHERE id = %(id)s
-                        """,
-                        {
-                            "price": price_val,
-                            "sold_out": sold_out,
-                            "now": now,
-                            "id": prev["id"]
-                        }
-                    )
-            else:
-                # Yeni kategori → passo_prices ve history'ye ekle
-                cur.execute(
-                    """
-                    INSERT INTO passo_prices
-                        (event_id, category, price, sold_out, created_at, last_seen, is_active)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, %(now)s, TRUE)
-                    RETURNING id
-                    """,
-                    {
-                        "eid": event_id,
-                        "cat": cat,
-                        "price": price_val,
-                        "sold_out": sold_out,
-                        "now": now
-                    }
-                )
-                cur.execute(
-                    """
-                    INSERT INTO passo_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'ADDED')
-                    """,
-                    {
-                        "eid": event_id,
-                        "cat": cat,
-                        "price": price_val,
-                        "sold_out": sold_out,
-                        "now": now
-                    }
-                )
-
-        # ---- 3.4 Artık listede olmayan kategorileri pasifleştir ---------------------
-        for cat, rec in existing.items():
-            if cat not in seen_categories:
-                cur.execute(
-                    """
-                    UPDATE passo_prices
-                    SET is_active = FALSE,
-                        last_seen = %(now)s
-                    WHERE id = %(id)s
-                    """,
-                    {"now": now, "id": rec["id"]}
-                )
-                cur.execute(
-                    """
-                    INSERT INTO passo_price_history
-                        (event_id, category, price, sold_out, change_date, change_type)
-                    VALUES
-                        (%(eid)s, %(cat)s, %(price)s, %(sold_out)s, %(now)s, 'REMOVED')
-                    """,
-                    {
-                        "eid": event_id,
-                        "cat": cat,
-                        "price": rec["price"],
-                        "sold_out": rec["sold_out"],
-                        "now": now
-                    }
-                )
+        diff = diff_prices("passo", event_id, ((r["id"], r["category"], r["price"], r["sold_out"]) for r in cur),
+                           event["price_list"])
+
+        # ---- 3.3 Değişenleri güncelle, yenileri ekle, eksikleri pasifleştir -----------
+        cur.executemany(
+            """
+            UPDATE passo_prices
+            SET price = %s, sold_out = %s, last_seen = %s
+            WHERE id = %s
+            """,
+            [(row["price"], row["sold_out"], now, row["_row"]) for row in diff["update"]]
+        )
+        cur.executemany(
+            """
+            INSERT INTO passo_prices
+                (event_id, category, price, sold_out, created_at, last_seen, is_active)
+            VALUES
+                (%s, %s, %s, %s, %s, %s, TRUE)
+            """,
+            [(event_id, row["category"], row["price"], row["sold_out"], now, now) for row in diff["insert"]]
+        )
+        cur.executemany(
+            """
+            UPDATE passo_prices
+            SET is_active = FALSE, last_seen = %s
+            WHERE id = %s
+            """,
+            [(now, row_id) for row_id in diff["deactivate"]]
+        )
+
+        # ---- 3.4 History: ADDED / UPDATED (eski değerler) / REMOVED --------------
+        cur.executemany(
+            """
+            INSERT INTO passo_price_history
+                (event_id, category, price, sold_out, change_date, change_type)
+            VALUES
+                (%s, %s, %s, %s, %s, %s)
+            """,
+            [(event_id, h["category"], h["price"], h["sold_out"], now, h["change_type"]) for h in diff["history"]]
+        )
+        changes = change_feed.from_sink_history("passo", diff["history"], {event_id: event}, now)
+        change_feed.notify(cur, changes)            # commit'te teslim edilir
 
     # Bağlam yöneticisi commit/rollback işlemlerini otomatik yapar.
+    change_feed.publish(changes)
     print(f"[{now:%Y-%m-%d %H:%M:%S}] «{event['name']}» işlendi.")
 
 
@@ -236,90 +145,193 @@ categories_and_ids = {
     "other": 12615,
 }
 
-all_events = []
-start = 0
-size = 100  # Adjust based on API limits
 
-payload = {"GenreId": "8615", "LanguageId": 618, "from": 0, "size": 1000}
-response = session.post(url, headers=headers, json=payload)
+def fetch_event_list():
+    """allevents listesini döndürür; HTTP hatasında boş liste."""
+    payload = {"GenreId": "8615", "LanguageId": 618, "from": 0, "size": 1000}
+    response = session.post(url, headers=headers, json=payload)
 
-print(response)
+    print(response)
 
-if response.status_code == 200:
-    doc = response.json()
-    events = doc.get("valueList", [])
-    print(f"Found {len(events)} events")
+    if response.status_code != 200:
+        return []
+    return response.json().get("valueList", [])
 
-    for event in events:
-        try:
-            seo_url = event["seoUrl"]
-            event_id = event["id"]
 
-            event_details_url = f"https://ticketingweb.passo.com.tr/api/passoweb/geteventdetails/{seo_url}/{event_id}/618"
+def fetch_event_details(event):
+    """Etkinlik detayının `value` gövdesi; alınamazsa None."""
+    seo_url = event["seoUrl"]
+    event_id = event["id"]
 
-            # Etkinlik detaylarını alıyoruz
-            event_detail_response = session.get(event_details_url, headers=headers)
+    event_details_url = f"https://ticketingweb.passo.com.tr/api/passoweb/geteventdetails/{seo_url}/{event_id}/618"
 
-            if event_detail_response.status_code != 200:
-                print(f"Failed to get details for event {event_id}. Status code: {event_detail_response.status_code}")
-                continue
-
-            if not event_detail_response.content:
-                print(f"Empty response for event {event_id}")
-                continue
-
-            try:
-                event_detail_json = event_detail_response.json()
-            except requests.exceptions.JSONDecodeError:
-                print(
-                    f"Non-JSON response received for event {event_id}. Content: {event_detail_response.text[:100]}..."
-                )
-                continue
+    # Etkinlik detaylarını alıyoruz
+    event_detail_response = session.get(event_details_url, headers=headers)
 
-            value = event_detail_json.get("value", {})
+    if event_detail_response.status_code != 200:
+        print(f"Failed to get details for event {event_id}. Status code: {event_detail_response.status_code}")
+        return None
 
-            # 1) organizerName
-            organizer_name = value.get("organizerName", None)
-            # 2) detail içindeki name → artist olarak kaydedilecek
-            artist_name = value.get("name", None)
+    if not event_detail_response.content:
+        print(f"Empty response for event {event_id}")
+        return None
 
-            artist_list = [artist_name] if artist_name else None
-
-            genre = value.get("genreName", None)
-            sub_category = value.get("subGenreName", None)
-            price_list_raw = value.get("categories", [])
+    try:
+        event_detail_json = event_detail_response.json()
+    except requests.exceptions.JSONDecodeError:
+        print(
+            f"Non-JSON response received for event {event_id}. Content: {event_detail_response.text[:100]}..."
+        )
+        return None
+
+    return event_detail_json.get("value", {})
+
+
+def build_event(event, value):
+    # 1) organizerName
+    organizer_name = value.get("organizerName", None)
+    # 2) detail içindeki name → artist olarak kaydedilecek
+    artist_name = value.get("name", None)
+
+    artist_list = [artist_name] if artist_name else None
+
+    genre = value.get("genreName", None)
+    sub_category = value.get("subGenreName", None)
+    price_list_raw = value.get("categories", [])
+
+    all_tickets = []
+    for ticket in price_list_raw:
+        name = ticket.get("name", "")
+        price = ticket.get("price", 0)
+
+        sold_out = "TÜKENDİ" in name.upper()
+        clean_name = re.sub(r"[\s\-\(\[]*TÜKENDİ[\s\-\)\]]*", "", name, flags=re.IGNORECASE).strip()
+
+        all_tickets.append({
+            "category": clean_name,
+            "price": price,
+            "sold_out": sold_out
+        })
+
+    return {
+        "provider": "Passo",
+        "name": event["name"],
+        "description": event["seoDescription"],
+        "venue": event["venueName"],
+        "date": event["date"],
+        "genre": sub_category,
+        "promoter": organizer_name,    # Eski hali: organizerName → promoter
+        "artist": artist_list,         # Yeni eklenen satır: detail içindeki name → artist
+        "price_list": all_tickets
+    }
+
+
+# --------------------------------------------------------------------------- #
+# İş kuyruğu: üretici / işçi
+# --------------------------------------------------------------------------- #
+QUEUE_NAME = "passo_event"
+
+
+def produce(events):
+    """Her etkinliğin liste kaydını kuyruğa koyar; işçiler (--mode work) detayları paylaşır."""
+    from work_queue import open_queue
+
+    queue = open_queue(QUEUE_NAME)
+    added = queue.enqueue((str(event["id"]), event) for event in events if event.get("id"))
+    print(f"📥 {added} etkinlik kuyruğa eklendi → {queue.stats()}")
+    queue.close()
+
+
+def work():
+    """Kuyruktaki etkinlikleri kiralayıp detaylarını işler; kuyruk boşalınca çıkar."""
+    from work_queue import open_queue, run_worker
+
+    sink = open_sink("passo") if sink_configured() else None
+    write = sink.write if sink else upsert_event_with_history
+
+    def handle(_event_id, event):
+        value = fetch_event_details(event)
+        if value is None:
+            # Kiralama bırakılır, etkinlik sonra tekrar denenir (ack edilmez)
+            raise RuntimeError("etkinlik detayı alınamadı")
+        write(build_event(event, value))
+
+    queue = open_queue(QUEUE_NAME)
+    try:
+        processed = run_worker(queue, handle)
+    finally:
+        if sink:
+            sink.close()
+    print(f"✅ {processed} etkinlik işlendi → {queue.stats()}")
+    queue.close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Passo → Supabase")
+    parser.add_argument(
+        "--mode", choices=["all", "produce", "work"], default="all",
+        help="all: tek süreç (varsayılan) | produce: etkinlikleri kuyruğa koy | work: kuyruktan işle",
+    )
+    args = parser.parse_args(argv)
+
+    if args.mode == "produce":
+        produce(fetch_event_list())
+        return
+    if args.mode == "work":
+        work()
+        return
+
+    events = fetch_event_list()
+    print(f"Found {len(events)} events")
 
-            all_tickets = []
-            for ticket in price_list_raw:
-                name = ticket.get("name", "")
-                price = ticket.get("price", 0)
+    # Artımlı keşif: liste kaydı değişmeyen etkinliklerin detayı atlanır
+    discovery = DiscoveryState("passo") if discovery_enabled() else None
+    windows = {}
+    if discovery:
+        from adaptive_scheduler import natural_key, refresh_windows
+        conn = connect_db()
+        try:
+            windows = refresh_windows(conn, "passo", key="natural")
+        finally:
+            release(conn)            # daemon dışında bağlantı kapanır (bkz. db.py)
 
-                sold_out = "TÜKENDİ" in name.upper()
-                clean_name = re.sub(r"[\s\-\(\[]*TÜKENDİ[\s\-\)\]]*", "", name, flags=re.IGNORECASE).strip()
+    # STORAGE_SINK ayarlıysa etkinlikler toplu hedefe yazılır
+    sink = open_sink("passo") if sink_configured() else None
+    write = sink.write if sink else upsert_event_with_history
+    mark_fetched = discovery.marker(sink) if discovery else None
 
-                all_tickets.append({
-                    "category": clean_name,
-                    "price": price,
-                    "sold_out": sold_out
-                })
+    processed = 0
+    for event in events:
+        try:
+            if discovery and not discovery.classify(event["id"], event):
+                continue
 
-            current_event = {
-                "provider": "Passo",
-                "name": event["name"],
-                "description": event["seoDescription"],
-                "venue": event["venueName"],
-                "date": event["date"],
-                "genre": sub_category,
-                "promoter": organizer_name,    # Eski hali: organizerName → promoter
-                "artist": artist_list,         # Yeni eklenen satır: detail içindeki name → artist
-                "price_list": all_tickets
-            }
+            value = fetch_event_details(event)
+            if value is None:
+                continue
 
-            upsert_event_with_history(current_event)
+            current_event = build_event(event, value)
+            write(current_event)
             print(current_event)
+            processed += 1
+
+            if discovery:
+                window = windows.get(natural_key(event["name"], event["venueName"], event["date"]))
+                mark_fetched(event["id"], event, window)
 
         except Exception as e:
             print(f"Error processing event: {str(e)}")
             continue
 
-print(f"Total events processed: {len(all_events)}")
+    if sink:
+        sink.close()
+    if discovery:
+        print(discovery.summary())
+        discovery.close()
+    print(f"Total events processed: {processed}")
+
+
+if __name__ == "__main__":
+    main()
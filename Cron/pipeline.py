@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sınırlı kuyruklarla bağlı, eşzamanlı aşamalardan oluşan akış hattı.
+
+    kaynak ──q0──▶ aşama 1 (N iş parçacığı) ──q1──▶ aşama 2 ──q2──▶ hedef
+
+    * Her kuyruk `maxsize` ile sınırlıdır: yazma yavaşlarsa ayrıştırma,
+      ayrıştırma yavaşlarsa indirme bekler (backpressure). Bellek kullanımı
+      katalog boyutundan bağımsız kalır.
+    * Ağ ve veritabanı gecikmeleri üst üste biner; indirme sürerken önceki
+      sayfalar ayrıştırılır ve yazılır.
+    * Hedef (`sink`) çağıranın iş parçacığında çalışır; böylece tek bir DB
+      bağlantısı iş parçacıkları arasında paylaşılmaz.
+
+Aşama fonksiyonunun bir öğede attığı hata yazdırılır ve sayılır, akış durmaz.
+Kaynak ya da hedef hata atarsa tüm aşamalar durdurulur ve hata çağırana
+iletilir.
+
+Örnek:
+    stats = run_pipeline(
+        links,
+        [Stage("fetch", fetch_page, workers=2, many=False),
+         Stage("parse", parse_page)],
+        write,
+    )
+"""
+
+import os
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List
+
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+
+_DONE = object()
+_POLL = 0.2     # durdurma bayrağını kontrol etme aralığı (sn)
+
+
+class Stage:
+    """
+    name    → günlük ve istatistik adı
+    func    → öğe başına çağrılır
+    workers → aşamadaki iş parçacığı sayısı
+    many    → True: func bir yinelenebilir döner, her eleman ayrı çıkış olur
+              False: func tek bir çıkış döner (None → atlanır)
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, many: bool = True):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.many = many
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _label(item) -> str:
+    text = item if isinstance(item, str) else repr(item)
+    return text if len(text) <= 80 else text[:77] + "..."
+
+
+def run_pipeline(source: Iterable, stages: List[Stage], sink: Callable,
+                 maxsize: int = QUEUE_SIZE) -> Dict[str, Dict[str, int]]:
+    """
+    Hattı çalıştırır ve bitince aşama başına {"in", "out", "errors"} sayılarını
+    döner ("source" ve "sink" dahil).
+    """
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+    consumers = [s.workers for s in stages] + [1]
+    stop = threading.Event()
+    failure: List[BaseException] = []
+    lock = threading.Lock()
+
+    stats = {"source": {"in": 0, "out": 0, "errors": 0}}
+    stats.update({s.name: {"in": 0, "out": 0, "errors": 0} for s in stages})
+    stats["sink"] = {"in": 0, "out": 0, "errors": 0}
+
+    def count(name: str, field: str) -> None:
+        with lock:
+            stats[name][field] += 1
+
+    def feed() -> None:
+        try:
+            for item in source:
+                count("source", "out")
+                if not _put(queues[0], item, stop):
+                    return
+        except BaseException as exc:   # kaynak hatası tüm hattı durdurur
+            failure.append(exc)
+            stop.set()
+            return
+        for _ in range(consumers[0]):
+            _put(queues[0], _DONE, stop)
+
+    finished = [0] * len(stages)
+
+    def work(index: int) -> None:
+        stage = stages[index]
+        inbox, outbox = queues[index], queues[index + 1]
+        while True:
+            item = _get(inbox, stop)
+            if item is _DONE:
+                break
+            count(stage.name, "in")
+            try:
+                result = stage.func(item)
+                outputs = (result or ()) if stage.many else (() if result is None else (result,))
+                for out in outputs:
+                    count(stage.name, "out")
+                    if not _put(outbox, out, stop):
+                        return
+            except Exception as exc:
+                count(stage.name, "errors")
+                print(f"⚠️  [{stage.name}] {_label(item)} — {exc}")
+        with lock:
+            finished[index] += 1
+            last = finished[index] == stage.workers
+        if last:
+            for _ in range(consumers[index + 1]):
+                _put(outbox, _DONE, stop)
+
+    threads = [threading.Thread(target=feed, name="pipeline-source", daemon=True)]
+    for i, stage in enumerate(stages):
+        threads += [
+            threading.Thread(target=work, args=(i,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        ]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = _get(queues[-1], stop)
+            if item is _DONE:
+                break
+            stats["sink"]["in"] += 1
+            sink(item)
+            stats["sink"]["out"] += 1
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for t in threads:
+            t.join()
+
+    if failure:
+        raise failure[0]
+    return stats
+
+
+def format_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    """Tek satırlık özet: 'source 120 → fetch 118 (2 hata) → ... → sink 640'."""
+    parts = []
+    for name, s in stats.items():
+        n = s["out"] if name == "source" else s["in"]
+        parts.append(f"{name} {n}" + (f" ({s['errors']} hata)" if s["errors"] else ""))
+    return " → ".join(parts)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fiyat satırları için sıkı (dizi tabanlı) anlık görüntü.
+
+Her fiyat satırı için ayrı bir dict yerine sütunlar tutulur:
+
+    events      : etkinlik referansları (id ya da anahtar) → küçük tamsayı
+    categories  : kategori adları → küçük tamsayı (tekrarlayan metinler bir kez)
+    price       : array('q'), kuruş cinsinden tamsayı (NULL_PRICE → fiyat yok)
+    remaining   : array('q'), kalan bilet (-1 → bilinmiyor)
+    sold_out    : bit haritası
+    is_active   : bit haritası
+    row_ids     : veritabanı satır kimliği (id ya da bileşik anahtar), isteğe bağlı
+
+(etkinlik, kategori[, is_active]) anahtarı tek bir tamsayıya paketlenir ve
+satır numarasına O(1) sözlük aramasıyla eşlenir. Aynı anahtarın ikinci
+eklenmesi yok sayılır (ilk gelen geçerli).
+
+Aynı partide karşılaştırılacak iki görüntü aynı `Interner` nesnelerini
+paylaşmalıdır; `sibling()` bunu sağlar.
+"""
+
+from array import array
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+NULL_PRICE = -(2 ** 63)
+UNKNOWN = -1
+ROW_FIELDS = ("ref", "category", "price", "remaining", "sold_out", "is_active")
+
+
+def to_minor(price) -> int:
+    """1500, 1500.5, Decimal('1.500,00' → 1500.00) → kuruş; None → NULL_PRICE."""
+    if price is None:
+        return NULL_PRICE
+    if not isinstance(price, Decimal):
+        price = Decimal(str(price))
+    return int((price * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor(value: int) -> Optional[float]:
+    return None if value == NULL_PRICE else value / 100
+
+
+class Interner:
+    """Değer ↔ küçük tamsayı eşlemesi; her farklı değer bir kez saklanır."""
+
+    __slots__ = ("_ids", "values")
+
+    def __init__(self):
+        self._ids: Dict[Hashable, int] = {}
+        self.values: List = []
+
+    def __call__(self, value) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+    def get(self, value) -> Optional[int]:
+        return self._ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Bitmap:
+    __slots__ = ("_bits", "_len")
+
+    def __init__(self, size: int = 0):
+        self._bits = bytearray((size + 7) // 8)
+        self._len = size
+
+    def append(self, flag: bool) -> None:
+        if self._len % 8 == 0:
+            self._bits.append(0)
+        if flag:
+            self._bits[self._len >> 3] |= 1 << (self._len & 7)
+        self._len += 1
+
+    def set(self, i: int) -> None:
+        self._bits[i >> 3] |= 1 << (i & 7)
+
+    def __getitem__(self, i: int) -> bool:
+        return bool(self._bits[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self) -> int:
+        return self._len
+
+
+class PriceSnapshot:
+    """
+    keyed_active=True → anahtar (etkinlik, kategori, is_active) (Bubilet);
+    aksi halde (etkinlik, kategori) ve yalnızca aktif satırlar anlamlıdır.
+    """
+
+    __slots__ = ("keyed_active", "events", "categories", "event", "category", "price",
+                 "remaining", "sold_out", "is_active", "row_ids", "_index")
+
+    def __init__(self, keyed_active: bool = False, events: Optional[Interner] = None,
+                 categories: Optional[Interner] = None):
+        self.keyed_active = keyed_active
+        self.events = events or Interner()
+        self.categories = categories or Interner()
+        self.event = array("I")
+        self.category = array("I")
+        self.price = array("q")
+        self.remaining = array("q")
+        self.sold_out = Bitmap()
+        self.is_active = Bitmap()
+        self.row_ids: List = []
+        self._index: Dict[int, int] = {}
+
+    def sibling(self) -> "PriceSnapshot":
+        """Aynı etkinlik/kategori tablolarını paylaşan boş görüntü."""
+        return PriceSnapshot(self.keyed_active, self.events, self.categories)
+
+    # ---- anahtar --------------------------------------------------------
+    def _pack(self, event_idx: int, category_idx: int, is_active: bool) -> int:
+        key = (event_idx << 32) | (category_idx << 1)
+        return key | 1 if self.keyed_active and is_active else key
+
+    def key(self, i: int) -> int:
+        return self._pack(self.event[i], self.category[i], self.is_active[i])
+
+    def lookup(self, key: int) -> Optional[int]:
+        return self._index.get(key)
+
+    def find(self, ref, category, is_active: bool = True) -> Optional[int]:
+        e, c = self.events.get(ref), self.categories.get(category)
+        if e is None or c is None:
+            return None
+        return self._index.get(self._pack(e, c, is_active))
+
+    # ---- ekleme ---------------------------------------------------------
+    def add(self, ref, category, price, remaining=None, sold_out=False, is_active=True,
+            row_id=None) -> Optional[int]:
+        """Satırı ekler ve numarasını döner; anahtar zaten varsa None."""
+        e, c = self.events(ref), self.categories(category)
+        is_active = True if is_active is None else bool(is_active)
+        key = self._pack(e, c, is_active)
+        if key in self._index:
+            return None
+        i = self._index[key] = len(self.event)
+        self.event.append(e)
+        self.category.append(c)
+        self.price.append(to_minor(price))
+        self.remaining.append(UNKNOWN if remaining is None else int(remaining))
+        self.sold_out.append(bool(sold_out))
+        self.is_active.append(is_active)
+        self.row_ids.append(row_id)
+        return i
+
+    def extend(self, ref, price_list: Iterable[Dict]) -> None:
+        for p in price_list:
+            self.add(ref, p.get("category"), p.get("price"), p.get("remaining"),
+                     p.get("sold_out", False), p.get("is_active", True))
+
+    # ---- okuma ----------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.event)
+
+    def column(self, name: str):
+        return getattr(self, name)
+
+    def values(self, i: int) -> Tuple:
+        """(ref, category, price, remaining, sold_out, is_active) — doğrudan SQL parametresi."""
+        remaining = self.remaining[i]
+        return (
+            self.events.values[self.event[i]],
+            self.categories.values[self.category[i]],
+            from_minor(self.price[i]),
+            None if remaining == UNKNOWN else remaining,
+            self.sold_out[i],
+            self.is_active[i],
+        )
+
+    def row(self, i: int) -> Dict:
+        """Tek satırı dict olarak verir (yalnızca değişen satırlar için)."""
+        return dict(zip(ROW_FIELDS, self.values(i)))
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcı çalıştırmaları için isteğe bağlı profil çıkarma.
+
+Yavaş bir çalıştırmayı elle yeniden üretmek yerine üretimdeki çalıştırma
+doğrudan profillenir. event_table (tek seferlik) ve daemon (iş başına)
+çalıştırmayı profile_run() ile sarar:
+
+    PROFILE=sample python Cron/event_table.py biletinial
+    python Cron/event_table.py --profile cprofile --tracemalloc bugece
+    PROFILE=sample python Cron/event_table.py daemon --jobs bubilet
+
+    * cprofile : cProfile; tam çağrı sayıları ve süreleri, yalnızca çalıştırmayı
+                 başlatan iş parçacığı (ThreadPoolExecutor / pipeline
+                 işçileri görünmez). Ek yükü yüksektir.
+    * sample   : PROFILE_INTERVAL_MS'de (varsayılan 5) bir tüm iş
+                 parçacıklarının yığını örneklenir (duvar saati: ağ ve kilit
+                 beklemeleri de görünür). Ek yükü düşüktür; üretim için önerilir.
+    * PROFILE_TRACEMALLOC=1 / --tracemalloc : çalıştırma başı ve sonu bellek
+                 anlık görüntüleri; en çok ayıran satırlar ve tepe bellek.
+
+Çıktılar run loglarının yanında, artifacts arşivinde tutulur (saklama
+politikası artifacts.py ile aynıdır):
+
+    artifacts/profiles/YYYY-MM-DD/<ad>-HHMMSS.txt      ilk PROFILE_TOP (25) fonksiyon
+    artifacts/profiles/YYYY-MM-DD/<ad>-HHMMSS.prof     cprofile: pstats / snakeviz
+    artifacts/profiles/YYYY-MM-DD/<ad>-HHMMSS.folded   sample: flamegraph.pl / speedscope
+
+Özetin ilk satırları çalıştırma loguna da yazdırılır.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MODES = ("cprofile", "sample")
+TOP_N = int(os.getenv("PROFILE_TOP", "25"))
+INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+LOG_LINES = 10                  # çalıştırma loguna yazdırılan satır sayısı
+
+
+def configured() -> Optional[str]:
+    """PROFILE ayarlıysa kip adı, değilse None."""
+    mode = os.getenv("PROFILE", "").strip().lower() or None
+    if mode and mode not in MODES:
+        raise ValueError(f"Bilinmeyen PROFILE: {mode} (seçenekler: {', '.join(MODES)})")
+    return mode
+
+
+def trace_memory() -> bool:
+    return os.getenv("PROFILE_TRACEMALLOC", "0") == "1"
+
+
+def enabled() -> bool:
+    return configured() is not None or trace_memory()
+
+
+# --------------------------------------------------------------------------- #
+# 1. Örnekleyici
+# --------------------------------------------------------------------------- #
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """Tüm iş parçacıklarının yığınını aralıklarla sayar (sys._current_frames)."""
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            # İşçi numaraları (ThreadPoolExecutor-0_3) tek satırda toplanır
+            names = {t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """Brendan Gregg'in katlanmış yığın biçimi: `kök;...;yaprak sayı`."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, n: int = TOP_N) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        """(öz örnek, kapsayıcı örnek) sıralamaları; kapsayıcıda özyineleme bir kez sayılır."""
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        return own.most_common(n), inclusive.most_common(n)
+
+    def report(self, n: int = TOP_N) -> str:
+        own, inclusive = self.top(n)
+        total = max(sum(self.stacks.values()), 1)
+        lines = [f"örnek: {self.samples} tur × {self.interval * 1000:g} ms, {total} iş parçacığı yığını", ""]
+        for title, rows in (("öz (yaprak)", own), ("kapsayıcı", inclusive)):
+            lines.append(f"-- {title} --")
+            lines += [f"{count / total:7.1%}  {count:>7}  {label}" for label, count in rows]
+            lines.append("")
+        return "\n".join(lines)
+
+
+# --------------------------------------------------------------------------- #
+# 2. Rapor yazımı
+# --------------------------------------------------------------------------- #
+def _cprofile_report(profile: cProfile.Profile, n: int = TOP_N) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out).strip_dirs()
+    for key in ("cumulative", "tottime"):
+        out.write(f"-- sıralama: {key} --\n")
+        stats.sort_stats(key).print_stats(n)
+    return out.getvalue()
+
+
+def _cprofile_summary(profile: cProfile.Profile, n: int = LOG_LINES) -> List[str]:
+    """Öz süreye göre ilk n fonksiyon (loga yazdırılır)."""
+    rows = sorted(pstats.Stats(profile).stats.items(), key=lambda kv: kv[1][2], reverse=True)[:n]
+    return [f"{tt:8.2f} sn öz  {ct:8.2f} sn toplam  {nc:>8}  {Path(file).name}:{line}({func})"
+            for (file, line, func), (_, nc, tt, ct, _) in rows]
+
+
+def _memory_report(start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, n: int = TOP_N) -> str:
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"bellek: şu an {current / 1024 / 1024:.1f} MB, tepe {peak / 1024 / 1024:.1f} MB", "",
+             "-- en çok ayıran satırlar --"]
+    lines += [str(stat) for stat in end.statistics("lineno")[:n]]
+    lines += ["", "-- çalıştırma boyunca artış --"]
+    lines += [str(stat) for stat in end.compare_to(start, "lineno")[:n]]
+    return "\n".join(lines) + "\n"
+
+
+def _output_base(name: str, now: datetime) -> Path:
+    from artifacts import _day_dir
+
+    return _day_dir("profiles", now) / f"{name}-{now:%H%M%S}"
+
+
+def _summary_lines(report: str) -> Iterator[str]:
+    """Raporun ilk bölümünden loga yazdırılacak satırlar."""
+    section = report.split("\n\n")[:2]
+    for line in "\n".join(section).splitlines()[:LOG_LINES + 2]:
+        if line.strip():
+            yield line
+
+
+# --------------------------------------------------------------------------- #
+# 3. Çalıştırmayı sarma
+# --------------------------------------------------------------------------- #
+@contextmanager
+def profile_run(name: str, mode: Optional[str] = None, memory: Optional[bool] = None):
+    """
+    Bloğu seçilen kiple profiller ve çıktıları artifacts/profiles altına yazar.
+    mode / memory verilmezse PROFILE / PROFILE_TRACEMALLOC okunur; ikisi de
+    kapalıysa hiçbir şey yapmaz.
+    """
+    mode = mode or configured()
+    memory = trace_memory() if memory is None else memory
+    if not mode and not memory:
+        yield
+        return
+    if mode and mode not in MODES:
+        raise ValueError(f"Bilinmeyen profil kipi: {mode} (seçenekler: {', '.join(MODES)})")
+
+    now = datetime.now()
+    profile = cProfile.Profile() if mode == "cprofile" else None
+    sampler = Sampler() if mode == "sample" else None
+    start_snapshot = None
+    if memory:
+        tracemalloc.start(int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1")))
+        start_snapshot = tracemalloc.take_snapshot()
+    if sampler:
+        sampler.start()
+    started = time.perf_counter()
+    if profile:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile:
+            profile.disable()
+        if sampler:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+        sections: Dict[str, str] = {}
+        if profile:
+            sections["cprofile"] = _cprofile_report(profile)
+        if sampler:
+            sections["sample"] = sampler.report()
+        if memory:
+            sections["tracemalloc"] = _memory_report(start_snapshot, tracemalloc.take_snapshot())
+            tracemalloc.stop()
+
+        base = _output_base(name, now)
+        header = f"{name} — {now:%Y-%m-%d %H:%M:%S}, {elapsed:.1f} sn, kip: {mode or '-'}" \
+                 f"{' + tracemalloc' if memory else ''}\n\n"
+        base.with_suffix(".txt").write_text(
+            header + "\n".join(f"==== {k} ====\n{v}" for k, v in sections.items()), encoding="utf-8")
+        if profile:
+            profile.dump_stats(str(base.with_suffix(".prof")))
+        if sampler:
+            base.with_suffix(".folded").write_text(sampler.folded(), encoding="utf-8")
+
+        print(f"🔬 profil ({name}, {mode or 'tracemalloc'}): {base.with_suffix('.txt')}")
+        for kind, report in sections.items():
+            lines = _cprofile_summary(profile) if kind == "cprofile" else _summary_lines(report)
+            for line in lines:
+                print(f"   {line}")
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcı uç noktalarının ham yanıtları için ortak depo.
+
+Cron/bubilet.py (DB) ile kuzey/bubilet.py (CSV) aynı Etkinlikler ve
+Seans/{id}/Biletler uçlarını; Cron/bugece.py ile kuzey/bugece_promoter.py
+aynı barac.bugece.co API'sini ayrı ayrı çağırıyordu. Artık her istek
+RawStore.get() üzerinden geçer:
+
+    raw = open_store("bubilet")
+    detail = raw.get(f"Seans/{seans_id}", lambda: http_get_json(url))
+
+    * Anahtarın RAW_STORE_MAX_AGE saniyeden (varsayılan 600) yeni bir yanıtı
+      varsa istek atılmaz, kayıtlı yanıt döner; yoksa fetch() çağrılır ve
+      yanıt kaydedilir. Aynı pencerede çalışan tüm tüketiciler (DB upsert,
+      CSV/Parquet anlık görüntüsü, analiz) bir uç noktayı bir kez çağırır.
+    * fetch() None dönerse (ör. 404) kaydedilmez.
+    * Yanıt sıralı anahtarlı, boşluksuz JSON olarak zlib ile sıkıştırılıp
+      STATE_DIR/raw_store.sqlite3 içinde tutulur. İçerik bir önceki
+      kayıtla aynıysa yeni satır açılmaz, yalnızca fetched_at ilerler.
+    * RAW_STORE_RETENTION_HOURS'tan (varsayılan 48) eski kayıtlar prune ile silinir.
+
+Depodaki yanıtlar ağ isteği olmadan da okunabilir (latest / export).
+RAW_STORE=0 ile kapatılır (get her seferinde fetch() çağırır).
+
+Kullanım:
+    python Cron/raw_store.py stats
+    python Cron/raw_store.py export bubilet --prefix Seans/ > seanslar.jsonl
+    python Cron/raw_store.py prune
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from local_state import connect_state
+
+MAX_AGE = float(os.getenv("RAW_STORE_MAX_AGE", "600"))
+RETENTION_HOURS = float(os.getenv("RAW_STORE_RETENTION_HOURS", "48"))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS raw_responses (
+    provider   TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    sha1       TEXT NOT NULL,
+    body       BLOB NOT NULL,
+    PRIMARY KEY (provider, key, fetched_at)
+);
+"""
+
+
+def enabled() -> bool:
+    return os.getenv("RAW_STORE", "1") != "0"
+
+
+def _encode(payload) -> Tuple[bytes, str]:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 6), hashlib.sha1(raw).hexdigest()
+
+
+def _decode(body: bytes):
+    return json.loads(zlib.decompress(body))
+
+
+class RawStore:
+    def __init__(self, provider: str, max_age: float = MAX_AGE):
+        self.provider = provider
+        self.max_age = max_age
+        self.counts = {"hits": 0, "fetches": 0}
+        self._lock = threading.Lock()       # detay istekleri iş parçacıklarından gelir
+        self.conn = connect_state("raw_store", check_same_thread=False)
+        self.conn.executescript(SCHEMA_SQL)
+
+    def _latest_row(self, key: str):
+        return self.conn.execute(
+            """
+            SELECT fetched_at, sha1, body FROM raw_responses
+            WHERE provider = ? AND key = ? ORDER BY fetched_at DESC LIMIT 1
+            """,
+            (self.provider, key),
+        ).fetchone()
+
+    def get(self, key: str, fetch: Callable[[], object]):
+        """Taze kayıtlı yanıtı ya da fetch() sonucunu (kaydederek) döner."""
+        if self.max_age > 0 and enabled():
+            with self._lock:
+                row = self._latest_row(key)
+                fresh = row is not None and row["fetched_at"] >= time.time() - self.max_age
+                self.counts["hits"] += fresh
+            if fresh:
+                return _decode(row["body"])
+        payload = fetch()
+        with self._lock:
+            self.counts["fetches"] += 1
+        if payload is not None and enabled():
+            self.put(key, payload)
+        return payload
+
+    def put(self, key: str, payload) -> None:
+        body, digest = _encode(payload)
+        now = time.time()
+        with self._lock:
+            row = self._latest_row(key)
+            if row is not None and row["sha1"] == digest:
+                self.conn.execute(
+                    "UPDATE raw_responses SET fetched_at = ? WHERE provider = ? AND key = ? AND fetched_at = ?",
+                    (now, self.provider, key, row["fetched_at"]),
+                )
+            else:
+                self.conn.execute(
+                    "INSERT INTO raw_responses (provider, key, fetched_at, sha1, body) VALUES (?, ?, ?, ?, ?)",
+                    (self.provider, key, now, digest, body),
+                )
+
+    def latest(self, prefix: str = "", max_age: Optional[float] = None) -> Iterator[Tuple[str, float, object]]:
+        """Anahtar başına en son yanıt: (anahtar, fetched_at, yük); ağ isteği yapılmaz."""
+        since = time.time() - max_age if max_age else 0
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT key, MAX(fetched_at) AS fetched_at, body FROM raw_responses
+                WHERE provider = ? AND key LIKE ? || '%' AND fetched_at >= ?
+                GROUP BY key ORDER BY key
+                """,
+                (self.provider, prefix, since),
+            ).fetchall()
+        for row in rows:
+            yield row["key"], row["fetched_at"], _decode(row["body"])
+
+    def summary(self) -> str:
+        c = self.counts
+        return f"ham yanıt deposu ({self.provider}): {c['fetches']} istek, {c['hits']} depodan"
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# --------------------------------------------------------------------------- #
+# Süreç genelindeki depolar (iş parçacıkları aynı nesneyi paylaşır)
+# --------------------------------------------------------------------------- #
+_stores: Dict[str, RawStore] = {}
+_registry_lock = threading.Lock()
+
+
+def open_store(provider: str) -> RawStore:
+    with _registry_lock:
+        store = _stores.get(provider)
+        if store is None:
+            store = _stores[provider] = RawStore(provider)
+        return store
+
+
+def prune(retention_hours: float = RETENTION_HOURS) -> int:
+    """Saklama süresinden eski yanıtları siler (anahtarın en son yanıtı da dahil)."""
+    conn = connect_state("raw_store")
+    conn.executescript(SCHEMA_SQL)
+    removed = conn.execute(
+        "DELETE FROM raw_responses WHERE fetched_at < ?", (time.time() - retention_hours * 3600,)
+    ).rowcount
+    conn.close()
+    return removed
+
+
+def stats() -> Dict[str, Dict]:
+    conn = connect_state("raw_store")
+    conn.executescript(SCHEMA_SQL)
+    rows = conn.execute(
+        """
+        SELECT provider, COUNT(DISTINCT key) AS keys, COUNT(*) AS responses,
+               SUM(LENGTH(body)) AS bytes, MAX(fetched_at) AS last
+        FROM raw_responses GROUP BY provider ORDER BY provider
+        """
+    ).fetchall()
+    conn.close()
+    return {row["provider"]: dict(row) for row in rows}
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Ham yanıt deposu")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Sağlayıcı başına anahtar / yanıt / boyut")
+    p_export = sub.add_parser("export", help="Anahtar başına en son yanıtı JSONL olarak yazdır")
+    p_export.add_argument("provider")
+    p_export.add_argument("--prefix", default="")
+    p_export.add_argument("--max-age", type=float, default=None, help="Yalnızca son N saniye")
+    sub.add_parser("prune", help=f"{RETENTION_HOURS:g} saatten eski yanıtları sil")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        for provider, s in stats().items():
+            print(f"  {provider:<12} {s['keys']:>7} anahtar  {s['responses']:>8} yanıt  "
+                  f"{(s['bytes'] or 0) / 1024 / 1024:7.1f} MB  son {datetime.fromtimestamp(s['last']):%Y-%m-%d %H:%M}")
+    elif args.command == "export":
+        store = RawStore(args.provider)
+        for key, fetched_at, payload in store.latest(args.prefix, args.max_age):
+            sys.stdout.write(json.dumps({"key": key, "fetched_at": fetched_at, "payload": payload},
+                                        ensure_ascii=False) + "\n")
+        store.close()
+    else:
+        print(f"🧹 {prune()} ham yanıt silindi.")
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Güncel etkinlik ve fiyatlar için salt-okur, önbellekli HTTP servisi.
+
+Panolar beş sağlayıcının *_prices tablolarını doğrudan sorgulamak yerine
+bu servisi kullanır; Supabase'e yalnızca önbelleği tazelemek için gidilir:
+
+    * Açılışta her sağlayıcının etkinlikleri ve aktif fiyatları yüklenir.
+    * READ_API_REFRESH_SECONDS'ta bir yalnızca değişenler çekilir:
+      last_seen'i son görülen değer eksi READ_API_OVERLAP_SECONDS'tan
+      (varsayılan tazeleme aralığı) büyük ya da eşit etkinlikler veya fiyatları
+      (pasifleştirme dahil — last_seen güncellenir) değişen etkinlikler.
+      last_seen işlem başlangıcındaki now() olduğundan, tazelemeden sonra
+      commit edilen satırlar son görülenden eski/eşit zamanla gelebilir;
+      pay bunları yakalar, tekrar gelenler id ile birleşir. Taramalar
+      migrations.py'deki last_seen indekslerini kullanır.
+    * READ_API_FULL_REFRESH_SECONDS'ta bir tam yükleme (silinen etkinlikler).
+    * Önbellek her değiştiğinde "nesil" artar; ETag nesil + sorgudan üretilir,
+      If-None-Match eşleşirse 304 döner. Yanıt gövdeleri nesil boyunca saklanır.
+
+Uç noktalar:
+    GET /events   ?provider=bubilet,passo &city=istanbul &venue=zorlu
+                  &date_from=2025-06-01 &date_to=2025-06-30 &limit=500 &offset=0
+                  &format=json|arrow
+    GET /summary  sağlayıcı başına etkinlik/fiyat sayısı, en düşük/en yüksek/ortalama fiyat
+    GET /health   nesil ve son tazeleme zamanları
+
+Etkinlik tablolarında şehir sütunu olmadığından `city` mekân metninde
+aranır (Biletix "Mekân - Şehir" biçiminde yazar). JSON yanıtları istemci
+kabul ediyorsa gzip ile sıkıştırılır; `format=arrow` (ya da Accept:
+application/vnd.apache.arrow.stream) fiyat başına bir satırlık Arrow IPC
+akışı döner [pip install pyarrow].
+
+Biletix ayrı veritabanındadır; BILETIX_DATABASE_URL ayarlıysa yüklenir.
+
+Kullanım:
+    python Cron/read_api.py --port 8080
+    curl -H 'Accept-Encoding: gzip' 'localhost:8080/events?provider=bubilet&city=istanbul'
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+REFRESH_SECONDS = float(os.getenv("READ_API_REFRESH_SECONDS", "60"))
+OVERLAP = timedelta(seconds=float(os.getenv("READ_API_OVERLAP_SECONDS", str(REFRESH_SECONDS))))
+FULL_REFRESH_SECONDS = float(os.getenv("READ_API_FULL_REFRESH_SECONDS", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("READ_API_RESPONSE_CACHE", "256"))
+MAX_LIMIT = 5000
+
+PROVIDERS = ("bubilet", "bugece", "passo", "biletinial", "biletix")
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _dsn(provider: str) -> Optional[str]:
+    if provider == "biletix":
+        return os.getenv("BILETIX_DATABASE_URL")
+    return os.getenv("DATABASE_URL")
+
+
+def _fold(text) -> str:
+    """Türkçe büyük/küçük harf duyarsız karşılaştırma için ('İstanbul' → 'istanbul')."""
+    return str(text or "").replace("İ", "i").replace("I", "ı").casefold()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+# --------------------------------------------------------------------------- #
+# 1. Önbellek
+# --------------------------------------------------------------------------- #
+class PriceCache:
+    """Sağlayıcı → {etkinlik id → etkinlik (aktif fiyatlarıyla)}; tazeleme yeni sözlükle değiştirir."""
+
+    def __init__(self, providers=PROVIDERS):
+        self.providers = [p for p in providers if _dsn(p)]
+        self.generation = 0
+        self.events: Dict[str, Dict] = {p: {} for p in self.providers}
+        self.watermarks: Dict[str, datetime] = {}
+        self.refreshed_at: Dict[str, float] = {}
+        self._full_at = 0.0
+        self._conns: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._rows: List[Dict] = []
+
+    # ---- veritabanı --------------------------------------------------------
+    def _conn(self, provider: str):
+        dsn = _dsn(provider)
+        conn = self._conns.get(dsn)
+        if conn is None or conn.closed:
+            import psycopg2
+
+            conn = psycopg2.connect(dsn, sslmode="require" if provider != "biletix" else "prefer")
+            conn.set_session(readonly=True, autocommit=True)
+            self._conns[dsn] = conn
+        return conn
+
+    def _query(self, provider: str, since: Optional[datetime]) -> Tuple[Dict[int, Dict], Optional[datetime]]:
+        t = provider
+        remaining = "p.remaining" if provider == "bubilet" else "NULL"
+        where = ""
+        if since:
+            where = f"""WHERE e.last_seen >= %(after)s
+                        OR e.id IN (SELECT event_id FROM {t}_prices WHERE last_seen >= %(after)s)"""
+        events: Dict[int, Dict] = {}
+        watermark = since
+        with self._conn(provider).cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT e.id, e.name, e.venue, e.date::text, e.last_seen::text,
+                       p.category, p.price, p.sold_out, {remaining}, e.last_seen, p.last_seen
+                FROM {t}_events e
+                LEFT JOIN {t}_prices p ON p.event_id = e.id AND p.is_active
+                {where}
+                """,
+                {"after": since - OVERLAP if since else None},
+            )
+            for eid, name, venue, date_, seen, category, price, sold_out, rem, seen_at, price_seen_at in cur:
+                event = events.get(eid)
+                if event is None:
+                    event = events[eid] = {"provider": provider, "id": eid, "name": name, "venue": venue,
+                                           "date": date_, "last_seen": seen, "prices": []}
+                if category is not None:
+                    event["prices"].append({"category": category,
+                                            "price": float(price) if price is not None else None,
+                                            "sold_out": sold_out, "remaining": rem})
+                for value in (seen_at, price_seen_at):
+                    if value and (watermark is None or value > watermark):
+                        watermark = value
+        return events, watermark
+
+    def refresh(self, full: bool = False) -> bool:
+        """Değişenleri yükler; önbellek değiştiyse True."""
+        full = full or time.monotonic() - self._full_at >= FULL_REFRESH_SECONDS
+        changed = False
+        for provider in self.providers:
+            try:
+                since = None if full else self.watermarks.get(provider)
+                fresh, watermark = self._query(provider, since)
+            except Exception as exc:
+                print(f"⚠️  [{provider}] tazeleme hatası — {exc}")
+                self._conns.pop(_dsn(provider), None)
+                continue
+            if since is None:
+                events = fresh
+                changed |= events != self.events[provider]
+            else:
+                # Pay nedeniyle önceki turda görülenler yeniden gelir; yalnızca farklıysa değişiklik
+                current = self.events[provider]
+                events = {**current, **fresh}
+                changed |= any(current.get(eid) != event for eid, event in fresh.items())
+            if watermark:
+                self.watermarks[provider] = watermark
+            self.refreshed_at[provider] = time.time()
+            with self._lock:
+                self.events[provider] = events
+        if full:
+            self._full_at = time.monotonic()
+        if changed or not self._rows:
+            rows = sorted((e for p in self.providers for e in self.events[p].values()),
+                          key=lambda e: (e["date"] or "", e["provider"], e["id"]))
+            with self._lock:
+                self._rows = rows
+                self.generation += 1
+        return changed
+
+    def loop(self, stop: threading.Event) -> None:
+        while not stop.wait(REFRESH_SECONDS):
+            started = time.perf_counter()
+            if self.refresh():
+                print(f"🔄 önbellek nesil {self.generation} ({time.perf_counter() - started:.1f} sn)")
+
+    # ---- sorgu ---------------------------------------------------------------
+    def snapshot(self) -> Tuple[int, List[Dict]]:
+        with self._lock:
+            return self.generation, self._rows
+
+    def summary(self) -> Dict:
+        result = {}
+        for provider in self.providers:
+            prices = [p["price"] for e in self.events[provider].values()
+                      for p in e["prices"] if p["price"] is not None]
+            result[provider] = {
+                "events": len(self.events[provider]),
+                "prices": len(prices),
+                "min_price": min(prices) if prices else None,
+                "max_price": max(prices) if prices else None,
+                "avg_price": round(sum(prices) / len(prices), 2) if prices else None,
+            }
+        return result
+
+
+def filter_events(rows: List[Dict], params: Dict[str, str]) -> List[Dict]:
+    providers = set(params["provider"].split(",")) if params.get("provider") else None
+    city = _fold(params.get("city"))
+    venue = _fold(params.get("venue"))
+    date_from, date_to = params.get("date_from"), params.get("date_to")
+    out = []
+    for e in rows:
+        day = (e["date"] or "")[:10]
+        if providers and e["provider"] not in providers:
+            continue
+        if date_from and day < date_from:
+            continue
+        if date_to and day > date_to:
+            continue
+        if city or venue:
+            text = _fold(e["venue"])
+            if (city and city not in text) or (venue and venue not in text):
+                continue
+        out.append(e)
+    return out
+
+
+def to_arrow(events: List[Dict]) -> bytes:
+    """Fiyat başına bir satır (fiyatı olmayan etkinlik tek satır) Arrow IPC akışı."""
+    import pyarrow as pa
+
+    rows = [
+        {"provider": e["provider"], "event_id": e["id"], "name": e["name"], "venue": e["venue"],
+         "date": e["date"], "category": p.get("category"), "price": p.get("price"),
+         "sold_out": p.get("sold_out"), "remaining": p.get("remaining")}
+        for e in events for p in (e["prices"] or [{}])
+    ]
+    table = pa.Table.from_pylist(rows)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# --------------------------------------------------------------------------- #
+# 2. HTTP
+# --------------------------------------------------------------------------- #
+class ResponseCache:
+    """(nesil, yol, sorgu, biçim) → (gövde, içerik türü); nesil değişince eskiler kendiliğinden düşer."""
+
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._items: "OrderedDict[tuple, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+def _handler_for(cache: PriceCache, responses: ResponseCache):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: bytes, content_type: str, etag: Optional[str] = None) -> None:
+            gzipped = (content_type.startswith("application/json")
+                       and "gzip" in self.headers.get("Accept-Encoding", "") and len(body) > 512)
+            if gzipped:
+                body = gzip.compress(body, compresslevel=5)
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept, Accept-Encoding")
+            if etag:
+                self.send_header("ETag", etag)
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _json(self, payload) -> bytes:
+            return json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if url.path == "/health":
+                body = self._json({"generation": cache.generation,
+                                        "refreshed_at": cache.refreshed_at,
+                                        "watermarks": cache.watermarks})
+                return self._send(200, body, "application/json; charset=utf-8")
+            if url.path not in ("/events", "/summary"):
+                return self._send(404, self._json({"error": "bulunamadı"}), "application/json; charset=utf-8")
+
+            arrow = params.get("format") == "arrow" or ARROW_TYPE in self.headers.get("Accept", "")
+            generation, rows = cache.snapshot()
+            key = (generation, url.path, tuple(sorted(params.items())), arrow)
+            etag = f'W/"{generation}-{hashlib.sha1(repr(key[1:]).encode()).hexdigest()[:12]}"'
+            if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            cached = responses.get(key)
+            if cached is None:
+                try:
+                    cached = self._render(url.path, params, rows, arrow)
+                except ValueError as exc:
+                    return self._send(400, self._json({"error": str(exc)}), "application/json; charset=utf-8")
+                responses.put(key, cached)
+            body, content_type = cached
+            self._send(200, body, content_type, etag)
+
+        def _render(self, path: str, params: Dict[str, str], rows: List[Dict], arrow: bool):
+            if path == "/summary":
+                return self._json(cache.summary()), "application/json; charset=utf-8"
+            limit = min(int(params.get("limit", 500)), MAX_LIMIT)
+            offset = int(params.get("offset", 0))
+            matched = filter_events(rows, params)
+            page = matched[offset:offset + limit]
+            if arrow:
+                return to_arrow(page), ARROW_TYPE
+            body = self._json({"total": len(matched), "offset": offset, "limit": limit, "events": page})
+            return body, "application/json; charset=utf-8"
+
+        def log_message(self, fmt, *args):
+            if os.getenv("READ_API_ACCESS_LOG", "0") == "1":
+                print(f"🌐 {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def serve(host: str, port: int, providers=PROVIDERS) -> None:
+    cache = PriceCache(providers)
+    if not cache.providers:
+        raise SystemExit("❌ DATABASE_URL (ya da BILETIX_DATABASE_URL) tanımlı değil.")
+    started = time.perf_counter()
+    cache.refresh(full=True)
+    total = sum(len(v) for v in cache.events.values())
+    print(f"📚 {total} etkinlik yüklendi ({', '.join(cache.providers)}) — {time.perf_counter() - started:.1f} sn")
+
+    stop = threading.Event()
+    threading.Thread(target=cache.loop, args=(stop,), name="read-api-refresh", daemon=True).start()
+    server = ThreadingHTTPServer((host, port), _handler_for(cache, ResponseCache()))
+    print(f"🛰️  Okuma API'si http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Güncel fiyatlar için önbellekli okuma API'si")
+    parser.add_argument("--host", default=os.getenv("READ_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("READ_API_PORT", "8080")))
+    parser.add_argument("--providers", nargs="*", choices=PROVIDERS, default=list(PROVIDERS))
+    args = parser.parse_args()
+    serve(args.host, args.port, args.providers)
@@ -0,0 +1,719 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tak-çıkar depolama hedefleri (storage sinks).
+
+Her sağlayıcı normalize ettiği etkinlikleri `sink.write(event)` ile verir;
+hedef bunları `batch_size` kadar biriktirip aynı toplu yazma mantığıyla
+işler:
+
+    1. Etkinlikleri upsert et (id'si olanlar id ile, diğerleri
+       name + venue + date doğal anahtarıyla).
+    2. Partideki tüm etkinliklerin mevcut fiyatlarını tek sorguda oku.
+    3. Fiyatları karşılaştır → ADDED / UPDATED / REMOVED + history satırları.
+    4. Değişiklikleri toplu (execute_values / executemany) yaz, tek commit.
+
+Hedefler (STORAGE_SINK ortam değişkeni):
+    * postgres → DATABASE_URL'deki mevcut <provider>_events/_prices/_price_history tabloları
+    * sqlite   → STORAGE_PATH (varsayılan .state/events.sqlite3), ağ turu yok
+    * duckdb   → STORAGE_PATH (varsayılan .state/events.duckdb)  [pip install duckdb]
+    * parquet  → STORAGE_PATH klasörü (varsayılan .state/parquet)  [pip install pyarrow]
+
+STORAGE_SINK tanımsızsa betikler kendi upsert_event_with_history() yolunu kullanır.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import change_feed
+from local_state import state_path
+from price_snapshot import Bitmap, PriceSnapshot
+
+BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", "200"))
+
+# --------------------------------------------------------------------------- #
+# 1. Sağlayıcı tablo/semantik tanımları
+# --------------------------------------------------------------------------- #
+#   event_key     : "id" (sağlayıcı id'si) | "natural" (name, venue, date)
+#   event_columns : anahtar dışında güncellenen etkinlik sütunları
+#   price_key     : fiyat satırını tanımlayan alanlar
+#   compare       : değişim sayılan alanlar
+#   deactivate    : listede olmayan aktif kategoriyi REMOVED yap
+#   history_old   : UPDATED satırına eski değerleri yaz (False → yeni değerler)
+#   updated_type  : history'deki UPDATED yazımı (Bubilet geçmişi baştan beri "UPTADED";
+#                   tüm yollar sağlayıcının tek yazımını kullanır)
+#   touch         : değişmeyen fiyatların last_seen'ini de güncelle
+NATURAL_DEFAULTS = {
+    "event_key": "natural",
+    "array_columns": (),
+    "price_key": ("category",),
+    "compare": ("price", "sold_out"),
+    "remaining": False,
+    "price_ids": True,
+    "deactivate": True,
+    "history_old": True,
+    "updated_type": "UPDATED",
+    "touch": False,
+}
+
+PROVIDERS: Dict[str, Dict] = {
+    "bubilet": {
+        "event_key": "id",
+        "event_columns": ("provider", "name", "venue", "date", "genre", "canonical_venue_id",
+                          "description", "promoter", "artist"),
+        "array_columns": ("artist",),
+        "price_key": ("category", "is_active"),
+        "compare": ("price", "remaining", "sold_out"),
+        "remaining": True,
+        "price_ids": False,
+        "deactivate": False,
+        "history_old": False,
+        "updated_type": "UPTADED",
+        "touch": True,
+    },
+    "bugece": {**NATURAL_DEFAULTS, "event_columns": ("provider", "genre")},
+    "passo": {**NATURAL_DEFAULTS, "event_columns": ("provider", "description", "genre", "promoter", "artist"),
+              "array_columns": ("artist",)},
+    "biletinial": {**NATURAL_DEFAULTS, "event_columns": ("provider", "artist", "promoter", "description"),
+                   "array_columns": ("artist", "promoter")},
+    "biletix": {**NATURAL_DEFAULTS, "event_columns": ("provider", "description", "genre")},
+}
+
+
+def event_key(spec: Dict, event: Dict) -> str:
+    if spec["event_key"] == "id":
+        return str(event["id"])
+    return f"{event['name']}|{event['venue']}|{event['date']}"
+
+
+def price_key(spec: Dict, row: Dict) -> Tuple:
+    return tuple(row.get(f, True) if f == "is_active" else row.get(f) for f in spec["price_key"])
+
+
+# --------------------------------------------------------------------------- #
+# 2. Ortak fiyat karşılaştırması
+# --------------------------------------------------------------------------- #
+def new_snapshot(spec: Dict) -> PriceSnapshot:
+    return PriceSnapshot(keyed_active="is_active" in spec["price_key"])
+
+
+def diff_snapshots(spec: Dict, existing: PriceSnapshot, incoming: PriceSnapshot,
+                   changes: Dict[str, List]) -> None:
+    """
+    Partinin gelen fiyatlarını (incoming) mevcut satırlarla (existing)
+    karşılaştırır ve `changes` sözlüğündeki insert / update / touch /
+    deactivate / history listelerine ekler. İki görüntü aynı etkinlik ve
+    kategori tablolarını paylaşmalıdır (existing.sibling()).
+
+    Karşılaştırma sütunlar üzerinde yapılır (fiyat kuruş cinsinden); dict
+    yalnızca değişen satırlar için üretilir.
+    """
+    columns = [(existing.column(f), incoming.column(f)) for f in spec["compare"]]
+    matched = Bitmap(len(existing))
+
+    for i in range(len(incoming)):
+        j = existing.lookup(incoming.key(i))
+        if j is None:
+            row = incoming.row(i)
+            changes["insert"].append(row)
+            changes["history"].append({**row, "change_type": "ADDED"})
+            continue
+        matched.set(j)
+        if any(old[j] != new[i] for old, new in columns):
+            row, previous = incoming.row(i), existing.row(j)
+            changes["update"].append({**row, "_row": existing.row_ids[j]})
+            source = previous if spec["history_old"] else row
+            changes["history"].append({
+                "ref": row["ref"], "category": row["category"], "price": source["price"],
+                "remaining": source["remaining"], "sold_out": source["sold_out"],
+                "change_type": spec["updated_type"], "_old": previous, "_new": row,   # değişim akışı için
+            })
+        elif spec["touch"]:
+            changes["touch"].append(existing.row_ids[j])
+
+    if spec["deactivate"]:
+        for j in range(len(existing)):
+            if not matched[j]:
+                changes["deactivate"].append(existing.row_ids[j])
+                changes["history"].append({**existing.row(j), "change_type": "REMOVED"})
+
+
+def _new_changes() -> Dict[str, List]:
+    return {"insert": [], "update": [], "touch": [], "deactivate": [], "history": []}
+
+
+def diff_prices(provider: str, ref, existing: Iterable[Tuple], price_list: Iterable[Dict]) -> Dict[str, List]:
+    """
+    STORAGE_SINK tanımsızken betiklerin kendi upsert_event_with_history()
+    yolu için tek etkinliğin karşılaştırması (doğal anahtarlı sağlayıcılar).
+    existing: aktif fiyatların (satır id, category, price, sold_out) demetleri.
+    Sonuç diff_snapshots ile aynı listelerdir; update satırlarında "_row",
+    deactivate'te satır id'si bulunur.
+    """
+    spec = PROVIDERS[provider]
+    current = new_snapshot(spec)
+    for row_id, category, price, sold_out in existing:
+        current.add(ref, category, price, sold_out=sold_out, row_id=row_id)
+    incoming = current.sibling()
+    incoming.extend(ref, price_list)
+    changes = _new_changes()
+    diff_snapshots(spec, current, incoming, changes)
+    return changes
+
+
+# --------------------------------------------------------------------------- #
+# 3. Ortak parti mantığı
+# --------------------------------------------------------------------------- #
+class StorageSink:
+    """
+    Alt sınıflar şu adımları sağlar:
+        _upsert_events(events, now) → her etkinlik için referans (id / anahtar)
+        _load_prices(refs)          → mevcut fiyatların PriceSnapshot'ı (row_ids: satır kimliği)
+        _apply(changes, now)        → değişiklikleri yaz
+        _commit(), _close()
+    """
+
+    name = "base"
+
+    def __init__(self, provider: str, batch_size: int = BATCH_SIZE):
+        self.provider = provider
+        self.spec = PROVIDERS[provider]
+        self.batch_size = batch_size
+        self.stats = Counter()
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()      # Biletix gibi çok iş parçacıklı yazarlar için
+        # Her commit'ten (ve boş flush'tan) sonra çağrılır: o ana kadar yazılan her şey kalıcıdır
+        self.commit_hooks: List[Callable[[], None]] = []
+        self._open()
+
+    # ---- dışa açık -------------------------------------------------------
+    def write(self, event: Dict) -> None:
+        with self._lock:
+            self._buffer.append(event)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def write_many(self, events: Iterable[Dict]) -> None:
+        for event in events:
+            self.write(event)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+        self._close()
+        s = self.stats
+        print(f"💾 [{self.name}] {self.provider}: {s['events']} etkinlik, "
+              f"+{s['ADDED']} ~{s['UPDATED']} -{s['REMOVED']} fiyat değişimi, {s['batches']} parti")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close()
+
+    # ---- parti -----------------------------------------------------------
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            self._run_commit_hooks()
+            return
+        # Aynı etkinlik partide iki kez geldiyse sonuncusu geçerli
+        batch = list({event_key(self.spec, e): e for e in self._buffer}.values())
+        self._buffer = []
+
+        now = datetime.now()
+        self._begin()
+        refs = self._upsert_events(batch, now)
+        existing = self._load_prices(set(refs))
+
+        incoming = existing.sibling()
+        for ref, event in zip(refs, batch):
+            incoming.extend(ref, event.get("price_list") or [])
+
+        changes = _new_changes()
+        diff_snapshots(self.spec, existing, incoming, changes)
+
+        feed = change_feed.from_sink_history(self.provider, changes["history"], dict(zip(refs, batch)), now)
+        self._apply(changes, now)
+        self._notify(feed)
+        self._commit()
+
+        self.stats["batches"] += 1
+        self.stats["events"] += len(batch)
+        self.stats.update(f["change_type"] for f in feed)      # akışta yazım tekdir (UPDATED)
+        self._after_commit(batch, refs, changes, now, feed)
+        self._run_commit_hooks()
+
+    def _run_commit_hooks(self) -> None:
+        for hook in self.commit_hooks:
+            hook()
+
+    def _begin(self) -> None:
+        """psycopg2/sqlite3 işlemi kendiliğinden açar; DuckDB açıkça başlatır."""
+
+    def _notify(self, feed: List[Dict]) -> None:
+        """Commit öncesi, işlem içinde bildirim (yalnızca PostgreSQL: pg_notify)."""
+
+    def _after_commit(self, batch, refs, changes, now, feed) -> None:
+        """Commit sonrası kanca: değişiklikler yerel değişim akışına yazılır."""
+        change_feed.publish(feed)
+
+    # ---- alt sınıf -------------------------------------------------------
+    def _open(self): raise NotImplementedError
+    def _upsert_events(self, events, now): raise NotImplementedError
+    def _load_prices(self, refs): raise NotImplementedError
+    def _apply(self, changes, now): raise NotImplementedError
+    def _commit(self): raise NotImplementedError
+    def _close(self): raise NotImplementedError
+
+
+def _array(value):
+    """'A, B' gibi tek metni PostgreSQL dizisi için listeye çevirir (format_pg_array ile aynı)."""
+    if not value:
+        return None
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+# --------------------------------------------------------------------------- #
+# 4. PostgreSQL (mevcut Supabase tabloları)
+# --------------------------------------------------------------------------- #
+class PostgresSink(StorageSink):
+    name = "postgres"
+
+    def _open(self):
+        from db import connection
+        from psycopg2.extras import execute_batch, execute_values
+
+        self._execute_values = execute_values
+        self._execute_batch = execute_batch
+        self.conn = connection()
+        self.table = self.provider
+
+    def _event_params(self, event, now):
+        params = {c: event.get(c) for c in self.spec["event_columns"]}
+        for c in self.spec["array_columns"]:
+            params[c] = _array(params.get(c))
+        return params
+
+    def _upsert_events(self, events, now):
+        t = self.table
+        cols = self.spec["event_columns"]
+        with self.conn.cursor() as cur:
+            if self.spec["event_key"] == "id":
+                sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols)
+                self._execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO {t}_events (id, {", ".join(cols)}, created_at, last_seen)
+                    VALUES %s
+                    ON CONFLICT (id) DO UPDATE SET {sets}, last_seen = EXCLUDED.last_seen
+                    """,
+                    [(e["id"], *self._event_params(e, now).values(), now, now) for e in events],
+                )
+                return [e["id"] for e in events]
+
+            # (name, venue, date) tekil indeksi: bkz. migrations.py
+            refs = []
+            for e in events:
+                params = self._event_params(e, now)
+                extra = [c for c in params if c not in ("name", "venue", "date")]
+                sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in extra)
+                cur.execute(
+                    f"""
+                    INSERT INTO {t}_events (name, venue, date, {", ".join(extra)}, created_at, last_seen)
+                    VALUES (%s, %s, %s, {", ".join(["%s"] * len(extra))}, %s, %s)
+                    ON CONFLICT (name, venue, date) DO UPDATE SET {sets}, last_seen = EXCLUDED.last_seen
+                    RETURNING id
+                    """,
+                    (e["name"], e["venue"], e["date"], *[params[c] for c in extra], now, now),
+                )
+                refs.append(cur.fetchone()[0])
+            return refs
+
+    def _load_prices(self, refs):
+        t = self.table
+        remaining = ", remaining" if self.spec["remaining"] else ""
+        row_id = "id" if self.spec["price_ids"] else "NULL"
+        only_active = "" if "is_active" in self.spec["price_key"] else "AND is_active = TRUE"
+        existing = new_snapshot(self.spec)
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {row_id}, event_id, category, price, sold_out, is_active{remaining}
+                FROM {t}_prices
+                WHERE event_id = ANY(%s) {only_active}
+                """,
+                (list(refs),),
+            )
+            for r in cur:
+                row_id = r[0] if self.spec["price_ids"] else (r[1], r[2], r[5])
+                existing.add(r[1], r[2], r[3], r[6] if remaining else None, r[4], r[5], row_id)
+        return existing
+
+    def _where_row(self):
+        if self.spec["price_ids"]:
+            return "id = %s", lambda key: (key,)
+        return "event_id = %s AND category = %s AND is_active = %s", lambda key: tuple(key)
+
+    def _apply(self, changes, now):
+        t = self.table
+        rem = self.spec["remaining"]
+        where, key_params = self._where_row()
+        with self.conn.cursor() as cur:
+            if changes["insert"]:
+                cols = ["event_id", "category", "price"] + (["remaining"] if rem else []) + \
+                       ["sold_out", "created_at", "last_seen", "is_active"]
+                conflict = ""
+                if not self.spec["price_ids"]:
+                    conflict = ("ON CONFLICT (event_id, category, is_active) DO UPDATE SET "
+                                "price = EXCLUDED.price, remaining = EXCLUDED.remaining, "
+                                "sold_out = EXCLUDED.sold_out, last_seen = EXCLUDED.last_seen")
+                self._execute_values(
+                    cur,
+                    f"INSERT INTO {t}_prices ({', '.join(cols)}) VALUES %s {conflict}",
+                    [(r["ref"], r["category"], r["price"], *([r["remaining"]] if rem else []),
+                      r["sold_out"], now, now, r["is_active"]) for r in changes["insert"]],
+                )
+            if changes["update"]:
+                sets = "price = %s, " + ("remaining = %s, " if rem else "") + "sold_out = %s, last_seen = %s"
+                self._execute_batch(
+                    cur,
+                    f"UPDATE {t}_prices SET {sets} WHERE {where}",
+                    [(r["price"], *([r["remaining"]] if rem else []), r["sold_out"], now,
+                      *key_params(r["_row"])) for r in changes["update"]],
+                )
+            if changes["touch"]:
+                self._execute_batch(
+                    cur,
+                    f"UPDATE {t}_prices SET last_seen = %s WHERE {where}",
+                    [(now, *key_params(k)) for k in changes["touch"]],
+                )
+            if changes["deactivate"]:
+                self._execute_batch(
+                    cur,
+                    f"UPDATE {t}_prices SET is_active = FALSE, last_seen = %s WHERE {where}",
+                    [(now, *key_params(k)) for k in changes["deactivate"]],
+                )
+            if changes["history"]:
+                cols = ["event_id", "category", "price"] + (["remaining"] if rem else []) + \
+                       ["sold_out", "change_date", "change_type"]
+                self._execute_values(
+                    cur,
+                    f"INSERT INTO {t}_price_history ({', '.join(cols)}) VALUES %s",
+                    [(h["ref"], h["category"], h["price"], *([h["remaining"]] if rem else []),
+                      h["sold_out"], now, h["change_type"]) for h in changes["history"]],
+                )
+
+    def _notify(self, feed):
+        with self.conn.cursor() as cur:
+            change_feed.notify(cur, feed)
+
+    def _commit(self):
+        self.conn.commit()
+
+    def _close(self):
+        from db import release
+
+        release(self.conn)
+
+
+# --------------------------------------------------------------------------- #
+# 5. Gömülü SQL (SQLite / DuckDB) — tek dosya, ağ turu yok
+# --------------------------------------------------------------------------- #
+EMBEDDED_EVENT_COLUMNS = ("provider", "name", "venue", "date", "genre", "description",
+                          "promoter", "artist", "canonical_venue_id")
+
+
+class EmbeddedSQLSink(StorageSink):
+    """Yerel şema: etkinlik kimliği event_key metnidir (id ya da name|venue|date)."""
+
+    id_column = "id INTEGER PRIMARY KEY"
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _ts(self, now):
+        return now
+
+    def _open(self):
+        self.conn = self._connect()
+        t = self.provider
+        self._create_sequences()
+        for sql in (
+            f"""CREATE TABLE IF NOT EXISTS {t}_events (
+                    event_key TEXT PRIMARY KEY,
+                    {", ".join(f"{c} TEXT" for c in EMBEDDED_EVENT_COLUMNS)},
+                    created_at TIMESTAMP, last_seen TIMESTAMP)""",
+            f"""CREATE TABLE IF NOT EXISTS {t}_prices (
+                    {self.id_column.format(t=t)},
+                    event_key TEXT NOT NULL, category TEXT, price DOUBLE, remaining INTEGER,
+                    sold_out BOOLEAN, is_active BOOLEAN,
+                    created_at TIMESTAMP, last_seen TIMESTAMP)""",
+            f"CREATE INDEX IF NOT EXISTS {t}_prices_event_idx ON {t}_prices (event_key, is_active)",
+            f"""CREATE TABLE IF NOT EXISTS {t}_price_history (
+                    event_key TEXT NOT NULL, category TEXT, price DOUBLE, remaining INTEGER,
+                    sold_out BOOLEAN, change_date TIMESTAMP, change_type TEXT)""",
+        ):
+            self.conn.execute(sql)
+        self._commit()
+
+    def _create_sequences(self):
+        pass
+
+    def _upsert_events(self, events, now):
+        t = self.provider
+        cols = EMBEDDED_EVENT_COLUMNS
+        ts = self._ts(now)
+        rows = []
+        for e in events:
+            values = []
+            for c in cols:
+                v = e.get(c)
+                values.append(json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else
+                              (None if v is None else str(v)))
+            rows.append((event_key(self.spec, e), *values, ts, ts))
+        sets = ", ".join(f"{c} = excluded.{c}" for c in cols)
+        self.conn.executemany(
+            f"""
+            INSERT INTO {t}_events (event_key, {", ".join(cols)}, created_at, last_seen)
+            VALUES ({", ".join(["?"] * (len(cols) + 3))})
+            ON CONFLICT (event_key) DO UPDATE SET {sets}, last_seen = excluded.last_seen
+            """,
+            rows,
+        )
+        return [r[0] for r in rows]
+
+    def _load_prices(self, refs):
+        t = self.provider
+        only_active = "" if "is_active" in self.spec["price_key"] else "AND is_active"
+        existing = new_snapshot(self.spec)
+        refs = list(refs)
+        for i in range(0, len(refs), 500):
+            chunk = refs[i:i + 500]
+            cur = self.conn.execute(
+                f"""
+                SELECT id, event_key, category, price, remaining, sold_out, is_active
+                FROM {t}_prices
+                WHERE event_key IN ({", ".join(["?"] * len(chunk))}) {only_active}
+                """,
+                chunk,
+            )
+            for r in cur.fetchall():
+                existing.add(r[1], r[2], r[3], r[4], r[5], r[6], r[0])
+        return existing
+
+    def _apply(self, changes, now):
+        t = self.provider
+        ts = self._ts(now)
+        c = self.conn
+        if changes["insert"]:
+            c.executemany(
+                f"""INSERT INTO {t}_prices
+                    (event_key, category, price, remaining, sold_out, is_active, created_at, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(r["ref"], r["category"], r["price"], r["remaining"], r["sold_out"], r["is_active"], ts, ts)
+                 for r in changes["insert"]],
+            )
+        if changes["update"]:
+            c.executemany(
+                f"UPDATE {t}_prices SET price = ?, remaining = ?, sold_out = ?, last_seen = ? WHERE id = ?",
+                [(r["price"], r["remaining"], r["sold_out"], ts, r["_row"]) for r in changes["update"]],
+            )
+        if changes["touch"]:
+            c.executemany(f"UPDATE {t}_prices SET last_seen = ? WHERE id = ?",
+                          [(ts, k) for k in changes["touch"]])
+        if changes["deactivate"]:
+            c.executemany(f"UPDATE {t}_prices SET is_active = FALSE, last_seen = ? WHERE id = ?",
+                          [(ts, k) for k in changes["deactivate"]])
+        if changes["history"]:
+            c.executemany(
+                f"""INSERT INTO {t}_price_history
+                    (event_key, category, price, remaining, sold_out, change_date, change_type)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                [(h["ref"], h["category"], h["price"], h["remaining"], h["sold_out"], ts, h["change_type"])
+                 for h in changes["history"]],
+            )
+
+    def _commit(self):
+        self.conn.commit()
+
+    def _close(self):
+        self.conn.close()
+
+
+class SQLiteSink(EmbeddedSQLSink):
+    name = "sqlite"
+
+    def _connect(self):
+        import sqlite3
+
+        path = os.getenv("STORAGE_PATH") or state_path("events.sqlite3")
+        conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ts(self, now):
+        return now.isoformat()
+
+
+class DuckDBSink(EmbeddedSQLSink):
+    name = "duckdb"
+    id_column = "id BIGINT PRIMARY KEY DEFAULT nextval('{t}_prices_seq')"
+
+    def _connect(self):
+        import duckdb  # isteğe bağlı bağımlılık
+
+        path = os.getenv("STORAGE_PATH") or str(state_path("events.duckdb"))
+        return duckdb.connect(str(path))
+
+    def _create_sequences(self):
+        self.conn.execute(f"CREATE SEQUENCE IF NOT EXISTS {self.provider}_prices_seq")
+
+    def _begin(self):
+        self.conn.begin()
+        self._txn = True
+
+    def _commit(self):
+        # Şema oluşturma işlem dışında (otomatik commit) çalışır
+        if getattr(self, "_txn", False):
+            self.conn.commit()
+            self._txn = False
+
+
+# --------------------------------------------------------------------------- #
+# 6. Parquet — güncel durum bellekte, history parçalar hâlinde
+# --------------------------------------------------------------------------- #
+class ParquetSink(StorageSink):
+    """
+    <root>/<provider>/events.parquet ve prices.parquet güncel durumu tutar
+    (açılışta okunur, kapanışta yeniden yazılır); her parti history'yi
+    <root>/<provider>/history/part-*.parquet olarak ekler.
+    """
+
+    name = "parquet"
+
+    def _open(self):
+        import pyarrow  # noqa: F401  isteğe bağlı bağımlılık
+        import pyarrow.parquet as pq
+
+        self._pq = pq
+        root = Path(os.getenv("STORAGE_PATH") or state_path("parquet"))
+        self.root = root / self.provider
+        (self.root / "history").mkdir(parents=True, exist_ok=True)
+        self._events: Dict[str, Dict] = {}
+        self._prices: Dict[str, Dict[Tuple, Dict]] = {}
+        self._inactive: List[Dict] = []
+        self._history: List[Dict] = []
+        self._part = 0
+
+        if (self.root / "events.parquet").exists():
+            for row in pq.read_table(self.root / "events.parquet").to_pylist():
+                self._events[row["event_key"]] = row
+        if (self.root / "prices.parquet").exists():
+            for row in pq.read_table(self.root / "prices.parquet").to_pylist():
+                if row["is_active"] or "is_active" in self.spec["price_key"]:
+                    self._prices.setdefault(row["event_key"], {})[price_key(self.spec, row)] = row
+                else:
+                    self._inactive.append(row)
+
+    def _upsert_events(self, events, now):
+        refs = []
+        for e in events:
+            key = event_key(self.spec, e)
+            prev = self._events.get(key)
+            row = {"event_key": key, "created_at": prev["created_at"] if prev else now, "last_seen": now}
+            for c in EMBEDDED_EVENT_COLUMNS:
+                v = e.get(c)
+                row[c] = json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else \
+                    (None if v is None else str(v))
+            self._events[key] = row
+            refs.append(key)
+        return refs
+
+    def _load_prices(self, refs):
+        existing = new_snapshot(self.spec)
+        for ref in refs:
+            for pk, row in self._prices.get(ref, {}).items():
+                existing.add(ref, row["category"], row["price"], row["remaining"],
+                             row["sold_out"], row["is_active"], (ref, pk))
+        return existing
+
+    def _apply(self, changes, now):
+        for r in changes["insert"]:
+            row = {"event_key": r["ref"], "category": r["category"], "price": r["price"],
+                   "remaining": r["remaining"], "sold_out": r["sold_out"], "is_active": r["is_active"],
+                   "created_at": now, "last_seen": now}
+            self._prices.setdefault(r["ref"], {})[price_key(self.spec, row)] = row
+        for r in changes["update"]:
+            ref, pk = r["_row"]
+            self._prices[ref][pk].update(price=r["price"], remaining=r["remaining"],
+                                         sold_out=r["sold_out"], last_seen=now)
+        for ref, pk in changes["touch"]:
+            self._prices[ref][pk]["last_seen"] = now
+        for ref, pk in changes["deactivate"]:
+            row = self._prices[ref].pop(pk)
+            row.update(is_active=False, last_seen=now)
+            self._inactive.append(row)
+        self._history.extend(
+            {"event_key": h["ref"], "category": h["category"], "price": h["price"],
+             "remaining": h["remaining"], "sold_out": h["sold_out"], "change_date": now,
+             "change_type": h["change_type"]}
+            for h in changes["history"]
+        )
+
+    def _commit(self):
+        if not self._history:
+            return
+        import pyarrow as pa
+
+        self._part += 1
+        path = self.root / "history" / f"part-{int(time.time() * 1000)}-{os.getpid()}-{self._part}.parquet"
+        self._pq.write_table(pa.Table.from_pylist(self._history), path)
+        self._history = []
+
+    def _close(self):
+        import pyarrow as pa
+
+        if self._events:
+            self._pq.write_table(pa.Table.from_pylist(list(self._events.values())),
+                                 self.root / "events.parquet")
+        rows = [r for by_key in self._prices.values() for r in by_key.values()] + self._inactive
+        if rows:
+            self._pq.write_table(pa.Table.from_pylist(rows), self.root / "prices.parquet")
+
+
+# --------------------------------------------------------------------------- #
+# 7. Seçici
+# --------------------------------------------------------------------------- #
+SINKS = {
+    "postgres": PostgresSink,
+    "sqlite": SQLiteSink,
+    "duckdb": DuckDBSink,
+    "parquet": ParquetSink,
+}
+
+
+def configured() -> Optional[str]:
+    """STORAGE_SINK ayarlıysa hedef adı, değilse None."""
+    return os.getenv("STORAGE_SINK", "").strip().lower() or None
+
+
+def open_sink(provider: str, sink: Optional[str] = None, **kwargs) -> StorageSink:
+    sink = sink or configured() or "postgres"
+    if sink not in SINKS:
+        raise ValueError(f"Bilinmeyen STORAGE_SINK: {sink} (seçenekler: {', '.join(SINKS)})")
+    return SINKS[sink](provider, **kwargs)
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tarama iş kuyruğu: bir üretici (producer) iş birimlerini (Bubilet seans ID,
+Passo etkinlik ID, Biletinial detay URL'si, Biletix grup ID vb.) kuyruğa
+koyar; istenen sayıda işçi süreç/sunucu bunları kiralar (lease), işler ve
+onaylar (ack). Harici bir broker gerekmez:
+
+    * sqlite   → STATE_DIR/work_queue.sqlite3 (aynı makinedeki süreçler)
+    * postgres → DATABASE_URL üzerindeki crawl_queue tablosu (birden çok sunucu)
+
+Arka uç WORK_QUEUE_BACKEND ortam değişkeniyle seçilir (varsayılan: sqlite).
+
+Kurallar:
+    - (queue, item_key) tekildir; bekleyen/kiralanmış bir iş tekrar eklenmez.
+    - Kiralanan iş `visibility` saniye içinde ack edilmezse tekrar görünür olur.
+    - `max_attempts` kez kiralanıp bitirilemeyen iş 'failed' durumuna düşer.
+
+Kuyruğa üretenler (`--mode produce` / `--mode work`):
+    bubilet_seans      Cron/bubilet.py                        seans ID
+    passo_event        Cron/passo_promoter_artist.py          etkinlik ID (liste kaydıyla)
+    biletinial_detail  Cron/biletinial_artist_promoter_desc.py detay URL'si
+    biletix_group      Cron/biletix-muzik.py                  grup ID
+
+Kullanım:
+    python Cron/work_queue.py stats bubilet_seans
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from local_state import connect_state
+
+DEFAULT_VISIBILITY = 300        # saniye
+DEFAULT_MAX_ATTEMPTS = 5
+
+# --------------------------------------------------------------------------- #
+# 1. Şema
+# --------------------------------------------------------------------------- #
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_queue (
+    queue        TEXT             NOT NULL,
+    item_key     TEXT             NOT NULL,
+    payload      TEXT,
+    status       TEXT             NOT NULL DEFAULT 'pending',
+    attempts     INTEGER          NOT NULL DEFAULT 0,
+    leased_by    TEXT,
+    lease_until  DOUBLE PRECISION,
+    available_at DOUBLE PRECISION NOT NULL,
+    enqueued_at  DOUBLE PRECISION NOT NULL,
+    updated_at   DOUBLE PRECISION NOT NULL,
+    last_error   TEXT,
+    PRIMARY KEY (queue, item_key)
+)
+"""
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS crawl_queue_ready_idx
+    ON crawl_queue (queue, status, available_at)
+"""
+
+
+def default_worker_id() -> str:
+    """Sunucu adı + PID: kiralamaların kime ait olduğunu ayırt etmek için."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# --------------------------------------------------------------------------- #
+# 2. Ortak kuyruk mantığı
+# --------------------------------------------------------------------------- #
+class WorkQueue:
+    """
+    Arka uçtan bağımsız kuyruk işlemleri. Alt sınıflar yalnızca bağlantıyı,
+    parametre işaretini (`?` / `%s`) ve kiralama sorgusunu sağlar.
+    """
+
+    placeholder = "?"
+
+    def __init__(self, name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.conn = self._connect()
+        self._execute(SCHEMA_SQL)
+        self._execute(INDEX_SQL)
+        self._commit()
+
+    # ---- arka uca özel ---------------------------------------------------
+    def _connect(self):
+        raise NotImplementedError
+
+    def _lease_rows(self, worker_id: str, limit: int, now: float, lease_until: float) -> List[Tuple]:
+        raise NotImplementedError
+
+    def _execute(self, sql: str, params: Iterable = ()):
+        cur = self.conn.cursor()
+        cur.execute(sql.replace("?", self.placeholder), tuple(params))
+        return cur
+
+    def _begin(self) -> None:
+        """psycopg2 işlemi kendiliğinden açar; SQLite alt sınıfı açıkça başlatır."""
+
+    def _commit(self) -> None:
+        self.conn.commit()
+
+    # ---- üretici ---------------------------------------------------------
+    def enqueue(self, items: Iterable[Tuple[str, Optional[dict]]], revive_done: bool = True) -> int:
+        """
+        (item_key, payload) çiftlerini kuyruğa ekler.
+        * Bekleyen veya kiralanmış aynı anahtar varsa dokunulmaz (tekilleştirme).
+        * revive_done=True ise daha önce bitmiş/başarısız iş yeni tur için
+          tekrar 'pending' yapılır.
+        Dönüş: yeni eklenen veya canlandırılan iş sayısı.
+        """
+        now = time.time()
+        changed = 0
+        revive = "('done', 'failed')" if revive_done else "('__never__')"
+        self._begin()
+        for key, payload in items:
+            cur = self._execute(
+                f"""
+                INSERT INTO crawl_queue
+                    (queue, item_key, payload, status, attempts,
+                     available_at, enqueued_at, updated_at)
+                VALUES (?, ?, ?, 'pending', 0, ?, ?, ?)
+                ON CONFLICT (queue, item_key) DO UPDATE
+                SET status = 'pending', attempts = 0, payload = excluded.payload,
+                    leased_by = NULL, lease_until = NULL, last_error = NULL,
+                    available_at = excluded.available_at,
+                    updated_at = excluded.updated_at
+                WHERE crawl_queue.status IN {revive}
+                """,
+                (self.name, str(key), json.dumps(payload, default=str), now, now, now),
+            )
+            changed += max(cur.rowcount, 0)
+        self._commit()
+        return changed
+
+    # ---- işçi ------------------------------------------------------------
+    def lease(self, worker_id: str, limit: int = 10, visibility: int = DEFAULT_VISIBILITY) -> List[Dict]:
+        """
+        Hazır (bekleyen ya da kirası dolmuş) en fazla `limit` işi kiralar.
+        Dönüş: [{"key", "payload", "attempts"}, ...]
+        """
+        now = time.time()
+        # Deneme hakkı biten ve kirası dolan işleri kalıcı olarak düşür
+        self._execute(
+            """
+            UPDATE crawl_queue
+            SET status = 'failed', updated_at = ?
+            WHERE queue = ? AND status = 'leased'
+              AND lease_until < ? AND attempts >= ?
+            """,
+            (now, self.name, now, self.max_attempts),
+        )
+        rows = self._lease_rows(worker_id, limit, now, now + visibility)
+        self._commit()
+        return [
+            {"key": key, "payload": json.loads(payload) if payload else None, "attempts": attempts}
+            for key, payload, attempts in rows
+        ]
+
+    def ack(self, worker_id: str, keys: Iterable[str]) -> int:
+        """İşi tamamlandı olarak işaretler; kirası başkasına geçmişse yok sayılır."""
+        now = time.time()
+        done = 0
+        self._begin()
+        for key in keys:
+            cur = self._execute(
+                """
+                UPDATE crawl_queue
+                SET status = 'done', leased_by = NULL, lease_until = NULL, updated_at = ?
+                WHERE queue = ? AND item_key = ? AND status = 'leased' AND leased_by = ?
+                """,
+                (now, self.name, str(key), worker_id),
+            )
+            done += max(cur.rowcount, 0)
+        self._commit()
+        return done
+
+    def release(self, worker_id: str, key: str, error: Optional[str] = None, delay: float = 0) -> None:
+        """İşi hatayla geri bırakır; `delay` saniye sonra tekrar kiralanabilir."""
+        now = time.time()
+        self._execute(
+            """
+            UPDATE crawl_queue
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                leased_by = NULL, lease_until = NULL,
+                available_at = ?, last_error = ?, updated_at = ?
+            WHERE queue = ? AND item_key = ? AND status = 'leased' AND leased_by = ?
+            """,
+            (self.max_attempts, now + delay, error, now, self.name, str(key), worker_id),
+        )
+        self._commit()
+
+    def stats(self) -> Dict[str, int]:
+        cur = self._execute(
+            "SELECT status, COUNT(*) FROM crawl_queue WHERE queue = ? GROUP BY status",
+            (self.name,),
+        )
+        return {status: count for status, count in cur.fetchall()}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+# --------------------------------------------------------------------------- #
+# 3. Arka uçlar
+# --------------------------------------------------------------------------- #
+class SQLiteWorkQueue(WorkQueue):
+    """Tek makinede birden çok süreç: BEGIN IMMEDIATE ile yazma kilidi alınır."""
+
+    def _connect(self):
+        return connect_state("work_queue")
+
+    def _begin(self) -> None:
+        self.conn.execute("BEGIN")
+
+    def _commit(self) -> None:
+        # isolation_level=None → otomatik commit; açık işlem yoksa no-op
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+
+    def _lease_rows(self, worker_id, limit, now, lease_until):
+        self.conn.execute("BEGIN IMMEDIATE")
+        keys = [
+            row[0]
+            for row in self.conn.execute(
+                """
+                SELECT item_key FROM crawl_queue
+                WHERE queue = ? AND available_at <= ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_until < ?))
+                ORDER BY available_at
+                LIMIT ?
+                """,
+                (self.name, now, now, limit),
+            )
+        ]
+        if not keys:
+            return []
+        marks = ",".join("?" * len(keys))
+        self.conn.execute(
+            f"""
+            UPDATE crawl_queue
+            SET status = 'leased', leased_by = ?, lease_until = ?,
+                attempts = attempts + 1, updated_at = ?
+            WHERE queue = ? AND item_key IN ({marks})
+            """,
+            (worker_id, lease_until, now, self.name, *keys),
+        )
+        return self.conn.execute(
+            f"""
+            SELECT item_key, payload, attempts FROM crawl_queue
+            WHERE queue = ? AND item_key IN ({marks})
+            """,
+            (self.name, *keys),
+        ).fetchall()
+
+
+class PostgresWorkQueue(WorkQueue):
+    """Birden çok sunucu: FOR UPDATE SKIP LOCKED ile çakışmasız kiralama."""
+
+    placeholder = "%s"
+
+    def _connect(self):
+        from db import connect_db
+        return connect_db()
+
+    def _lease_rows(self, worker_id, limit, now, lease_until):
+        cur = self._execute(
+            """
+            UPDATE crawl_queue q
+            SET status = 'leased', leased_by = ?, lease_until = ?,
+                attempts = q.attempts + 1, updated_at = ?
+            FROM (
+                SELECT queue, item_key FROM crawl_queue
+                WHERE queue = ? AND available_at <= ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_until < ?))
+                ORDER BY available_at
+                LIMIT ?
+                FOR UPDATE SKIP LOCKED
+            ) ready
+            WHERE q.queue = ready.queue AND q.item_key = ready.item_key
+            RETURNING q.item_key, q.payload, q.attempts
+            """,
+            (worker_id, lease_until, now, self.name, now, now, limit),
+        )
+        return cur.fetchall()
+
+
+def open_queue(name: str, backend: Optional[str] = None, **kwargs) -> WorkQueue:
+    """WORK_QUEUE_BACKEND (sqlite | postgres) değerine göre kuyruğu açar."""
+    backend = (backend or os.getenv("WORK_QUEUE_BACKEND", "sqlite")).lower()
+    if backend == "postgres":
+        return PostgresWorkQueue(name, **kwargs)
+    if backend == "sqlite":
+        return SQLiteWorkQueue(name, **kwargs)
+    raise ValueError(f"Bilinmeyen WORK_QUEUE_BACKEND: {backend}")
+
+
+# --------------------------------------------------------------------------- #
+# 4. İşçi döngüsü
+# --------------------------------------------------------------------------- #
+def run_worker(
+    queue: WorkQueue,
+    handler: Callable[[str, Optional[dict]], None],
+    worker_id: Optional[str] = None,
+    batch_size: int = 10,
+    visibility: int = DEFAULT_VISIBILITY,
+    retry_delay: float = 60,
+    wait_when_idle: bool = False,
+    poll_interval: float = 5,
+) -> int:
+    """
+    Kuyruk boşalana kadar iş kiralar ve `handler(key, payload)` ile işler.
+    Hata veren iş `retry_delay` saniye sonra tekrar denenmek üzere bırakılır.
+    wait_when_idle=True ise kuyruk boşken çıkmak yerine bekler.
+    Dönüş: başarıyla işlenen iş sayısı.
+    """
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+
+    while True:
+        items = queue.lease(worker_id, batch_size, visibility)
+        if not items:
+            if not wait_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        for item in items:
+            try:
+                handler(item["key"], item["payload"])
+            except Exception as exc:
+                # Bir iş hata verse bile akış devam etsin.
+                print(f"⚠️  {queue.name}/{item['key']} (deneme {item['attempts']}):", exc)
+                queue.release(worker_id, item["key"], error=str(exc), delay=retry_delay)
+                continue
+            queue.ack(worker_id, [item["key"]])
+            processed += 1
+
+    return processed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "stats":
+        print("Kullanım: python Cron/work_queue.py stats <queue>")
+        sys.exit(2)
+    q = open_queue(sys.argv[2])
+    print(json.dumps(q.stats(), ensure_ascii=False))
+    q.close()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Biletix priceInfo ayrıştırıcısı için mikro-benchmark ve eşlik (parity) testi.
+
+fixtures/biletix_price_info/*.json dosyaları getPerformanceByEventCodeAndPerfCode
+yanıtının `data` gövdesini içerir. Her örnek Chrome'un JSON'u gösterdiği
+<pre> sayfasına sarılır ve:
+
+    * legacy_verbatim : eski kodun birebir kopyası (ikinci geçiş tüm sayfa metnini okur)
+    * legacy_fragment : eski kod, ikinci geçiş priceInfo parçası üzerinde (amaçlanan davranış)
+    * single_pass     : Cron/biletix_price_info.py
+
+çıktıları karşılaştırılır, ardından saniyedeki örnek sayısı ölçülür.
+
+Kullanım:
+    python benchmarks/biletix_price_info.py [--repeat 200]
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "Cron"))
+
+from biletix_price_info import load_pre_json, parse_price_info  # noqa: E402
+
+FIXTURES = ROOT / "fixtures" / "biletix_price_info"
+
+
+# --------------------------------------------------------------------------- #
+# 1. Eski ayrıştırıcı (Cron/biletix-muzik.py, değişiklik öncesi)
+# --------------------------------------------------------------------------- #
+def legacy_parse(page_source, second_pass_on_fragment=False):
+    soup = BeautifulSoup(page_source, "html.parser")
+    pre_tag = soup.find("pre")
+    json_data = json.loads(pre_tag.text)
+    data = json_data.get("data", {})
+    html_str = data.get("priceInfo", "")
+    new_soup = BeautifulSoup(html_str, "html.parser")
+    results = []
+
+    last_text_div = ""
+
+    for div in new_soup.find_all("div"):
+        spans = div.find_all("span")
+
+        if len(spans) < 2:
+            last_text_div = div.get_text(strip=True)
+            continue
+
+        category_raw = spans[0].get_text(strip=True)
+        price_text = spans[1].get_text(strip=True)
+
+        match = re.search(r"([0-9]+(?:[.,][0-9]+)?)\s*TL", price_text)
+        if match:
+            price = float(match.group(1).replace(",", "."))
+            sold_out = "tükendi" in price_text.lower()
+            category = category_raw if category_raw else last_text_div
+            results.append({
+                "category": category,
+                "price": price,
+                "sold_out": sold_out
+            })
+
+    text_soup = new_soup if second_pass_on_fragment else soup
+    text_lines = text_soup.get_text(separator="\n").splitlines()
+    for line in text_lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        match = re.match(r"(.+?)\s+([0-9]+(?:[.,][0-9]+)?)\s*TL", line)
+        if match:
+            category = match.group(1).strip()
+            price = float(match.group(2).replace(",", "."))
+            sold_out = "tükendi" in line.lower()
+
+            if not any(r["category"] == category and r["price"] == price for r in results):
+                results.append({
+                    "category": category,
+                    "price": price,
+                    "sold_out": sold_out
+                })
+
+    return results, data.get("active")
+
+
+def dedup(rows):
+    """Eski birinci geçiş iç içe div'lerde aynı satırı tekrar ekleyebiliyordu."""
+    seen = {}
+    for row in rows:
+        seen.setdefault((row["category"], row["price"]), row)
+    return list(seen.values())
+
+
+def single_pass(page_source):
+    data = load_pre_json(page_source).get("data", {})
+    return parse_price_info(data.get("priceInfo", "")), data.get("active")
+
+
+# --------------------------------------------------------------------------- #
+# 2. Örnekler
+# --------------------------------------------------------------------------- #
+def as_chrome_page(body: dict) -> str:
+    """Chrome bir JSON yanıtını bu şekilde gösterir (driver.page_source)."""
+    raw = html.escape(json.dumps(body, ensure_ascii=False), quote=False)
+    return (
+        '<html><head><meta name="color-scheme" content="light dark"></head><body>'
+        f'<pre style="word-wrap: break-word; white-space: pre-wrap;">{raw}</pre>'
+        "</body></html>"
+    )
+
+
+def load_corpus():
+    return [
+        (path.stem, as_chrome_page(json.loads(path.read_text(encoding="utf-8"))))
+        for path in sorted(FIXTURES.glob("*.json"))
+    ]
+
+
+# --------------------------------------------------------------------------- #
+# 3. Eşlik + hız
+# --------------------------------------------------------------------------- #
+def check_parity(corpus) -> bool:
+    ok = True
+    verbatim_diffs = []
+    for name, page in corpus:
+        new_rows, new_active = single_pass(page)
+        ref_rows, ref_active = legacy_parse(page, second_pass_on_fragment=True)
+        if (new_rows, new_active) != (dedup(ref_rows), ref_active):
+            ok = False
+            print(f"  ✗ {name}\n    eski : {dedup(ref_rows)}\n    yeni : {new_rows}")
+        old_rows, _ = legacy_parse(page)
+        if new_rows != old_rows:
+            verbatim_diffs.append((name, old_rows, new_rows))
+
+    print(f"Eşlik (legacy_fragment, tekilleştirilmiş): {'TAMAM' if ok else 'FARK VAR'} — {len(corpus)} örnek")
+    print(f"legacy_verbatim'den farklı örnek: {len(verbatim_diffs)}")
+    for name, old_rows, new_rows in verbatim_diffs:
+        extra = [r for r in old_rows if r not in new_rows]
+        missing = [r for r in new_rows if r not in old_rows]
+        if not extra and not missing:
+            print(f"  • {name}: eskide yalnızca tekrar eden satırlar ({len(old_rows)} → {len(new_rows)})")
+        else:
+            print(f"  • {name}: eskide fazladan {extra} | eskide eksik {missing}")
+    return ok
+
+
+def bench(label, func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _name, page in corpus:
+            func(page)
+    elapsed = time.perf_counter() - start
+    total = repeat * len(corpus)
+    print(f"{label:<16} {total / elapsed:>10.0f} örnek/sn   ({elapsed * 1000 / total:.3f} ms/örnek)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    ok = check_parity(corpus)
+    print()
+    old = bench("legacy_verbatim", legacy_parse, corpus, args.repeat)
+    new = bench("single_pass", single_pass, corpus, args.repeat)
+    print(f"Hızlanma: {old / new:.2f}x")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sağlayıcı yazma yolları için veritabanı benchmark'ı (yerel PostgreSQL).
+
+Sentetik etkinlikler üretilir (--events etkinlik × --categories kategori) ve
+her sağlayıcının yazma yolu boş bir şemaya karşı iki aşamada çalıştırılır:
+
+    * insert : tablolar boş, tüm etkinlik / fiyat / history satırları yeni
+    * update : aynı etkinlikler tekrar yazılır; fiyatların --change-ratio
+               kadarı değişir (UPDATED + history), kalanı yalnızca görülür
+
+Yazma yolları:
+
+    * direct : betiklerin kendi upsert_event_with_history() fonksiyonları
+               (Biletix pg8000 yerine aynı psycopg2 bağlantısıyla ölçülür)
+    * sink   : storage_sinks.PostgresSink (STORAGE_SINK=postgres)
+
+Bağlantı sayan bir psycopg2 bağlantısıyla değiştirilir; aşama başına
+etkinlik/sn, etkinlik başına ifade (statement), sunucuya gidiş-dönüş
+(ifade + commit + rollback) ve commit gecikmesi (p50 / p95) raporlanır.
+execute_values / execute_batch sayfa başına bir ifade sayılır.
+Bağlantı daemon'daki gibi sıcak tutulur (DB_REUSE_CONNECTIONS=1); bağlantı
+açma maliyeti ölçüme girmez, sayısı ayrıca yazılır.
+
+Tablolar BENCH_SCHEMA (varsayılan bench_write_path) şemasında her
+sağlayıcı için sıfırdan oluşturulur ve migrations.py indeksleri uygulanır.
+Hedef yalnızca BENCH_DATABASE_URL / --dsn'dir; DATABASE_URL (Supabase)
+kullanılmaz.
+
+Sonuçlar STATE_DIR/db_write_path.jsonl dosyasına eklenir; aynı parametrelerle
+yapılan önceki ölçümle karşılaştırılır ve etkinlik/sn --max-regression
+oranından (varsayılan 0.10) fazla düşmüşse ya da etkinlik başına ifade
+artmışsa uyarı verilir (--strict ile çıkış kodu 1).
+
+Kullanım:
+    BENCH_DATABASE_URL=postgresql://localhost/bench \\
+        python benchmarks/db_write_path.py [--providers bugece bubilet] \\
+            [--paths direct sink] [--events 500] [--categories 4] [--change-ratio 0.2]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent / "Cron"))
+
+os.environ.setdefault("CHANGE_FEED", "0")         # günlük dosyaları ölçüme girmesin
+
+import db  # noqa: E402
+import event_table  # noqa: E402
+from local_state import state_path  # noqa: E402
+from migrations import migrate  # noqa: E402
+from storage_sinks import open_sink  # noqa: E402
+
+PROVIDERS = ("bubilet", "bugece", "passo", "biletinial", "biletix")
+PATHS = ("direct", "sink")
+SCHEMA = os.getenv("BENCH_SCHEMA", "bench_write_path")
+RESULTS = state_path("db_write_path.jsonl")
+
+
+# --------------------------------------------------------------------------- #
+# 1. Sayan bağlantı
+# --------------------------------------------------------------------------- #
+class Meter:
+    def __init__(self):
+        self.connects = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.commits = 0
+        self.rollbacks = 0
+        self.commit_seconds: List[float] = []
+
+
+METER = Meter()
+_cursor_classes: Dict[type, type] = {}
+
+
+def _counting(factory: type) -> type:
+    """İmleç sınıfının (RealDictCursor dahil) ifadeleri sayan alt sınıfı."""
+    cls = _cursor_classes.get(factory)
+    if cls is None:
+        class CountingCursor(factory):
+            def execute(self, query, vars=None):
+                METER.statements += 1
+                return super().execute(query, vars)
+
+            def executemany(self, query, vars_list):
+                vars_list = list(vars_list)
+                METER.statements += len(vars_list)      # satır başına bir gidiş-dönüş
+                return super().executemany(query, vars_list)
+
+        cls = _cursor_classes[factory] = CountingCursor
+    return cls
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = _counting(factory)
+        return super().cursor(*args, **kwargs)
+
+    def commit(self):
+        started = time.perf_counter()
+        super().commit()
+        METER.commits += 1
+        METER.commit_seconds.append(time.perf_counter() - started)
+
+    def rollback(self):
+        super().rollback()
+        METER.rollbacks += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        # C tarafındaki __exit__ commit()'i atlar; `with connect_db() as conn` de sayılsın
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+def install(dsn: str) -> None:
+    """db.connection() (betikler ve PostgresSink) sayan bağlantıyı versin."""
+    def connect():
+        METER.connects += 1
+        return psycopg2.connect(dsn, connection_factory=CountingConnection,
+                                options=f"-c search_path={SCHEMA}")
+
+    db.connect_db = connect
+    db.REUSE_CONNECTIONS = True
+
+
+# --------------------------------------------------------------------------- #
+# 2. Şema
+# --------------------------------------------------------------------------- #
+def schema_sql(t: str) -> str:
+    if t == "bubilet":
+        return """
+        CREATE TABLE bubilet_events (
+            id BIGINT PRIMARY KEY, provider TEXT, name TEXT, venue TEXT, date TEXT, genre TEXT,
+            created_at TIMESTAMP, last_seen TIMESTAMP, canonical_venue_id INTEGER,
+            description TEXT, promoter TEXT, artist TEXT[]
+        );
+        CREATE TABLE bubilet_prices (
+            id SERIAL PRIMARY KEY, event_id BIGINT, category TEXT, price NUMERIC, remaining INTEGER,
+            sold_out BOOLEAN, created_at TIMESTAMP, last_seen TIMESTAMP, is_active BOOLEAN,
+            UNIQUE (event_id, category, is_active)
+        );
+        CREATE TABLE bubilet_price_history (
+            id SERIAL PRIMARY KEY, event_id BIGINT, category TEXT, price NUMERIC, remaining INTEGER,
+            sold_out BOOLEAN, change_date TIMESTAMP, change_type TEXT
+        );
+        """
+    promoter = "TEXT[]" if t == "biletinial" else "TEXT"
+    return f"""
+    CREATE TABLE {t}_events (
+        id SERIAL PRIMARY KEY, provider TEXT, name TEXT, venue TEXT, date TEXT, genre TEXT,
+        description TEXT, promoter {promoter}, artist TEXT[],
+        created_at TIMESTAMP, last_seen TIMESTAMP
+    );
+    CREATE TABLE {t}_prices (
+        id SERIAL PRIMARY KEY, event_id INTEGER, category TEXT, price NUMERIC, sold_out BOOLEAN,
+        created_at TIMESTAMP, last_seen TIMESTAMP, is_active BOOLEAN
+    );
+    CREATE TABLE {t}_price_history (
+        id SERIAL PRIMARY KEY, event_id INTEGER, category TEXT, price NUMERIC, sold_out BOOLEAN,
+        change_date TIMESTAMP, change_type TEXT
+    );
+    """
+
+
+def reset_schema(dsn: str, provider: str) -> None:
+    """Şemayı silip sağlayıcının tablolarını ve göç indekslerini yeniden kurar."""
+    if SCHEMA in ("public", ""):
+        raise SystemExit("❌ BENCH_SCHEMA public olamaz (şema her çalıştırmada silinir).")
+    conn = psycopg2.connect(dsn, options=f"-c search_path={SCHEMA}")
+    with conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {SCHEMA}")
+        cur.execute(schema_sql(provider))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        migrate(conn, tables=(provider,))
+    conn.close()
+
+
+# --------------------------------------------------------------------------- #
+# 3. Sentetik etkinlikler
+# --------------------------------------------------------------------------- #
+def generate(events: int, categories: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 21, 0)
+    return [
+        {
+            "i": i,
+            "name": f"Benchmark Etkinlik {i}",
+            "venue": f"Mekan {i % 97}",
+            "date": (start + timedelta(days=i % 365)).strftime("%Y-%m-%d %H:%M"),
+            "prices": [(f"Kategori {c}", float(rng.randrange(200, 3000, 50)), rng.randrange(0, 500))
+                       for c in range(categories)],
+        }
+        for i in range(events)
+    ]
+
+
+def mutate(base: List[Dict], change_ratio: float, seed: int) -> List[Dict]:
+    """Fiyatların change_ratio kadarını değiştirir (fiyat +50, kalan −1)."""
+    rng = random.Random(seed + 1)
+    return [
+        {**item, "prices": [(cat, price + 50, max(remaining - 1, 0)) if rng.random() < change_ratio
+                            else (cat, price, remaining) for cat, price, remaining in item["prices"]]}
+        for item in base
+    ]
+
+
+def shape(provider: str, item: Dict, now: datetime) -> Dict:
+    """Sağlayıcının normalize ettiği etkinlik sözlüğü."""
+    if provider == "bubilet":
+        return {
+            "id": 900_000_000 + item["i"], "provider": "Bubilet", "name": item["name"],
+            "venue": item["venue"], "date": item["date"], "genre": None,
+            "created_at": now, "last_seen": now, "canonical_venue_id": None,
+            "description": None, "promoter": None, "artist": [f"Sanatçı {item['i'] % 211}"],
+            "price_list": [{"category": cat, "price": price, "remaining": remaining,
+                            "sold_out": remaining == 0, "created_at": now, "last_seen": now,
+                            "is_active": True} for cat, price, remaining in item["prices"]],
+        }
+    event = {
+        "provider": provider.capitalize(), "name": item["name"], "venue": item["venue"],
+        "date": item["date"], "genre": "Konser", "description": f"Açıklama {item['i']}",
+        "price_list": [{"category": cat, "price": price, "sold_out": remaining == 0}
+                       for cat, price, remaining in item["prices"]],
+    }
+    if provider == "passo":
+        event.update(promoter="Organizatör", artist=[f"Sanatçı {item['i'] % 211}"])
+    elif provider == "biletinial":
+        event.update(promoter="Organizatör", artist=f"Sanatçı {item['i'] % 211}")
+    return event
+
+
+# --------------------------------------------------------------------------- #
+# 4. Yazma yolları
+# --------------------------------------------------------------------------- #
+def direct_writer(provider: str) -> Tuple[Callable[[Dict], None], Callable[[], None]]:
+    module = event_table.load(provider)
+    if provider == "bubilet":
+        return (lambda event: module.upsert_event_with_history(db.connection(), event)), db.reset_shared
+    if provider == "biletix":
+        module.BiletixEventDetails.connect_db = staticmethod(db.connection)
+        return module.BiletixEventDetails.upsert_event_with_history, db.reset_shared
+    return module.upsert_event_with_history, db.reset_shared
+
+
+def sink_writer(provider: str) -> Tuple[Callable[[Dict], None], Callable[[], None]]:
+    sink = open_sink(provider, "postgres")
+    return sink.write, sink.close
+
+
+def run_phase(write: Callable, done: Callable, events: List[Dict]) -> Dict:
+    METER.reset()
+    connects = METER.connects
+    started = time.perf_counter()
+    # betiklerin etkinlik başına yazdırdığı satırlar ölçüme girmesin
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for event in events:
+            write(event)
+        done()
+    elapsed = time.perf_counter() - started
+    commits = sorted(METER.commit_seconds)
+    n = max(len(events), 1)
+    return {
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(len(events) / elapsed, 1) if elapsed else None,
+        "statements": METER.statements,
+        "statements_per_event": round(METER.statements / n, 2),
+        "round_trips": METER.statements + METER.commits + METER.rollbacks,
+        "round_trips_per_event": round((METER.statements + METER.commits + METER.rollbacks) / n, 2),
+        "commits": METER.commits,
+        "commit_p50_ms": round(commits[len(commits) // 2] * 1000, 2) if commits else None,
+        "commit_p95_ms": round(commits[int(len(commits) * 0.95)] * 1000, 2) if commits else None,
+        "connects": METER.connects - connects,
+    }
+
+
+def bench(dsn: str, provider: str, path: str, base: List[Dict], changed: List[Dict]) -> Dict:
+    reset_schema(dsn, provider)
+    open_writer = direct_writer if path == "direct" else sink_writer
+    phases = {}
+    for phase, items in (("insert", base), ("update", changed)):
+        now = datetime.now()
+        events = [shape(provider, item, now) for item in items]
+        write, done = open_writer(provider)
+        phases[phase] = run_phase(write, done, events)
+    db.close_shared()
+    return phases
+
+
+# --------------------------------------------------------------------------- #
+# 5. Sonuçlar
+# --------------------------------------------------------------------------- #
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _params(record: Dict) -> Tuple:
+    return tuple(record[k] for k in ("provider", "path", "events", "categories", "change_ratio"))
+
+
+def previous(path: Path, record: Dict) -> Optional[Dict]:
+    """Aynı parametrelerle yapılmış en son ölçüm."""
+    if not path.exists():
+        return None
+    match = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            old = json.loads(line)
+            if _params(old) == _params(record):
+                match = old
+    return match
+
+
+def compare(record: Dict, old: Optional[Dict], max_regression: float) -> List[str]:
+    """Önceki ölçüme göre gerilemeler (okunur satırlar)."""
+    if old is None:
+        return []
+    regressions = []
+    for phase, now in record["phases"].items():
+        before = old["phases"].get(phase)
+        if not before or not before.get("events_per_sec") or not now.get("events_per_sec"):
+            continue
+        change = now["events_per_sec"] / before["events_per_sec"] - 1
+        if change < -max_regression:
+            regressions.append(f"{phase}: {before['events_per_sec']} → {now['events_per_sec']} etkinlik/sn "
+                               f"({change:+.0%})")
+        if now["statements_per_event"] > before["statements_per_event"]:
+            regressions.append(f"{phase}: etkinlik başına ifade {before['statements_per_event']} → "
+                               f"{now['statements_per_event']}")
+    return regressions
+
+
+def print_record(record: Dict, old: Optional[Dict]) -> None:
+    print(f"\n📊 {record['provider']} / {record['path']}")
+    for phase, s in record["phases"].items():
+        before = (old or {}).get("phases", {}).get(phase, {})
+        delta = ""
+        if before.get("events_per_sec") and s["events_per_sec"]:
+            delta = f" ({s['events_per_sec'] / before['events_per_sec'] - 1:+.0%})"
+        print(f"  {phase:<7} {s['events_per_sec']:>9} etkinlik/sn{delta:<8} "
+              f"{s['statements_per_event']:>6} ifade/etkinlik  {s['round_trips_per_event']:>6} gidiş-dönüş/etkinlik  "
+              f"{s['commits']:>6} commit (p50 {s['commit_p50_ms']} ms, p95 {s['commit_p95_ms']} ms)  "
+              f"{s['connects']} bağlantı")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sağlayıcı yazma yolu benchmark'ı (yerel PostgreSQL)")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Yerel PostgreSQL (varsayılan BENCH_DATABASE_URL)")
+    parser.add_argument("--providers", nargs="+", choices=PROVIDERS, default=list(PROVIDERS))
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--categories", type=int, default=4, help="Etkinlik başına fiyat kategorisi")
+    parser.add_argument("--change-ratio", type=float, default=0.2, help="update aşamasında değişen fiyat oranı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--results", type=Path, default=RESULTS)
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    parser.add_argument("--no-save", action="store_true", help="Sonucu kaydetme")
+    parser.add_argument("--strict", action="store_true", help="Gerilemede çıkış kodu 1")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        sys.exit("❌ BENCH_DATABASE_URL ya da --dsn gerekli (yerel PostgreSQL; şema silinip yeniden kurulur).")
+
+    install(args.dsn)
+    base = generate(args.events, args.categories, args.seed)
+    changed = mutate(base, args.change_ratio, args.seed)
+    revision = _git_revision()
+    regressed = False
+
+    for provider in args.providers:
+        for path in args.paths:
+            try:
+                phases = bench(args.dsn, provider, path, base, changed)
+            except ImportError as exc:          # ör. biletix için selenium kurulu değil
+                print(f"⏭️  {provider} / {path} atlandı: {exc}")
+                continue
+            record = {
+                "ts": datetime.now().isoformat(timespec="seconds"), "revision": revision,
+                "provider": provider, "path": path, "events": args.events,
+                "categories": args.categories, "change_ratio": args.change_ratio, "phases": phases,
+            }
+            old = previous(args.results, record)
+            print_record(record, old)
+            for line in compare(record, old, args.max_regression):
+                regressed = True
+                print(f"  ⚠️  gerileme ({old['revision'] or old['ts']} ile): {line}")
+            if not args.no_save:
+                with open(args.results, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    if not args.no_save:
+        print(f"\n💾 Sonuçlar: {args.results}")
+    sys.exit(1 if regressed and args.strict else 0)
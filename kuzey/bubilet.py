@@ -1,23 +1,21 @@
-import requests
-import pandas as pd
-from datetime import datetime
 import os
+import sys
+from datetime import datetime
+from pathlib import Path
 
-def get_all_events():
-    url = "https://apiv2.bubilet.com.tr/api/Anasayfa/6/Etkinlikler"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Cron"))
+# Liste/detay istekleri Cron/bubilet.py ile ortak: şehirler eşzamanlı çekilir,
+# seanslar birleştirilip tekilleştirilir, detaylar aynı limiter'dan geçer.
+# Yanıtlar ortak depodan gelir: Cron/bubilet.py aynı pencerede çalıştıysa
+# liste ve seans detayları için istek atılmaz (bkz. Cron/raw_store.py).
+from bubilet import fetch_all_events, fetch_ticket_details, raw  # noqa: E402
 
-def get_ticket_details(seans_id):
-    url = f"https://apiv2.bubilet.com.tr/api/Seans/{seans_id}/Biletler"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+# İstanbul listesi; BUBILET_SNAPSHOT_CITY_IDS ile birden çok şehir verilebilir
+CITY_IDS = [c.strip() for c in os.getenv("BUBILET_SNAPSHOT_CITY_IDS", "6").split(",") if c.strip()]
 
-def scrape_istanbul_events():
+def scrape_istanbul_events(city_ids=None):
     all_data = []
-    events = get_all_events()
+    events = fetch_all_events(city_ids or CITY_IDS)
     print(f"🔍 {len(events)} etkinlik bulundu (İstanbul)")
 
     for event in events:
@@ -33,7 +31,9 @@ def scrape_istanbul_events():
                 continue
 
             try:
-                ticket_info = get_ticket_details(seans_id)
+                ticket_info = fetch_ticket_details(seans_id)
+                if ticket_info is None:
+                    raise RuntimeError("bilet detayı alınamadı")
                 venue = ticket_info.get("mekanAdi")
                 categories = ticket_info.get("seansBiletler", [])
 
@@ -59,9 +59,12 @@ def scrape_istanbul_events():
             except Exception as e:
                 print(f"❌ Hata - SeansID {seans_id}: {e}")
 
+    print(f"📦 {raw.summary()}")
     return all_data
 
 if __name__ == "__main__":
+    import pandas as pd
+
     result = scrape_istanbul_events()
 
     if result:
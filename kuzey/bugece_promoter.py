@@ -1,6 +1,19 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
 import requests
-import pandas as pd
-import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Cron"))
+from concurrency import get_limiter  # noqa: E402
+from incremental_discovery import DiscoveryState  # noqa: E402
+from local_state import connect_state  # noqa: E402
+from raw_store import open_store  # noqa: E402
+from pipeline import Stage, format_stats, run_pipeline  # noqa: E402
 
 # Base API endpoints
 PROMOTERS_API = "https://barac.bugece.co/v1/promoters"
@@ -11,50 +24,85 @@ HEADERS = {
     "Accept": "application/json"
 }
 
-# CSV'ye kaydedilecek etkinlik verisi
-all_events = []
-
-def fetch_all_promoters():
-    """Tüm promoter'ları API'den sayfa sayfa çek"""
-    promoters = []
-    page = 1
+# Promoter → etkinlik verisi STATE_DIR/bugece_promoter.sqlite3 içinde promoter
+# bazında güncellenir; CSV yalnızca bir promoter'ın etkinlikleri değiştiğinde
+# bu depodan yeniden üretilir.
+OUTPUT_CSV = "bugece_events.csv"
+CSV_FIELDS = ["promoter", "event_title", "event_date", "venue_name", "timestamp"]
+FETCH_WORKERS = int(os.getenv("BUGECE_PROMOTER_WORKERS", "4"))   # limiter'ın üst sınırı
+limiter = get_limiter("bugece_promoter", FETCH_WORKERS)
+raw = open_store("bugece")      # Cron/bugece.py ile ortak yanıt deposu (bkz. raw_store.py)
+PAGE_SIZE = 24
+
+# Liste kaydındaki bu alanlardan biri değişirse promoter'ın etkinlikleri
+# pencere dolmadan yenilenir
+PROMOTER_FIELDS = ["name", "slug", "website", "social_media", "desc", "isActive", "short_url"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS promoter_events (
+    slug        TEXT NOT NULL,
+    promoter    TEXT,
+    event_title TEXT,
+    event_date  TEXT,
+    venue_name  TEXT,
+    timestamp   TEXT,
+    fetched_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS promoter_events_slug ON promoter_events (slug);
+"""
+
+def fetch_promoter_page(page):
+    """Tek bir promoter sayfası: (items, totalPage). Hata olursa exception."""
+    print(f"[INFO] Fetching promoters - Page {page}")
+    url = f"{PROMOTERS_API}?countryId=298795&pageSize={PAGE_SIZE}&page={page}"
+    def fetch():
+        response = limiter.call(requests.get, url, headers=HEADERS, timeout=15)
+        response.raise_for_status()
+        return response.json()
+    data = raw.get(f"promoters?page={page}", fetch).get("data", {})
+    return data.get("items", []), data.get("totalPage", 1)
+
+def to_promoter(item):
+    return {field: item.get(field) for field in PROMOTER_FIELDS}
+
+def fetch_all_promoters(failed_pages=None):
+    """
+    İlk sayfadan totalPage öğrenilir, kalan sayfalar FETCH_WORKERS iş
+    parçacığıyla eşzamanlı çekilir. Pasif (isActive=False) promoter'lar atlanır.
+    Alınamayan sayfa numaraları `failed_pages` listesine eklenir.
+    """
+    failed_pages = [] if failed_pages is None else failed_pages
+    try:
+        items, total_pages = fetch_promoter_page(1)
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch promoters on page 1: {e}")
+        failed_pages.append(1)
+        return
 
-    while True:
-        print(f"[INFO] Fetching promoters - Page {page}")
-        url = f"{PROMOTERS_API}?countryId=298795&pageSize=24&page={page}"
+    def safe_page(page):
         try:
-            response = requests.get(url, headers=HEADERS)
-            response.raise_for_status()
-            data = response.json().get("data", {})
-            items = data.get("items", [])
-
-            if not items:
-                break
-
-            for item in items:
-                promoters.append({
-                    "name": item.get("name"),
-                    "slug": item.get("slug"),
-                    "website": item.get("website"),
-                    "social_media": item.get("social_media"),
-                    "desc": item.get("desc"),
-                    "isActive": item.get("isActive"),
-                    "short_url": item.get("short_url")
-                })
-
-            if page >= data.get("totalPage", 1):
-                break
-            page += 1
-            time.sleep(0.5)  # API'yi yavaşlatmamak için
-
+            return fetch_promoter_page(page)[0]
         except Exception as e:
             print(f"[ERROR] Failed to fetch promoters on page {page}: {e}")
-            break
-
-    return promoters
+            failed_pages.append(page)
+            return []
+
+    inactive = 0
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        pages = [items]
+        if total_pages > 1:
+            pages = pages + list(pool.map(safe_page, range(2, total_pages + 1)))
+    for page_items in pages:
+        for item in page_items:
+            if item.get("isActive") is False:
+                inactive += 1
+                continue
+            yield to_promoter(item)
+    if inactive:
+        print(f"[INFO] {inactive} inactive promoters skipped.")
 
 def fetch_events_for_promoter(promoter):
-    """Verilen bir promoter için etkinlikleri çek"""
+    """Verilen bir promoter için etkinlikleri çek (hata olursa None)"""
     slug = promoter.get("slug")
     name = promoter.get("name")
 
@@ -64,9 +112,11 @@ def fetch_events_for_promoter(promoter):
 
     url = EVENTS_API_TEMPLATE.format(slug=slug)
     try:
-        response = requests.get(url, headers=HEADERS)
-        response.raise_for_status()
-        items = response.json().get("data", {}).get("items", [])
+        def fetch():
+            response = limiter.call(requests.get, url, headers=HEADERS, timeout=15)
+            response.raise_for_status()
+            return response.json()
+        items = raw.get(f"event/list?promoter={slug}", fetch).get("data", {}).get("items", [])
         event_list = []
 
         for event in items:
@@ -74,7 +124,7 @@ def fetch_events_for_promoter(promoter):
                 "promoter": name,
                 "event_title": event.get("name"),
                 "event_date": event.get("date"),
-                "venue_name": event.get("venue", {}).get("name"),
+                "venue_name": (event.get("venue") or {}).get("name"),
                 "timestamp": event.get("start_time")
             })
 
@@ -82,24 +132,114 @@ def fetch_events_for_promoter(promoter):
 
     except Exception as e:
         print(f"[ERROR] Failed to fetch events for promoter '{slug}': {e}")
-        return []
+        return None
+
+# --------------------------------------------------------------------------- #
+# Yerel promoter → etkinlik deposu
+# --------------------------------------------------------------------------- #
+def open_store():
+    conn = connect_state("bugece_promoter")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+def replace_promoter_events(conn, slug, events):
+    """Promoter'ın kayıtlarını tek işlemde yenileriyle değiştirir; değişiklik varsa True."""
+    rows = [tuple(e.get(f) for f in CSV_FIELDS) for e in events]
+    old = conn.execute(
+        "SELECT promoter, event_title, event_date, venue_name, timestamp FROM promoter_events WHERE slug = ?",
+        (slug,),
+    ).fetchall()
+    if sorted(map(tuple, old), key=repr) == sorted(rows, key=repr):
+        return False
+    now = datetime.now().isoformat()
+    conn.execute("BEGIN")
+    conn.execute("DELETE FROM promoter_events WHERE slug = ?", (slug,))
+    conn.executemany(
+        "INSERT INTO promoter_events (slug, promoter, event_title, event_date, venue_name, timestamp, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(slug, *row, now) for row in rows],
+    )
+    conn.execute("COMMIT")
+    return True
+
+def prune_promoters(conn, active_slugs):
+    """Listede artık görünmeyen (silinmiş/pasif) promoter'ların kayıtlarını siler."""
+    stale = [row["slug"] for row in conn.execute("SELECT DISTINCT slug FROM promoter_events")
+             if row["slug"] not in active_slugs]
+    if stale:
+        conn.executemany("DELETE FROM promoter_events WHERE slug = ?", [(slug,) for slug in stale])
+    return len(stale)
+
+def export_csv(conn, path):
+    """Depodaki tüm promoter etkinliklerini CSV'ye yazar; satır sayısını döner."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for row in conn.execute(
+            "SELECT promoter, event_title, event_date, venue_name, timestamp "
+            "FROM promoter_events ORDER BY promoter, event_date, event_title"
+        ):
+            writer.writerow(tuple(row))
+            count += 1
+    return count
 
 def main():
-    print("[START] Fetching all Bugece promoters and their events...")
+    parser = argparse.ArgumentParser(description="Bugece promoter → etkinlik taraması")
+    parser.add_argument("--csv", default=OUTPUT_CSV, help="Dışa aktarılacak CSV yolu")
+    parser.add_argument("--no-csv", action="store_true", help="CSV'yi hiç yazma")
+    parser.add_argument("--full", action="store_true", help="Tüm promoter'ları pencereden bağımsız yenile")
+    args = parser.parse_args()
 
-    # 1. Promoter'ları al
-    promoters = fetch_all_promoters()
-
-    # 2. Her promoter için etkinlikleri al
-    for promoter in promoters:
+    print("[START] Fetching all Bugece promoters and their events...")
+    store = open_store()
+    discovery = DiscoveryState("bugece_promoter")
+    changed = 0
+    failed_pages = []
+    active_slugs = set()
+
+    def due_promoters():
+        for promoter in fetch_all_promoters(failed_pages):
+            active_slugs.add(promoter["slug"])
+            reason = discovery.classify(promoter["slug"], promoter)
+            if reason or args.full:
+                yield promoter
+
+    def fetch_events(promoter):
         events = fetch_events_for_promoter(promoter)
-        all_events.extend(events)
-        time.sleep(0.3)
+        return None if events is None else (promoter, events)
 
-    # 3. DataFrame oluştur ve CSV olarak kaydet
-    df = pd.DataFrame(all_events)
-    df.to_csv("bugece_events.csv", index=False)
-    print(f"[DONE] {len(df)} events saved to 'bugece_events.csv'.")
+    def save(item):
+        nonlocal changed
+        promoter, events = item
+        if promoter.get("slug"):
+            changed += replace_promoter_events(store, promoter["slug"], events)
+            discovery.mark_fetched(promoter["slug"], promoter)
+
+    try:
+        stats = run_pipeline(
+            due_promoters(),
+            [Stage("events", fetch_events, workers=FETCH_WORKERS, many=False)],
+            save,
+        )
+        print(f"[INFO] {discovery.summary()} ({format_stats(stats)})")
+        print(f"[INFO] {limiter.report()}")
+        print(f"[INFO] {raw.summary()}")
+        # Liste eksik geldiyse silme yapılmaz; aksi halde eski promoter'lar temizlenir
+        if not failed_pages:
+            removed = prune_promoters(store, active_slugs)
+            if removed:
+                print(f"[INFO] {removed} promoters no longer listed; their events were removed.")
+            changed += removed
+        print(f"[INFO] {changed} promoters had changed events.")
+        if not changed:
+            print("[DONE] No promoter events changed; CSV left as is.")
+        elif not args.no_csv:
+            total = export_csv(store, args.csv)
+            print(f"[DONE] {total} events saved to '{args.csv}'.")
+    finally:
+        discovery.close()
+        store.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -5,25 +5,35 @@ ERRORLOG="run_events_error.log"
 
 echo "Çalıştırma başladı: $(date)" >> "$LOGFILE"
 
-SCRIPTS=(
-    "Cron/biletinial_artist_promoter_desc.py"
-    "Cron/bubilet.py"
-    "Cron/bugece.py"
-    "Cron/passo_promoter_artist.py"
+# Betiklerin ON CONFLICT upsert'leri tekil indekslere dayanır (Cron/migrations.py)
+echo "---- Şema göçleri: $(date) ----" >> "$LOGFILE"
+python3 Cron/event_table.py migrate >> "$LOGFILE" 2> >(tee -a "$ERRORLOG" >> "$LOGFILE" >&2)
+
+# Her iş ayrı süreçte; event_table yalnızca o işin modüllerini yükler
+# (komut listesi: python3 Cron/event_table.py list)
+JOBS=(
+    "biletinial"
+    "bubilet"
+    "bugece"
+    "passo"
 )
 
-for script in "${SCRIPTS[@]}"; do
-    echo "---- $script çalıştırılıyor: $(date) ----" >> "$LOGFILE"
-    if python3 "$script" >> "$LOGFILE" 2> >(tee -a "$ERRORLOG" >> "$LOGFILE" >&2); then
-        echo "$script başarıyla tamamlandı." >> "$LOGFILE"
+for job in "${JOBS[@]}"; do
+    echo "---- $job çalıştırılıyor: $(date) ----" >> "$LOGFILE"
+    if python3 Cron/event_table.py "$job" >> "$LOGFILE" 2> >(tee -a "$ERRORLOG" >> "$LOGFILE" >&2); then
+        echo "$job başarıyla tamamlandı." >> "$LOGFILE"
     else
-        echo "⚠️ $script çalıştırılırken hata oluştu!" >> "$LOGFILE"
+        echo "⚠️ $job çalıştırılırken hata oluştu!" >> "$LOGFILE"
     fi
 done
 
-echo "Git işlemleri başlıyor: $(date)" >> "$LOGFILE"
-git add .
-git commit -m "Cron dosyaları otomatik çalıştırıldı: $(date)" >> "$LOGFILE" 2>&1
-git push >> "$LOGFILE" 2>&1
+echo "Tüm işlemler tamamlandı: $(date)" >> "$LOGFILE"
+
+# Eski price_history bölümleri günlük özete indirilip arşivlenir (Cron/history_maintenance.py)
+python3 Cron/event_table.py history maintain >> "$LOGFILE" 2> >(tee -a "$ERRORLOG" >> "$LOGFILE" >&2)
+# Ham yanıt deposunda saklama süresi dolan yanıtlar silinir (Cron/raw_store.py)
+python3 Cron/event_table.py raw prune >> "$LOGFILE" 2> >(tee -a "$ERRORLOG" >> "$LOGFILE" >&2)
 
-echo "Tüm işlemler tamamlandı: $(date)" >> "$LOGFILE"
\ No newline at end of file
+# Loglar sıkıştırılıp artifacts/ altına taşınır, dışa aktarımlar tarihli
+# arşive alınır. Depoya yalnızca ARTIFACT_EXPORT=git ise veri dosyaları gönderilir.
+python3 Cron/event_table.py artifacts finalize --logs "$LOGFILE" "$ERRORLOG"